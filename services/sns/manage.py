@@ -4,9 +4,11 @@ import click
 import coverage
 import pytest
 
+from flask import current_app
 from flask.cli import FlaskGroup
 
 from project import create_app, db
+from project.api import benchmarks, jobs
 from project.api.models import *
 
 
@@ -32,6 +34,123 @@ def load_db():
         db.engine.execute(file.read())
 
 
+@cli.command()
+@click.option('--batch-size', default=1000, show_default=True)
+def canonicalize_friendships(batch_size):
+    """Store one row per friendship instead of mirrored pairs."""
+    jobs.canonicalize_friendships(batch_size, log=click.echo)
+
+
+@cli.command()
+@click.option('--limit', default=50, show_default=True)
+@click.option('--chunk-size', default=500, show_default=True)
+@click.option('--full', is_flag=True, help='Recompute every user.')
+def compute_friend_candidates(limit, chunk_size, full):
+    """Precompute friend candidates of users whose friendships changed."""
+    jobs.compute_friend_candidates(limit, chunk_size, full, log=click.echo)
+
+
+@cli.command()
+@click.option('--batch-size', default=1000, show_default=True)
+def expire_snoozes(batch_size):
+    """Unsnooze followers whose snooze expired."""
+    sweep = jobs.expire_snoozes(batch_size)
+    click.echo(
+        f'Expired {sweep.expired} snoozes in {sweep.batches} batches, '
+        f'{sweep.duration:.3f}s.'
+    )
+
+
+@cli.command()
+@click.option('--batch-size', default=1000, show_default=True)
+def fan_out_posts(batch_size):
+    """Append queued posts to their followers' timelines."""
+    fanout = jobs.fan_out_posts(batch_size)
+    click.echo(
+        f'Fanned out {fanout.posts} posts to {fanout.entries} timeline '
+        f'entries in {fanout.batches} batches, {fanout.duration:.3f}s.'
+    )
+
+
+@cli.command()
+@click.option(
+    '--threshold', type=int,
+    help='Follower count, FEED_FANOUT_THRESHOLD by default.'
+)
+def refresh_high_degree_authors(threshold):
+    """Recompute the authors whose posts are merged into feeds on read."""
+    config = current_app.config
+    total = jobs.refresh_high_degree_authors(
+        threshold or config['FEED_FANOUT_THRESHOLD'],
+        config['FEED_RECENT_POSTS_SIZE']
+    )
+    click.echo(f'{total} high-degree authors.')
+
+
+@cli.command()
+@click.option('--batch-size', default=1000, show_default=True)
+def reconcile_counters(batch_size):
+    """Correct reaction and comment counters from their source rows."""
+    total = jobs.reconcile_counters(batch_size, log=click.echo)
+    click.echo(f'Corrected {total} counters.')
+
+
+@cli.command()
+@click.option('--pairs', default=10000, show_default=True)
+@click.option('--users', default=1000, show_default=True)
+@click.option('--updates', default=1000, show_default=True)
+def bench_friendships(pairs, users, updates):
+    """Compare the mirrored and the canonical friendship layouts."""
+    results = benchmarks.benchmark_friendships(pairs, users, updates)
+    for layout, result in results.items():
+        click.echo(layout)
+        for key, value in result.items():
+            click.echo(f'  {key}: {value}')
+
+
+@cli.command()
+@click.option(
+    '--sizes', default='10,100,1000,10000,100000', show_default=True,
+    help='Comma-separated counts of suggestions.'
+)
+@click.option('--page', default=20, show_default=True)
+@click.option('--repeat', default=20, show_default=True)
+def bench_friend_suggestions(sizes, page, repeat):
+    """Measure friend suggestion page latency by suggestion count."""
+    sizes = [int(size) for size in sizes.split(',')]
+    results = benchmarks.benchmark_friend_suggestions(sizes, page, repeat)
+    for size, result in results.items():
+        click.echo(f'{size} suggestions')
+        for key, value in result.items():
+            click.echo(f'  {key}: {value}')
+
+
+@cli.command()
+@click.option('--users', default=5000, show_default=True)
+@click.option('--threshold', default=500, show_default=True)
+@click.option('--readers', default=200, show_default=True)
+def bench_feeds(users, threshold, readers):
+    """Compare fan-out on write with the hybrid feed."""
+    results = benchmarks.benchmark_feeds(
+        users, threshold=threshold, readers=readers)
+    for exponent, result in results.items():
+        click.echo(f'exponent {exponent}')
+        for key, value in result.items():
+            click.echo(f'  {key}: {value}')
+
+
+@cli.command()
+@click.option('--posts', default=2000000, show_default=True)
+@click.option('--repeat', default=10, show_default=True)
+def bench_search(posts, repeat):
+    """Compare full-text search with a pattern scan over generated posts."""
+    results = benchmarks.benchmark_search(posts, repeat=repeat)
+    for term, result in results.items():
+        click.echo('setup' if term is None else f'term {term!r}')
+        for key, value in result.items():
+            click.echo(f'  {key}: {value}')
+
+
 @cli.command()
 @click.option('-c', '--coverage', is_flag=True)
 def test(coverage):
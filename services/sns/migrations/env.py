@@ -73,6 +73,7 @@ def run_migrations_online():
     context.configure(connection=connection,
                       target_metadata=target_metadata,
                       process_revision_directives=process_revision_directives,
+                      transaction_per_migration=True,
                       **current_app.extensions['migrate'].configure_args)
 
     try:
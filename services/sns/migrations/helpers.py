@@ -0,0 +1,59 @@
+"""Helpers shared by migration scripts."""
+
+from contextlib import contextmanager
+
+from alembic import op
+
+
+@contextmanager
+def autocommit_block():
+    """Run the block outside of the migration transaction, e.g. for
+    statements which cannot run inside a transaction block.
+
+    The migration transaction is committed first and a new one is begun
+    after the block, like ``autocommit_block()`` of later Alembic versions.
+    """
+    context = op.get_context()
+    if context.as_sql:
+        context.impl.emit_commit()
+        yield
+        context.impl.emit_begin()
+        return
+
+    bind = op.get_bind()
+    bind.connection.commit()
+    bind.dialect.set_isolation_level(bind.connection, 'AUTOCOMMIT')
+    try:
+        yield
+    finally:
+        bind.dialect.reset_isolation_level(bind.connection)
+
+
+def create_indexes_concurrently(indexes, **kw):
+    """Build the indexes without blocking writes.
+
+    A failed build leaves an INVALID index behind, so an index is dropped
+    first if it exists.
+
+    :param indexes: ``(name, table, columns, where)`` tuples.
+    :param kw: Extra arguments of ``op.create_index``.
+    """
+    with autocommit_block():
+        for name, table, columns, where in indexes:
+            op.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+            op.create_index(
+                name, table, columns,
+                postgresql_concurrently=True,
+                postgresql_where=where,
+                **kw
+            )
+
+
+def drop_indexes_concurrently(indexes):
+    """Drop the indexes without blocking reads and writes.
+
+    :param indexes: ``(name, table, columns, where)`` tuples.
+    """
+    with autocommit_block():
+        for name, table, columns, where in reversed(indexes):
+            op.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
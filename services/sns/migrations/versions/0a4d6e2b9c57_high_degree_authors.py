@@ -0,0 +1,46 @@
+"""High-degree authors
+
+Revision ID: 0a4d6e2b9c57
+Revises: f7c3a9d2e418
+Create Date: 2026-10-18 22:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.helpers import (
+    create_indexes_concurrently,
+    drop_indexes_concurrently,
+)
+
+
+# revision identifiers, used by Alembic.
+revision = '0a4d6e2b9c57'
+down_revision = 'f7c3a9d2e418'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_posts_author_created', 'posts',
+     ['author_id', sa.text('created DESC'), sa.text('id DESC')], None),
+]
+
+
+def upgrade():
+    op.create_table(
+        'high_degree_authors',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('follower_count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id')
+    )
+
+    create_indexes_concurrently(INDEXES)
+
+
+def downgrade():
+    op.drop_table('high_degree_authors')
+
+    drop_indexes_concurrently(INDEXES)
@@ -0,0 +1,215 @@
+"""Initial schema
+
+Databases created before versioned migrations, with ``manage.py
+create_db`` and converted by ``manage.py canonicalize_friendships``,
+are at this revision: ``flask db stamp 3c1e5a2b7d90``.
+
+Revision ID: 3c1e5a2b7d90
+Revises:
+Create Date: 2026-10-18 20:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import ENUM
+
+
+# revision identifiers, used by Alembic.
+revision = '3c1e5a2b7d90'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+utcnow = sa.text("TIMEZONE('utc', statement_timestamp())")
+
+# Types are created once, up front, as ``reaction`` is shared.
+friendship_state = ENUM(
+    'accepted', 'blocked', 'pending', 'suggested',
+    name='friendship_state', create_type=False
+)
+gender = ENUM('female', 'male', 'others', name='gender', create_type=False)
+marital_status = ENUM(
+    'civil union', 'complicated', 'divorced', 'domestic partnership',
+    'married', 'open relationship', 'separated', 'single', 'taken',
+    'widowed',
+    name='marital_status', create_type=False
+)
+reaction = ENUM(
+    'angry', 'laugh', 'like', 'love', 'sad', 'wow',
+    name='reaction', create_type=False
+)
+ENUMS = friendship_state, gender, marital_status, reaction
+
+
+def upgrade():
+    for enum in ENUMS:
+        enum.create(op.get_bind())
+
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=utcnow),
+        sa.Column('updated_at', sa.DateTime(), server_default=utcnow),
+        sa.Column('first_name', sa.String(), nullable=False),
+        sa.Column('last_name', sa.String(), nullable=False),
+        sa.Column('email', sa.String(), nullable=False),
+        sa.Column('password', sa.String(), nullable=False),
+        sa.Column('gender', gender, nullable=False),
+        sa.Column('username', sa.String()),
+        sa.Column('birthday', sa.Date()),
+        sa.Column('bio', sa.Text()),
+        sa.Column('marital_status', marital_status),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('email'),
+        sa.UniqueConstraint('username')
+    )
+    op.create_table(
+        'friendships',
+        sa.Column('left_user_id', sa.Integer(), nullable=False),
+        sa.Column('right_user_id', sa.Integer(), nullable=False),
+        sa.Column('action_user_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=utcnow),
+        sa.Column('updated_at', sa.DateTime(), server_default=utcnow),
+        sa.Column('state', friendship_state, nullable=False),
+        sa.CheckConstraint(
+            'left_user_id < right_user_id',
+            name='friendships_canonical_check'
+        ),
+        sa.ForeignKeyConstraint(
+            ['left_user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(
+            ['right_user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(
+            ['action_user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('left_user_id', 'right_user_id')
+    )
+    op.create_index(
+        'ix_friendships_right_user_id', 'friendships', ['right_user_id'])
+    op.execute(
+        'CREATE VIEW friendship_edges AS '
+        'SELECT left_user_id, right_user_id, action_user_id, '
+        'created_at, updated_at, state FROM friendships '
+        'UNION ALL '
+        'SELECT right_user_id, left_user_id, action_user_id, '
+        'created_at, updated_at, state FROM friendships'
+    )
+    op.create_table(
+        'followers',
+        sa.Column('follower_id', sa.Integer(), nullable=False),
+        sa.Column('followed_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=utcnow),
+        sa.Column('updated_at', sa.DateTime(), server_default=utcnow),
+        sa.Column('is_snoozed', sa.Boolean(), server_default='f'),
+        sa.Column('expiration', sa.DateTime()),
+        sa.ForeignKeyConstraint(
+            ['follower_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(
+            ['followed_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('follower_id', 'followed_id')
+    )
+    op.create_table(
+        'photo_albums',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(), nullable=False),
+        sa.Column('description', sa.String()),
+        sa.Column('created', sa.DateTime()),
+        sa.Column('updated', sa.DateTime()),
+        sa.Column('owner_id', sa.Integer()),
+        sa.Column('cover_photo_id', sa.Integer()),
+        sa.ForeignKeyConstraint(['owner_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('title')
+    )
+    op.create_table(
+        'photos',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('url', sa.String(), nullable=False),
+        sa.Column('caption', sa.String()),
+        sa.Column('created', sa.DateTime()),
+        sa.Column('owner_id', sa.Integer()),
+        sa.Column('album_id', sa.Integer()),
+        sa.ForeignKeyConstraint(['album_id'], ['photo_albums.id']),
+        sa.ForeignKeyConstraint(['owner_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_foreign_key(
+        'photo_albums_cover_photo_id_fkey',
+        'photo_albums', 'photos',
+        ['cover_photo_id'], ['id']
+    )
+    op.create_table(
+        'photo_album_contributions',
+        sa.Column('album_id', sa.Integer(), nullable=False),
+        sa.Column('contributor_id', sa.Integer(), nullable=False),
+        sa.Column('created', sa.DateTime()),
+        sa.ForeignKeyConstraint(['album_id'], ['photo_albums.id']),
+        sa.ForeignKeyConstraint(['contributor_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('album_id', 'contributor_id')
+    )
+    op.create_table(
+        'posts',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('content', sa.Text(), nullable=False),
+        sa.Column('created', sa.DateTime()),
+        sa.Column('updated', sa.DateTime()),
+        sa.Column('author_id', sa.Integer()),
+        sa.Column('photo_id', sa.Integer()),
+        sa.ForeignKeyConstraint(['author_id'], ['users.id']),
+        sa.ForeignKeyConstraint(['photo_id'], ['photos.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table(
+        'post_reactions',
+        sa.Column('actor_id', sa.Integer(), nullable=False),
+        sa.Column('post_id', sa.Integer(), nullable=False),
+        sa.Column('reaction', reaction, nullable=False),
+        sa.Column('created', sa.DateTime()),
+        sa.ForeignKeyConstraint(['actor_id'], ['users.id']),
+        sa.ForeignKeyConstraint(['post_id'], ['posts.id']),
+        sa.PrimaryKeyConstraint('actor_id', 'post_id')
+    )
+    op.create_table(
+        'comments',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('content', sa.Text(), nullable=False),
+        sa.Column('created', sa.DateTime()),
+        sa.Column('updated', sa.DateTime()),
+        sa.Column('photo_url', sa.String()),
+        sa.Column('author_id', sa.Integer()),
+        sa.Column('post_id', sa.Integer()),
+        sa.Column('root_comment_id', sa.Integer()),
+        sa.ForeignKeyConstraint(['author_id'], ['users.id']),
+        sa.ForeignKeyConstraint(['post_id'], ['posts.id']),
+        sa.ForeignKeyConstraint(['root_comment_id'], ['comments.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table(
+        'comment_reactions',
+        sa.Column('actor_id', sa.Integer(), nullable=False),
+        sa.Column('comment_id', sa.Integer(), nullable=False),
+        sa.Column('reaction', reaction, nullable=False),
+        sa.Column('created', sa.DateTime()),
+        sa.ForeignKeyConstraint(['actor_id'], ['users.id']),
+        sa.ForeignKeyConstraint(['comment_id'], ['comments.id']),
+        sa.PrimaryKeyConstraint('actor_id', 'comment_id')
+    )
+
+
+def downgrade():
+    op.drop_table('comment_reactions')
+    op.drop_table('comments')
+    op.drop_table('post_reactions')
+    op.drop_table('posts')
+    op.drop_table('photo_album_contributions')
+    op.drop_constraint(
+        'photo_albums_cover_photo_id_fkey', 'photo_albums',
+        type_='foreignkey'
+    )
+    op.drop_table('photos')
+    op.drop_table('photo_albums')
+    op.drop_table('followers')
+    op.execute('DROP VIEW friendship_edges')
+    op.drop_table('friendships')
+    op.drop_table('users')
+    for enum in ENUMS:
+        enum.drop(op.get_bind())
@@ -0,0 +1,54 @@
+"""Social graph indexes
+
+Indexes are built CONCURRENTLY, outside of the migration transaction.
+
+Revision ID: 8f4b2d61c0a7
+Revises: 3c1e5a2b7d90
+Create Date: 2026-10-18 20:45:00.000000
+
+"""
+import sqlalchemy as sa
+
+from migrations.helpers import (
+    create_indexes_concurrently,
+    drop_indexes_concurrently,
+)
+
+
+# revision identifiers, used by Alembic.
+revision = '8f4b2d61c0a7'
+down_revision = '3c1e5a2b7d90'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_friendships_left_state_updated', 'friendships',
+     ['left_user_id', 'state', sa.text('updated_at DESC')], None),
+    ('ix_friendships_right_state_updated', 'friendships',
+     ['right_user_id', 'state', sa.text('updated_at DESC')], None),
+    ('ix_friendships_pending_action', 'friendships',
+     ['action_user_id', sa.text('updated_at DESC')],
+     sa.text("state = 'pending'")),
+    ('ix_friendships_suggested_action', 'friendships',
+     ['action_user_id', sa.text('updated_at DESC')],
+     sa.text("state = 'suggested'")),
+    ('ix_followers_followed_created', 'followers',
+     ['followed_id', 'created_at', 'follower_id'], None),
+    ('ix_followers_follower_created', 'followers',
+     ['follower_id', 'created_at', 'followed_id'], None),
+]
+
+OBSOLETE_INDEXES = [
+    ('ix_friendships_right_user_id', 'friendships', ['right_user_id'], None),
+]
+
+
+def upgrade():
+    create_indexes_concurrently(INDEXES)
+    # Covered by ix_friendships_right_state_updated.
+    drop_indexes_concurrently(OBSOLETE_INDEXES)
+
+
+def downgrade():
+    create_indexes_concurrently(OBSOLETE_INDEXES)
+    drop_indexes_concurrently(INDEXES)
@@ -0,0 +1,76 @@
+"""Reaction and comment counters
+
+Revision ID: 9b3e7f1c4d26
+Revises: 0a4d6e2b9c57
+Create Date: 2026-10-18 23:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.helpers import (
+    create_indexes_concurrently,
+    drop_indexes_concurrently,
+)
+
+
+# revision identifiers, used by Alembic.
+revision = '9b3e7f1c4d26'
+down_revision = '0a4d6e2b9c57'
+branch_labels = None
+depends_on = None
+
+
+REACTION_COLUMNS = [
+    'angry_count',
+    'laugh_count',
+    'like_count',
+    'love_count',
+    'sad_count',
+    'wow_count',
+]
+
+INDEXES = [
+    ('ix_post_reactions_post_id', 'post_reactions', ['post_id'], None),
+    ('ix_comment_reactions_comment_id', 'comment_reactions',
+     ['comment_id'], None),
+    ('ix_comments_post_id', 'comments', ['post_id'], None),
+    ('ix_comments_root_comment_id', 'comments', ['root_comment_id'], None),
+]
+
+
+def count_columns(*names):
+    return [
+        sa.Column(name, sa.Integer(), server_default='0', nullable=False)
+        for name in REACTION_COLUMNS + list(names)
+    ]
+
+
+def upgrade():
+    op.create_table(
+        'post_counters',
+        sa.Column('post_id', sa.Integer(), nullable=False),
+        sa.Column('shard', sa.SmallInteger(), nullable=False),
+        *count_columns('comment_count'),
+        sa.ForeignKeyConstraint(
+            ['post_id'], ['posts.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('post_id', 'shard')
+    )
+    op.create_table(
+        'comment_counters',
+        sa.Column('comment_id', sa.Integer(), nullable=False),
+        sa.Column('shard', sa.SmallInteger(), nullable=False),
+        *count_columns('reply_count'),
+        sa.ForeignKeyConstraint(
+            ['comment_id'], ['comments.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('comment_id', 'shard')
+    )
+
+    create_indexes_concurrently(INDEXES)
+
+
+def downgrade():
+    op.drop_table('comment_counters')
+    op.drop_table('post_counters')
+
+    drop_indexes_concurrently(INDEXES)
@@ -0,0 +1,53 @@
+"""Friend candidates
+
+Revision ID: b6d09e3f5a14
+Revises: 8f4b2d61c0a7
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6d09e3f5a14'
+down_revision = '8f4b2d61c0a7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'friend_candidates',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('rank', sa.SmallInteger(), nullable=False),
+        sa.Column('candidate_id', sa.Integer(), nullable=False),
+        sa.Column('mutual_count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(
+            ['candidate_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id', 'rank')
+    )
+    op.create_index(
+        'ix_friend_candidates_candidate_id', 'friend_candidates',
+        ['candidate_id']
+    )
+    op.create_table(
+        'friend_candidate_updates',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('changed_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id')
+    )
+    # Queue everyone for the first run.
+    op.execute(
+        'INSERT INTO friend_candidate_updates (user_id, changed_at) '
+        "SELECT id, TIMEZONE('utc', statement_timestamp()) FROM users"
+    )
+
+
+def downgrade():
+    op.drop_table('friend_candidate_updates')
+    op.drop_table('friend_candidates')
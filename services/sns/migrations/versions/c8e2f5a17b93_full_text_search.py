@@ -0,0 +1,48 @@
+"""Full-text search
+
+Revision ID: c8e2f5a17b93
+Revises: 9b3e7f1c4d26
+Create Date: 2026-10-19 00:40:00.000000
+
+Adding stored generated columns rewrites the tables under an exclusive
+lock, so run it in a maintenance window on large tables.
+
+"""
+from alembic import op
+
+from migrations.helpers import (
+    create_indexes_concurrently,
+    drop_indexes_concurrently,
+)
+
+
+# revision identifiers, used by Alembic.
+revision = 'c8e2f5a17b93'
+down_revision = '9b3e7f1c4d26'
+branch_labels = None
+depends_on = None
+
+
+TABLES = ['posts', 'comments']
+
+INDEXES = [
+    ('ix_posts_search_vector', 'posts', ['search_vector'], None),
+    ('ix_comments_search_vector', 'comments', ['search_vector'], None),
+]
+
+
+def upgrade():
+    for table in TABLES:
+        op.execute(
+            f'ALTER TABLE {table} ADD COLUMN search_vector tsvector '
+            "GENERATED ALWAYS AS (to_tsvector('english', content)) STORED"
+        )
+
+    create_indexes_concurrently(INDEXES, postgresql_using='gin')
+
+
+def downgrade():
+    for table in TABLES:
+        op.drop_column(table, 'search_vector')
+
+    drop_indexes_concurrently(INDEXES)
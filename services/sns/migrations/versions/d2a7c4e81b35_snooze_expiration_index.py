@@ -0,0 +1,34 @@
+"""Snooze expiration index
+
+Revision ID: d2a7c4e81b35
+Revises: b6d09e3f5a14
+Create Date: 2026-10-18 21:15:00.000000
+
+"""
+import sqlalchemy as sa
+
+from migrations.helpers import (
+    create_indexes_concurrently,
+    drop_indexes_concurrently,
+)
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2a7c4e81b35'
+down_revision = 'b6d09e3f5a14'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_followers_snooze_expiration', 'followers', ['expiration'],
+     sa.text('is_snoozed')),
+]
+
+
+def upgrade():
+    create_indexes_concurrently(INDEXES)
+
+
+def downgrade():
+    drop_indexes_concurrently(INDEXES)
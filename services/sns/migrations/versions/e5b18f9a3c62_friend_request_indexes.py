@@ -0,0 +1,38 @@
+"""Friend request indexes
+
+Revision ID: e5b18f9a3c62
+Revises: d2a7c4e81b35
+Create Date: 2026-10-18 21:40:00.000000
+
+"""
+import sqlalchemy as sa
+
+from migrations.helpers import (
+    create_indexes_concurrently,
+    drop_indexes_concurrently,
+)
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5b18f9a3c62'
+down_revision = 'd2a7c4e81b35'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_friendships_left_pending_received', 'friendships',
+     ['left_user_id', sa.text('updated_at DESC')],
+     sa.text("state = 'pending' AND action_user_id = right_user_id")),
+    ('ix_friendships_right_pending_received', 'friendships',
+     ['right_user_id', sa.text('updated_at DESC')],
+     sa.text("state = 'pending' AND action_user_id = left_user_id")),
+]
+
+
+def upgrade():
+    create_indexes_concurrently(INDEXES)
+
+
+def downgrade():
+    drop_indexes_concurrently(INDEXES)
@@ -0,0 +1,73 @@
+"""Timelines
+
+Revision ID: f7c3a9d2e418
+Revises: e5b18f9a3c62
+Create Date: 2026-10-18 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.helpers import (
+    create_indexes_concurrently,
+    drop_indexes_concurrently,
+)
+
+
+# revision identifiers, used by Alembic.
+revision = 'f7c3a9d2e418'
+down_revision = 'e5b18f9a3c62'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_followers_followed_unsnoozed', 'followers',
+     ['followed_id', 'follower_id'], sa.text('is_snoozed IS NOT TRUE')),
+]
+
+
+def upgrade():
+    op.create_table(
+        'timelines',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('post_id', sa.Integer(), nullable=False),
+        sa.Column('author_id', sa.Integer(), nullable=False),
+        sa.Column('created', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(
+            ['post_id'], ['posts.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(
+            ['author_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id', 'post_id')
+    )
+    op.create_index(
+        'ix_timelines_user_created', 'timelines',
+        ['user_id', sa.text('created DESC'), sa.text('post_id DESC')]
+    )
+    op.create_index(
+        'ix_timelines_user_author', 'timelines', ['user_id', 'author_id'])
+    op.create_table(
+        'timeline_fanouts',
+        sa.Column('post_id', sa.Integer(), nullable=False),
+        sa.Column('author_id', sa.Integer(), nullable=False),
+        sa.Column('created', sa.DateTime(), nullable=False),
+        sa.Column(
+            'last_follower_id', sa.Integer(), server_default='0',
+            nullable=False),
+        sa.ForeignKeyConstraint(
+            ['post_id'], ['posts.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(
+            ['author_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('post_id')
+    )
+
+    create_indexes_concurrently(INDEXES)
+
+
+def downgrade():
+    op.drop_table('timeline_fanouts')
+    op.drop_table('timelines')
+
+    drop_indexes_concurrently(INDEXES)
@@ -35,6 +35,33 @@ def create_app(app_config=None):
     from project.api.app import sns_blueprint
     app.register_blueprint(sns_blueprint)
 
+    # expire snoozes in the background
+    if app.config['SNOOZE_SWEEP_INTERVAL']:
+        from project.api.jobs import expire_snoozes, IntervalJob
+        sweeper = IntervalJob(
+            app,
+            expire_snoozes,
+            app.config['SNOOZE_SWEEP_INTERVAL'],
+            app.config['SNOOZE_SWEEP_BATCH_SIZE'],
+            totals=('expired',)
+        )
+        app.extensions['snooze_sweeper'] = sweeper
+        sweeper.start()
+
+    # fan out posts to timelines in the background
+    if app.config['TIMELINE_FANOUT_INTERVAL']:
+        from project.api.jobs import fan_out_posts, IntervalJob
+        worker = IntervalJob(
+            app,
+            fan_out_posts,
+            app.config['TIMELINE_FANOUT_INTERVAL'],
+            app.config['TIMELINE_FANOUT_BATCH_SIZE'],
+            totals=('posts', 'entries'),
+            quiet=True
+        )
+        app.extensions['fanout_worker'] = worker
+        worker.start()
+
     # shell context for flask cli
     app.shell_context_processor({'app': app, 'db': db})
     return app
@@ -1,7 +1,7 @@
 from flask import Blueprint
-from flask_graphql import GraphQLView
 
 from project.api.schemas import schema
+from project.api.view import GraphQLView
 
 
 sns_blueprint = Blueprint('sns', __name__)
@@ -0,0 +1,449 @@
+"""Database benchmarks, run from ``manage.py``.
+
+Benchmarks work on temporary tables of generated data, so they leave
+the database untouched.
+"""
+
+import random
+import time
+
+from contextlib import contextmanager
+
+from flask import current_app
+
+from project import db
+from project.api.feed import load_feed
+from project.api.models.enums import FriendshipState
+from project.api.models.post import Post
+from project.api.models.user import Friendship, make_suggestion_edges
+from project.api.paging import keyset_filter
+from project.api.search import ranked_matches, to_tsquery
+
+
+def timed(fn, *args):
+    """
+    :return: Seconds the function took.
+    """
+    started = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - started
+
+
+def random_pairs(count, users, seed=0):
+    """Return sorted, distinct ``(least, greatest)`` pairs of user IDs."""
+    rng = random.Random(seed)
+    pairs = set()
+    while len(pairs) < count:
+        a, b = rng.sample(range(1, users + 1), 2)
+        pairs.add((min(a, b), max(a, b)))
+    return sorted(pairs)
+
+
+def benchmark_friendships(pairs=10000, users=1000, updates=1000, seed=0):
+    """Compare the mirrored and the canonical friendship layouts.
+
+    For each layout, measures the time to insert ``pairs`` friendships,
+    to change the state of ``updates`` of them one transaction at a time,
+    and to find the friends of ``updates`` people, plus the size of the
+    table and its indexes.
+
+    :return: Dict of results by layout.
+    """
+    keys = random_pairs(pairs, users, seed)
+    sample = random.Random(seed).sample(keys, min(updates, len(keys)))
+    people = [left for left, right in sample]
+    results = {}
+
+    with db.engine.connect() as conn:
+        for layout in ('mirrored', 'canonical'):
+            table = f'bench_friendships_{layout}'
+            conn.execute(
+                f'CREATE TEMP TABLE {table} ('
+                'left_user_id integer NOT NULL, '
+                'right_user_id integer NOT NULL, '
+                'action_user_id integer NOT NULL, '
+                'created_at timestamp DEFAULT now(), '
+                'updated_at timestamp DEFAULT now(), '
+                'state friendship_state NOT NULL, '
+                'PRIMARY KEY (left_user_id, right_user_id))'
+            )
+
+            if layout == 'mirrored':
+                rows = [
+                    r for a, b in keys for r in ((a, b, a), (b, a, a))
+                ]
+                update = (
+                    f"UPDATE {table} SET state = 'blocked', "
+                    'updated_at = now() WHERE '
+                    '(left_user_id, right_user_id) IN ((%s, %s), (%s, %s))'
+                )
+                update_args = [(a, b, b, a) for a, b in sample]
+                friends = (
+                    f'SELECT right_user_id FROM {table} '
+                    'WHERE left_user_id = %s'
+                )
+            else:
+                conn.execute(f'CREATE INDEX ON {table} (right_user_id)')
+                rows = [(a, b, a) for a, b in keys]
+                update = (
+                    f"UPDATE {table} SET state = 'blocked', "
+                    'updated_at = now() '
+                    'WHERE left_user_id = %s AND right_user_id = %s'
+                )
+                update_args = sample
+                friends = (
+                    f'SELECT right_user_id FROM {table} '
+                    'WHERE left_user_id = %s '
+                    'UNION ALL '
+                    f'SELECT left_user_id FROM {table} '
+                    'WHERE right_user_id = %s'
+                )
+
+            def insert():
+                with conn.begin():
+                    conn.execute(
+                        f'INSERT INTO {table} (left_user_id, '
+                        'right_user_id, action_user_id, state) '
+                        "VALUES (%s, %s, %s, 'accepted')",
+                        rows
+                    )
+
+            def update_each():
+                for args in update_args:
+                    with conn.begin():
+                        conn.execute(update, args)
+
+            def find_friends():
+                for id in people:
+                    args = (id,) * friends.count('%s')
+                    conn.execute(friends, args).fetchall()
+
+            insert_time = timed(insert)
+            conn.execute(f'ANALYZE {table}')
+            update_time = timed(update_each)
+            read_time = timed(find_friends)
+            size = conn.execute(
+                'SELECT pg_table_size(%s), pg_indexes_size(%s)',
+                (table, table)
+            ).first()
+            conn.execute(f'DROP TABLE {table}')
+
+            results[layout] = {
+                'rows': len(rows),
+                'table_bytes': size[0],
+                'index_bytes': size[1],
+                'inserts_per_sec': round(len(keys) / insert_time),
+                'updates_per_sec': round(len(update_args) / update_time),
+                'reads_per_sec': round(len(people) / read_time),
+            }
+    return results
+
+
+def benchmark_friend_suggestions(sizes=(10, 100, 1000, 10000, 100000),
+                                 page=20, repeat=20):
+    """Measure the latency of a page of ``friendSuggestions`` against
+    the count of suggestions the user is involved in.
+
+    For each size, a copy of the friendships table is filled with
+    ``size`` suggestions of one person, half received and half made.
+    The first page and the page after the middle suggestion are fetched
+    ``repeat`` times each by the keyset query, and so is the whole list,
+    as it was fetched before paging in SQL.
+
+    :return: Dict of results by size, in milliseconds per fetch.
+    """
+    name = 'bench_suggestions'
+    table = Friendship.__table__.tometadata(db.MetaData(), name=name)
+    edges = make_suggestion_edges(table)
+    sort_key = (
+        edges.c.updated_at, edges.c.left_user_id, edges.c.right_user_id)
+    t = table.c
+    results = {}
+
+    with db.engine.connect() as conn:
+        def fetch(query):
+            def run():
+                for _ in range(repeat):
+                    conn.execute(query).fetchall()
+            return round(timed(run) / repeat * 1000, 3)
+
+        for size in sizes:
+            conn.execute(
+                f'CREATE TEMP TABLE {name} (LIKE friendships INCLUDING ALL)')
+            # Person 1 receives the even suggestions and makes the odd.
+            conn.execute(
+                f'INSERT INTO {name} (left_user_id, right_user_id, '
+                'action_user_id, state, updated_at) '
+                'SELECT CASE WHEN mod(i, 2) = 0 THEN 1 ELSE i + 1 END, '
+                '%(size)s + i + 1, '
+                'CASE WHEN mod(i, 2) = 0 THEN i + 1 ELSE 1 END, '
+                "'suggested', now() - i * interval '1 second' "
+                'FROM generate_series(1, %(size)s) AS i',
+                {'size': size}
+            )
+            conn.execute(f'ANALYZE {name}')
+
+            first = (
+                db.select([edges]).
+                where(edges.c.user_id == 1).
+                order_by(*(c.desc() for c in sort_key)).
+                limit(page)
+            )
+            middle = conn.execute(first.offset(size // 2).limit(1)).first()
+            after = first.where(keyset_filter(
+                sort_key, tuple(middle[c.name] for c in sort_key), True))
+            everything = (
+                db.select([table]).
+                where(db.and_(
+                    t.state == FriendshipState.SUGGESTED,
+                    db.or_(
+                        t.left_user_id == 1,
+                        t.right_user_id == 1,
+                        t.action_user_id == 1,
+                    )
+                )).
+                order_by(t.updated_at.desc())
+            )
+
+            results[size] = {
+                'first_page_ms': fetch(first),
+                'middle_page_ms': fetch(after),
+                'all_rows_ms': fetch(everything),
+            }
+            conn.execute(f'DROP TABLE {name}')
+    return results
+
+
+@contextmanager
+def session_on(conn):
+    """Run ``db.session`` on the connection for the duration of the
+    block, so the ORM sees its temporary tables.
+    """
+    session = db.create_scoped_session({'bind': conn, 'binds': {}})
+    saved, db.session = db.session, session
+    try:
+        yield session
+    finally:
+        session.remove()
+        db.session = saved
+
+
+def benchmark_feeds(users=5000, exponents=(1.5, 2.0, 2.5), threshold=500,
+                    posts=5, readers=200, page=20, seed=0):
+    """Compare pure fan-out on write with the hybrid feed across
+    power-law follower distributions.
+
+    Follower counts of ``users`` authors are drawn from a Pareto
+    distribution for each exponent, and each author has ``posts``
+    posts. Temporary ``followers``, ``posts``, ``timelines`` and
+    ``high_degree_authors`` tables, which shadow the real ones in the
+    benchmark's connection, are filled for each strategy: with every
+    post fanned out, and with the posts of authors with at least
+    ``threshold`` followers left to be merged on read. The first page
+    of the feeds of ``readers`` sampled users is then loaded by
+    :func:`.load_feed`, starting with empty recent post windows.
+
+    :return: Dict of results by exponent.
+    """
+    rng = random.Random(seed)
+    names = ('followers', 'posts', 'timelines', 'high_degree_authors')
+    results = {}
+
+    with db.engine.connect() as conn:
+        for name in names:
+            conn.execute(
+                f'CREATE TEMP TABLE {name} (LIKE {name} INCLUDING ALL)')
+
+        for exponent in exponents:
+            counts = [
+                min(int(rng.paretovariate(exponent - 1)), users - 1)
+                for _ in range(users)
+            ]
+            pairs = [
+                (follower, author)
+                for author, count in enumerate(counts, 1)
+                for follower in rng.sample(range(1, users + 1), count)
+                if follower != author
+            ]
+            with conn.begin():
+                conn.execute('TRUNCATE ' + ', '.join(
+                    f'pg_temp.{name}' for name in names))
+                conn.execute(
+                    'INSERT INTO pg_temp.followers '
+                    '(follower_id, followed_id) SELECT * FROM '
+                    'unnest(%(followers)s::int[], %(authors)s::int[])',
+                    {'followers': [f for f, a in pairs],
+                     'authors': [a for f, a in pairs]}
+                )
+                conn.execute(
+                    'INSERT INTO pg_temp.posts '
+                    '(id, author_id, content, created) '
+                    "SELECT i, (i - 1) / %(posts)s + 1, 'post', "
+                    "now() - random() * interval '1 day' "
+                    'FROM generate_series(1, %(count)s) AS i',
+                    {'posts': posts, 'count': users * posts}
+                )
+            conn.execute('ANALYZE followers')
+            conn.execute('ANALYZE posts')
+
+            sample = rng.sample(range(1, users + 1), min(readers, users))
+            result = results[exponent] = {
+                'high_degree_authors': sum(c >= threshold for c in counts),
+                'max_followers': max(counts),
+            }
+
+            for strategy in ('push', 'hybrid'):
+                def fan_out():
+                    with conn.begin():
+                        conn.execute(
+                            'TRUNCATE pg_temp.timelines, '
+                            'pg_temp.high_degree_authors')
+                        if strategy == 'hybrid':
+                            conn.execute(
+                                'INSERT INTO pg_temp.high_degree_authors '
+                                'SELECT followed_id, count(*) '
+                                'FROM followers GROUP BY followed_id '
+                                'HAVING count(*) >= %(threshold)s',
+                                {'threshold': threshold}
+                            )
+                        # Posts of high-degree authors are appended to
+                        # their authors' timelines only.
+                        return conn.execute(
+                            'INSERT INTO pg_temp.timelines '
+                            '(user_id, post_id, author_id, created) '
+                            'SELECT f.follower_id, p.id, p.author_id, '
+                            'p.created FROM followers f '
+                            'JOIN posts p ON p.author_id = f.followed_id '
+                            'WHERE f.followed_id NOT IN '
+                            '(SELECT user_id FROM high_degree_authors) '
+                            'UNION ALL '
+                            'SELECT author_id, id, author_id, created '
+                            'FROM posts'
+                        ).rowcount
+
+                started = time.perf_counter()
+                rows = fan_out()
+                fanout_time = time.perf_counter() - started
+                conn.execute('ANALYZE timelines')
+                size = conn.execute(
+                    "SELECT pg_total_relation_size('timelines')").scalar()
+
+                current_app.extensions.pop('recent_posts', None)
+                with session_on(conn):
+                    read_times = [
+                        timed(load_feed, id, {'first': page})
+                        for id in sample
+                    ]
+
+                result.update({
+                    f'{strategy}_rows': rows,
+                    f'{strategy}_bytes': size,
+                    f'{strategy}_fanout_s': round(fanout_time, 3),
+                    f'{strategy}_read_ms': round(
+                        sum(read_times) / len(read_times) * 1000, 3),
+                    f'{strategy}_max_read_ms': round(
+                        max(read_times) * 1000, 3),
+                })
+
+        for name in names:
+            conn.execute(f'DROP TABLE pg_temp.{name}')
+    return results
+
+
+def benchmark_search(posts=2000000, words=10000, length=20,
+                     terms=('w1', 'w30', 'w1000', 'w1 w30'), page=20,
+                     repeat=10):
+    """Compare full-text search with a pattern scan over generated posts.
+
+    A copy of the posts table is filled with ``posts`` posts of
+    ``length`` words drawn from a vocabulary of ``words`` words, skewed
+    toward the first ones like natural text, and indexed with GIN. For
+    each term, the first page of ranked matches and the page after it
+    are fetched ``repeat`` times each, and so is the first page of an
+    unranked scan matching the same whole words, ``~* '\\mterm\\M'``.
+    Unlike ``ILIKE '%term%'``, it doesn't match e.g. w10 for w1. The time
+    to insert 1000 posts one per transaction, maintaining the search
+    vectors and the index, is measured too.
+
+    :return: Dict of results by term, in milliseconds per fetch, and
+        the setup timings under ``None``.
+    """
+    name = 'bench_posts'
+    table = Post.__table__.tometadata(db.MetaData(), name=name)
+    results = {}
+
+    with db.engine.connect() as conn:
+        def fetch(query):
+            def run():
+                for _ in range(repeat):
+                    conn.execute(query).fetchall()
+            return round(timed(run) / repeat * 1000, 3)
+
+        def insert(start, count):
+            conn.execute(
+                f'INSERT INTO {name} (id, content) '
+                "SELECT i, string_agg('w' || floor(%(words)s * "
+                "power(random(), 3))::int, ' ') "
+                'FROM generate_series(%(start)s, %(stop)s) AS i, '
+                'generate_series(1, %(length)s) AS j '
+                'GROUP BY i',
+                {'words': words, 'start': start,
+                 'stop': start + count - 1, 'length': length}
+            )
+
+        conn.execute(
+            f'CREATE TEMP TABLE {name} '
+            '(LIKE posts INCLUDING GENERATED)')
+        conn.execute('SELECT setseed(0)')
+        load_time = timed(insert, 1, posts)
+        index_time = timed(
+            conn.execute,
+            f'CREATE INDEX ON {name} USING gin (search_vector)'
+        )
+        conn.execute(f'ANALYZE {name}')
+
+        def insert_each():
+            for i in range(1000):
+                with conn.begin():
+                    insert(posts + i + 1, 1)
+
+        insert_time = timed(insert_each)
+        results[None] = {
+            'posts': posts,
+            'load_s': round(load_time, 3),
+            'index_s': round(index_time, 3),
+            'inserts_per_sec': round(1000 / insert_time),
+        }
+
+        for term in terms:
+            matches = ranked_matches(table, 'post', to_tsquery(term))
+            m = matches.alias('matches')
+            sort_key = (m.c.rank, m.c.id)
+            first = (
+                db.select([m]).
+                order_by(*(c.desc() for c in sort_key)).
+                limit(page)
+            )
+            rows = conn.execute(first).fetchall()
+            after = first
+            if rows:
+                after = first.where(keyset_filter(
+                    sort_key, (rows[-1].rank, rows[-1].id), True))
+            scan = (
+                db.select([table.c.id]).
+                where(db.and_(*(
+                    table.c.content.op('~*')(f'\\m{word}\\M')
+                    for word in term.split()
+                ))).
+                limit(page)
+            )
+
+            results[term] = {
+                'matches': conn.execute(
+                    db.select([db.func.count()]).select_from(m)).scalar(),
+                'first_page_ms': fetch(first),
+                'next_page_ms': fetch(after),
+                'scan_page_ms': fetch(scan),
+            }
+        conn.execute(f'DROP TABLE {name}')
+    return results
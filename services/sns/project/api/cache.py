@@ -0,0 +1,214 @@
+import pickle
+import sqlite3
+import time
+
+from collections import OrderedDict
+from contextlib import contextmanager
+from threading import Lock
+
+from flask import current_app
+from sqlalchemy.orm import load_only, make_transient_to_detached
+
+from project import db
+
+
+class MemoryBackend:
+    """In-process LRU cache with per-entry TTL.
+
+    Deletes don't reach other processes, so use it with one process only.
+    """
+
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            value, expires = entry
+            if expires <= time.time():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (value, time.time() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteBackend:
+    """LRU cache with per-entry TTL in a local SQLite file, shared by
+    all worker processes of the host.
+    """
+
+    def __init__(self, path, maxsize=10000):
+        self.path = path
+        self.maxsize = maxsize
+        with self.connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS nodes ('
+                'key TEXT PRIMARY KEY, value BLOB, '
+                'expires REAL, accessed REAL)'
+            )
+            conn.execute(
+                'CREATE INDEX IF NOT EXISTS nodes_accessed '
+                'ON nodes (accessed)'
+            )
+
+    @contextmanager
+    def connect(self):
+        conn = sqlite3.connect(self.path, timeout=5)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key):
+        now = time.time()
+        with self.connect() as conn:
+            row = conn.execute(
+                'SELECT value FROM nodes WHERE key = ? AND expires > ?',
+                (key, now)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                'UPDATE nodes SET accessed = ? WHERE key = ?', (now, key))
+        return pickle.loads(row[0])
+
+    def set(self, key, value, ttl):
+        now = time.time()
+        with self.connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO nodes VALUES (?, ?, ?, ?)',
+                (key, pickle.dumps(value), now + ttl, now)
+            )
+            conn.execute('DELETE FROM nodes WHERE expires <= ?', (now,))
+            conn.execute(
+                'DELETE FROM nodes WHERE key IN ('
+                'SELECT key FROM nodes ORDER BY accessed DESC '
+                'LIMIT -1 OFFSET ?)',
+                (self.maxsize,)
+            )
+
+    def delete(self, key):
+        with self.connect() as conn:
+            conn.execute('DELETE FROM nodes WHERE key = ?', (key,))
+
+    def clear(self):
+        with self.connect() as conn:
+            conn.execute('DELETE FROM nodes')
+
+
+class NodeCache:
+    """Cache of model rows resolved by ID.
+
+    Column values are cached rather than instances, so hits are merged
+    into the current session without a query. Excluded columns and
+    columns which weren't loaded are loaded on first access.
+
+    :param backend: :class:`MemoryBackend` or :class:`SQLiteBackend`.
+    :param ttl: Seconds an entry lives.
+    :param exclude: Column keys which are never cached.
+    """
+
+    def __init__(self, backend, ttl=300, exclude=('password',)):
+        self.backend = backend
+        self.ttl = ttl
+        self.exclude = set(exclude)
+
+    @staticmethod
+    def key(model, id):
+        return f'{model.__tablename__}:{id}'
+
+    def get(self, model, id, columns=None):
+        """Return the instance by ID like ``model.query.get(id)``.
+
+        :param columns: Names of the columns needed. An entry missing
+            any of them is reloaded with them and the cached columns.
+        """
+        key = self.key(model, id)
+        row = self.backend.get(key)
+
+        if row is not None and (columns is None or row.keys() >= set(columns)):
+            instance = model(**row)
+            make_transient_to_detached(instance)
+            return db.session.merge(instance, load=False)
+
+        q = model.query
+        if columns:
+            q = q.options(load_only(*set(columns).union(row or ())))
+
+        instance = q.get(id)
+        if instance is not None:
+            self.backend.set(key, self.to_row(instance), self.ttl)
+        return instance
+
+    def invalidate(self, model, id):
+        self.backend.delete(self.key(model, id))
+
+    def to_row(self, instance):
+        state = db.inspect(instance)
+        return {
+            attr.key: getattr(instance, attr.key)
+            for attr in state.mapper.column_attrs
+            if attr.key not in self.exclude and attr.key not in state.unloaded
+        }
+
+
+def get_node_cache():
+    """Return the application's node cache, or None when disabled."""
+    app = current_app
+    config = app.config
+    if config['NODE_CACHE_BACKEND'] is None:
+        return None
+
+    cache = app.extensions.get('node_cache')
+    if cache is None:
+        if config['NODE_CACHE_BACKEND'] == 'sqlite':
+            backend = SQLiteBackend(
+                config['NODE_CACHE_PATH'], config['NODE_CACHE_SIZE'])
+        else:
+            backend = MemoryBackend(config['NODE_CACHE_SIZE'])
+        cache = NodeCache(backend, config['NODE_CACHE_TTL'])
+        app.extensions['node_cache'] = cache
+    return cache
+
+
+def get_node(model, id, columns=None):
+    """Get the instance by ID through the node cache, if enabled.
+
+    :param columns: Names of the only columns to load.
+    """
+    cache = get_node_cache()
+    if cache is not None:
+        return cache.get(model, id, columns)
+
+    q = model.query
+    if columns:
+        q = q.options(load_only(*columns))
+    return q.get(id)
+
+
+def invalidate_node(model, id):
+    cache = get_node_cache()
+    if cache is not None:
+        cache.invalidate(model, id)
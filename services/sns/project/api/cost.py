@@ -0,0 +1,101 @@
+from collections import namedtuple
+
+from graphql.language import ast as gql_ast
+from graphql.type.definition import get_named_type
+from graphql.utils.get_operation_ast import get_operation_ast
+
+
+Cost = namedtuple('Cost', 'cost depth')
+
+
+class QueryCostAnalyzer:
+    """Statically estimate the cost of a validated query document.
+
+    Each field costs 1. The cost of a connection's selection set is
+    multiplied by its ``first`` or ``last`` argument, or by
+    ``default_limit`` when neither is given, since that many nodes
+    are resolved for every parent.
+
+    :param schema: Schema the document was validated against.
+    :param default_limit: Page size assumed for unbounded connections.
+    """
+
+    def __init__(self, schema, default_limit=100):
+        self.schema = schema
+        self.default_limit = default_limit
+
+    def analyze(self, ast, operation_name=None, variables=None):
+        """
+        :return: :class:`Cost` of the operation to execute.
+        """
+        operation = get_operation_ast(ast, operation_name)
+        if operation is None:
+            return Cost(0, 0)
+
+        self.fragments = {
+            d.name.value: d for d in ast.definitions
+            if isinstance(d, gql_ast.FragmentDefinition)
+        }
+        self.variables = dict(variables or {})
+        for d in operation.variable_definitions or []:
+            if d.default_value is not None:
+                self.variables.setdefault(
+                    d.variable.name.value, self.value(d.default_value))
+
+        root_type = {
+            'query': self.schema.get_query_type,
+            'mutation': self.schema.get_mutation_type,
+            'subscription': self.schema.get_subscription_type,
+        }[operation.operation]()
+        return self.selection_set_cost(operation.selection_set, root_type)
+
+    def selection_set_cost(self, selection_set, parent_type):
+        cost = depth = 0
+
+        for selection in selection_set.selections:
+            if isinstance(selection, gql_ast.Field):
+                c = self.field_cost(selection, parent_type)
+            else:
+                if isinstance(selection, gql_ast.FragmentSpread):
+                    fragment = self.fragments.get(selection.name.value)
+                else:
+                    fragment = selection
+                if fragment is None:
+                    continue
+                type = parent_type
+                if fragment.type_condition is not None:
+                    type = self.schema.get_type(
+                        fragment.type_condition.name.value)
+                c = self.selection_set_cost(fragment.selection_set, type)
+
+            cost += c.cost
+            depth = max(depth, c.depth)
+        return Cost(cost, depth)
+
+    def field_cost(self, field, parent_type):
+        fields = getattr(parent_type, 'fields', None) or {}
+        field_def = fields.get(field.name.value)
+
+        if field.selection_set is None or field_def is None:
+            return Cost(1, 1)
+
+        child = self.selection_set_cost(
+            field.selection_set, get_named_type(field_def.type))
+        multiplier = 1
+
+        if 'first' in field_def.args and 'last' in field_def.args:
+            args = {a.name.value: self.value(a.value) for a in field.arguments}
+            limits = [
+                args[k] for k in ('first', 'last')
+                if isinstance(args.get(k), int)
+            ]
+            multiplier = max(limits) if limits else self.default_limit
+
+        return Cost(1 + multiplier * child.cost, 1 + child.depth)
+
+    def value(self, node):
+        if isinstance(node, gql_ast.Variable):
+            return self.variables.get(node.name.value)
+        if isinstance(node, gql_ast.IntValue):
+            return int(node.value)
+        return getattr(node, 'value', None)
@@ -0,0 +1,85 @@
+import hashlib
+
+from collections import namedtuple, OrderedDict
+from threading import Lock
+
+from graphql import parse, Source, validate
+
+
+Document = namedtuple('Document', 'ast errors')
+
+
+def document_hash(query):
+    """Return the SHA-256 hex digest which identifies a query document."""
+    return hashlib.sha256(query.encode()).hexdigest()
+
+
+class DocumentCache:
+    """LRU cache of parsed and validated query documents.
+
+    Documents are keyed by the SHA-256 hash of the query string, so
+    clients can also send only the hash of a document the cache already
+    holds (persisted queries).
+
+    :param schema: Schema the documents are validated against.
+    :param maxsize: Maximum number of cached documents.
+    """
+
+    def __init__(self, schema, maxsize=128):
+        self.schema = schema
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._documents = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._documents)
+
+    def get(self, key):
+        """Return the cached :class:`Document` by hash or None."""
+        with self._lock:
+            document = self._documents.get(key)
+            if document is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._documents.move_to_end(key)
+            return document
+
+    def put(self, key, document):
+        with self._lock:
+            self._documents[key] = document
+            self._documents.move_to_end(key)
+            while len(self._documents) > self.maxsize:
+                self._documents.popitem(last=False)
+
+    def parse(self, query, key=None):
+        """Return the :class:`Document` of the query string, parsing and
+        validating it only when it isn't cached.
+
+        :param key: Precomputed hash of the query.
+        :raises GraphQLSyntaxError: Documents with syntax errors
+            aren't cached.
+        """
+        key = key or document_hash(query)
+        document = self.get(key)
+
+        if document is None:
+            ast = parse(Source(query, name='GraphQL request'))
+            document = Document(ast, validate(self.schema, ast))
+            self.put(key, document)
+        return document
+
+    def clear(self):
+        with self._lock:
+            self._documents.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._documents),
+            'maxsize': self.maxsize,
+        }
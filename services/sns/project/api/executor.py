@@ -0,0 +1,107 @@
+from concurrent import futures
+
+from flask import current_app
+from promise import Promise
+
+from project import db
+from project.api.instrumentation import (
+    attributing,
+    current_path,
+    current_profile,
+)
+from project.utils import to_snake_case
+
+
+def get_thread_pool(app):
+    """Return the application-wide thread pool, creating it on first use."""
+    pool = app.extensions.get('graphql_thread_pool')
+    if pool is None:
+        pool = futures.ThreadPoolExecutor(
+            max_workers=app.config['GRAPHQL_EXECUTOR_WORKERS'],
+            thread_name_prefix='graphql'
+        )
+        app.extensions['graphql_thread_pool'] = pool
+    return pool
+
+
+def is_concurrent(info):
+    """Check if the resolved field is declared with ``concurrent=True``."""
+    graphene_type = getattr(info.parent_type, 'graphene_type', None)
+    if graphene_type is None:
+        return False
+
+    field = graphene_type._meta.fields.get(to_snake_case(info.field_name))
+    return getattr(field, 'concurrent', False)
+
+
+class ThreadPoolExecutor:
+    """GraphQL executor which runs independent work on a bounded,
+    application-wide thread pool.
+
+    Resolvers of fields declared ``concurrent`` and work submitted by
+    batched loaders run on the pool, everything else runs inline. Each
+    worker pushes its own application context, so it queries through its
+    own scoped session and pooled connection. Keep ``SQLALCHEMY_POOL_SIZE``
+    at least as large as ``GRAPHQL_EXECUTOR_WORKERS``.
+
+    Promises of the work are settled on the request thread only, by
+    :meth:`wait_until_finished`, so the resolvers chained to them run
+    in the request's application context.
+
+    One executor serves one request.
+    """
+
+    def __init__(self, app=None):
+        self.app = app or current_app._get_current_object()
+        self.pool = get_thread_pool(self.app)
+        # Promises of the submitted work, by future.
+        self.futures = {}
+
+    def execute(self, fn, *args, **kwargs):
+        info = args[1]
+        if is_concurrent(info):
+            return self.submit(fn, *args, **kwargs)
+        return fn(*args, **kwargs)
+
+    def submit(self, fn, *args, **kwargs):
+        """Run the function on the pool.
+
+        :return: Promise of the return value.
+        """
+        promise = Promise()
+        future = self.pool.submit(
+            self.run, fn, args, kwargs, current_profile(), current_path())
+        self.futures[future] = promise
+        return promise
+
+    def run(self, fn, args, kwargs, profile, path):
+        """Run the function on a worker.
+
+        :return: ``(True, value)``, or ``(False, exception)`` if the
+            function raised.
+        """
+        with self.app.app_context(), attributing(profile, path):
+            try:
+                value = fn(*args, **kwargs)
+                # Loaded instances outlive the worker's session.
+                db.session.expunge_all()
+            except Exception as e:
+                return False, e
+        return True, value
+
+    def wait_until_finished(self):
+        """Settle the promises of the submitted work as it completes.
+
+        Callbacks of the promises run here and may submit more work,
+        which is waited for too.
+        """
+        while self.futures:
+            done, _ = futures.wait(
+                self.futures, return_when=futures.FIRST_COMPLETED)
+            for future in done:
+                promise = self.futures.pop(future)
+                ok, value = future.result()
+                if ok:
+                    promise.do_resolve(value)
+                else:
+                    promise.do_reject(value)
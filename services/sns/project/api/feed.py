@@ -0,0 +1,200 @@
+"""Home feed reads.
+
+Posts are fanned out to the timelines of their authors' followers on
+write, except for the posts of :class:`.HighDegreeAuthor` authors. Their
+recent posts are merged into the feeds of their followers on read.
+"""
+
+import heapq
+
+from itertools import islice
+
+from aniso8601 import parse_datetime
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from project import db
+from project.api.cache import MemoryBackend
+from project.api.models.post import Post
+from project.api.models.profiles import apply_profile, LIST
+from project.api.models.timeline import HighDegreeAuthor, TimelineEntry
+from project.api.models.user import Follower
+from project.api.paging import cursor_to_keyset, keyset_query, Page
+
+
+SORT_KEY = (TimelineEntry.created, TimelineEntry.post_id)
+
+
+def recent_posts_query(author_ids, size):
+    """Return the select of the latest ``size`` posts of each author,
+    as ``(author_id, created, post_id)`` rows.
+    """
+    rank = db.func.row_number().over(
+        partition_by=Post.author_id,
+        order_by=(Post.created.desc(), Post.id.desc())
+    )
+    ranked = db.select([
+        Post.author_id,
+        Post.created,
+        Post.id.label('post_id'),
+        rank.label('rank'),
+    ]).where(db.and_(
+        Post.author_id.in_(author_ids),
+        Post.created.isnot(None),
+    )).alias('ranked')
+
+    return db.select([
+        ranked.c.author_id, ranked.c.created, ranked.c.post_id
+    ]).where(ranked.c.rank <= size)
+
+
+def get_recent_posts(author_ids):
+    """Return the windows of the latest posts of the authors, as lists
+    of ``(created, post_id)`` newest first, by author ID.
+
+    Windows of ``FEED_RECENT_POSTS_SIZE`` posts are cached for
+    ``FEED_RECENT_POSTS_TTL`` seconds, or until the author publishes
+    a post in this process. Missing ones are loaded in one query.
+    """
+    app = current_app
+    config = app.config
+    cache = app.extensions.get('recent_posts')
+    if cache is None:
+        cache = app.extensions['recent_posts'] = MemoryBackend()
+
+    windows = {}
+    for id in author_ids:
+        window = cache.get(id)
+        if window is not None:
+            windows[id] = window
+
+    missing = [id for id in author_ids if id not in windows]
+    if missing:
+        rows = db.session.execute(recent_posts_query(
+            missing, config['FEED_RECENT_POSTS_SIZE']))
+        loaded = {id: [] for id in missing}
+        for author_id, created, post_id in rows:
+            loaded[author_id].append((created, post_id))
+
+        for id, window in loaded.items():
+            window.sort(reverse=True)
+            cache.set(id, window, config['FEED_RECENT_POSTS_TTL'])
+        windows.update(loaded)
+    return windows
+
+
+@event.listens_for(Session, 'after_flush')
+def record_published_posts(session, flush_context):
+    authors = {
+        instance.author_id for instance in session.new
+        if isinstance(instance, Post) and instance.author_id is not None
+    }
+    if authors:
+        session.info.setdefault('published_authors', set()).update(authors)
+
+
+@event.listens_for(Session, 'after_commit')
+def invalidate_recent_posts(session):
+    authors = session.info.pop('published_authors', None)
+    if not authors or not has_app_context():
+        return
+
+    cache = current_app.extensions.get('recent_posts')
+    if cache is None:
+        return
+
+    for id in authors:
+        cache.delete(id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def discard_published_posts(session):
+    session.info.pop('published_authors', None)
+
+
+def merge_feed(timeline, windows, limit=None, descending=True):
+    """Merge the timeline with the windows of recent posts, k-way
+    with a heap.
+
+    :param timeline: ``(created, post_id)`` keys in the order of the feed.
+    :param windows: Lists of keys in the same order.
+    :return: List of up to ``limit`` keys.
+    """
+    merged = heapq.merge(timeline, *windows, reverse=descending)
+    return list(islice(merged, limit))
+
+
+def load_feed(user_id, args):
+    """Load the page of the user's feed for the connection args.
+
+    The timeline, without the posts of the high-degree authors the user
+    follows, is paged by keyset in SQL. The recent posts of those
+    authors are filtered by the same cursors and merged with it.
+
+    The count is approximate, as it counts the cached windows: deleted
+    posts are counted, and posts published in other processes aren't
+    until the windows expire.
+
+    :return: :class:`.Page` of ``(post, created, post_id)`` rows.
+    """
+    authors = [
+        id for id, in
+        db.session.query(HighDegreeAuthor.user_id).
+        join(Follower, Follower.followed_id == HighDegreeAuthor.user_id).
+        filter(
+            Follower.follower_id == user_id,
+            Follower.is_snoozed.isnot(True)
+        )
+    ]
+    windows = get_recent_posts(authors)
+
+    timeline = (
+        TimelineEntry.query.
+        with_entities(*SORT_KEY).
+        filter(TimelineEntry.user_id == user_id)
+    )
+    if authors:
+        timeline = timeline.filter(~TimelineEntry.author_id.in_(authors))
+
+    q, ordering, limit = keyset_query(timeline, SORT_KEY, True, args)
+    q = q.order_by(*ordering)
+    if limit is not None:
+        q = q.limit(limit + 1)
+
+    # Keys of the windows are bound by the cursors like the timeline's.
+    bounds = []
+    for name in ('after', 'before'):
+        if args.get(name) is not None:
+            created, post_id = cursor_to_keyset(args[name], len(SORT_KEY))
+            bounds.append((name, (parse_datetime(created), post_id)))
+
+    def in_bounds(key):
+        return all(
+            key < value if name == 'after' else key > value
+            for name, value in bounds
+        )
+
+    descending = args.get('last') is None or args.get('first') is not None
+    streams = []
+    for window in windows.values():
+        stream = [key for key in window if in_bounds(key)]
+        streams.append(stream if descending else stream[::-1])
+
+    keys = merge_feed(
+        [tuple(row) for row in q], streams,
+        None if limit is None else limit + 1, descending
+    )
+
+    ids = [post_id for created, post_id in keys]
+    q = apply_profile(Post.query.filter(Post.id.in_(ids)), Post, LIST)
+    posts = {p.id: p for p in q}
+    rows = [
+        (posts[post_id], created, post_id)
+        for created, post_id in keys if post_id in posts
+    ]
+
+    def count():
+        return timeline.count() + sum(map(len, windows.values()))
+
+    return Page(rows, count)
@@ -0,0 +1,172 @@
+import time
+
+from threading import Lock
+
+import numpy as np
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from project import db
+
+EMPTY = np.empty(0, dtype=np.int64)
+
+
+class FriendGraph:
+    """In-process adjacency of accepted friendships in compressed sparse
+    row form: the friends of user ``id`` are the sorted
+    ``indices[indptr[id]:indptr[id + 1]]``.
+
+    Friendship changes are applied as deltas, which replace the rows of
+    the users involved until more than ``max_deltas`` rows are replaced
+    and the arrays are rebuilt.
+
+    :param edges: ``(n, 2)`` array of both directions of each friendship.
+    """
+
+    def __init__(self, edges, max_deltas=1000):
+        self.max_deltas = max_deltas
+        self.deltas = {}
+        self.loaded_at = time.time()
+        self._lock = Lock()
+        self.csr = self.to_csr(edges)
+
+    @staticmethod
+    def to_csr(edges):
+        edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+        edges = edges[np.lexsort((edges[:, 1], edges[:, 0]))]
+        size = int(edges[:, 0].max()) + 2 if len(edges) else 1
+        counts = np.bincount(edges[:, 0], minlength=size - 1)
+        indptr = np.zeros(size, dtype=np.int64)
+        np.cumsum(counts, out=indptr[1:])
+        return indptr, edges[:, 1].copy()
+
+    def neighbors(self, id):
+        """Return the sorted IDs of the user's friends."""
+        row = self.deltas.get(id)
+        if row is not None:
+            return row
+        indptr, indices = self.csr
+        if id + 1 >= len(indptr):
+            return EMPTY
+        return indices[indptr[id]:indptr[id + 1]]
+
+    def degree(self, id):
+        return len(self.neighbors(id))
+
+    def is_friend(self, id_1, id_2):
+        row = self.neighbors(id_1)
+        i = np.searchsorted(row, id_2)
+        return bool(i < len(row) and row[i] == id_2)
+
+    def mutual_friends(self, id_1, id_2):
+        """Return the sorted IDs of the friends two users have in common."""
+        return np.intersect1d(
+            self.neighbors(id_1), self.neighbors(id_2), assume_unique=True)
+
+    def friends_of_friends(self, id):
+        """Return people two hops away who are not friends of the user,
+        and the count of mutual friends with each.
+
+        :return: Sorted IDs and their counts.
+        """
+        friends = self.neighbors(id)
+        if not len(friends):
+            return EMPTY, EMPTY
+
+        hops = np.concatenate([self.neighbors(f) for f in friends])
+        ids, counts = np.unique(hops, return_counts=True)
+        keep = np.isin(ids, friends, assume_unique=True, invert=True)
+        keep &= ids != id
+        return ids[keep], counts[keep]
+
+    def add(self, id_1, id_2):
+        with self._lock:
+            for a, b in ((id_1, id_2), (id_2, id_1)):
+                row = self.neighbors(a)
+                i = np.searchsorted(row, b)
+                if i == len(row) or row[i] != b:
+                    self.deltas[a] = np.insert(row, i, b)
+            self.compact_if_needed()
+
+    def remove(self, id_1, id_2):
+        with self._lock:
+            for a, b in ((id_1, id_2), (id_2, id_1)):
+                row = self.neighbors(a)
+                i = np.searchsorted(row, b)
+                if i < len(row) and row[i] == b:
+                    self.deltas[a] = np.delete(row, i)
+            self.compact_if_needed()
+
+    def compact_if_needed(self):
+        if len(self.deltas) <= self.max_deltas:
+            return
+
+        size = max(len(self.csr[0]) - 1, max(self.deltas) + 1)
+        rows = [self.neighbors(id) for id in range(size)]
+        counts = np.fromiter(map(len, rows), dtype=np.int64, count=size)
+        indptr = np.zeros(size + 1, dtype=np.int64)
+        np.cumsum(counts, out=indptr[1:])
+        indices = np.concatenate(rows) if size else EMPTY
+        # Readers don't lock, so the arrays are replaced as a whole.
+        self.csr = indptr, indices
+        self.deltas = {}
+
+
+def load_friend_graph(max_deltas=1000):
+    """Load the accepted friendships into a :class:`FriendGraph`."""
+    rows = db.session.execute(
+        "SELECT left_user_id, right_user_id FROM friendship_edges "
+        "WHERE state = 'accepted'"
+    )
+    return FriendGraph([tuple(r) for r in rows], max_deltas)
+
+
+def get_friend_graph():
+    """Return the application's friend graph, or None when disabled.
+
+    The graph is reloaded after ``FRIEND_GRAPH_TTL`` seconds, which
+    bounds how stale it is in processes other than the one where
+    friendships changed.
+    """
+    app = current_app
+    config = app.config
+    if not config['FRIEND_GRAPH_ENABLED']:
+        return None
+
+    graph = app.extensions.get('friend_graph')
+    if graph is None or graph.loaded_at + config['FRIEND_GRAPH_TTL'] < \
+            time.time():
+        graph = load_friend_graph(config['FRIEND_GRAPH_MAX_DELTAS'])
+        app.extensions['friend_graph'] = graph
+    return graph
+
+
+def record_friendship(session, id_1, id_2, accepted):
+    """Record a friendship change, applied to the friend graph once
+    the session commits.
+    """
+    session.info.setdefault('friendship_deltas', []).append(
+        (id_1, id_2, accepted))
+
+
+@event.listens_for(Session, 'after_commit')
+def apply_friendship_deltas(session):
+    deltas = session.info.pop('friendship_deltas', None)
+    if not deltas or not has_app_context():
+        return
+
+    graph = current_app.extensions.get('friend_graph')
+    if graph is None:
+        return
+
+    for id_1, id_2, accepted in deltas:
+        if accepted:
+            graph.add(id_1, id_2)
+        else:
+            graph.remove(id_1, id_2)
+
+
+@event.listens_for(Session, 'after_rollback')
+def discard_friendship_deltas(session):
+    session.info.pop('friendship_deltas', None)
@@ -0,0 +1,169 @@
+import json
+import logging
+import threading
+import time
+
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import partial
+
+from promise import Promise, is_thenable
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+class Profile:
+    """SQL statements issued while executing one GraphQL request,
+    attributed to the path of the field whose resolver issued them,
+    e.g. ``user.friends.edges.0.node.name``.
+
+    Statements of a loader batch are attributed to the tuple of paths of
+    the fields which loaded from it, statements issued outside of any
+    field to ``None``.
+    """
+
+    def __init__(self):
+        self.statements = []
+        self.started = time.perf_counter()
+        self.duration = None
+
+    def record(self, path, statement, rows, duration):
+        self.statements.append((path, statement, rows, duration))
+
+    def stop(self):
+        self.duration = time.perf_counter() - self.started
+
+    @property
+    def db_time(self):
+        return sum(s[3] for s in self.statements)
+
+    def totals(self):
+        duration = self.duration or time.perf_counter() - self.started
+        return {
+            'statements': len(self.statements),
+            'dbTime': round(self.db_time * 1000, 3),
+            # Concurrent statements can take longer than the request.
+            'pythonTime': round(max(duration - self.db_time, 0) * 1000, 3),
+            'totalTime': round(duration * 1000, 3),
+        }
+
+    def summary(self):
+        resolvers = OrderedDict()
+        for path, statement, rows, duration in self.statements:
+            resolvers.setdefault(path, []).append({
+                'sql': statement,
+                'rows': rows,
+                'duration': round(duration * 1000, 3),
+            })
+
+        summary = self.totals()
+        summary['resolvers'] = [
+            {
+                'resolver': list(path) if isinstance(path, tuple) else path,
+                'statements': statements,
+            }
+            for path, statements in resolvers.items()
+        ]
+        return summary
+
+
+def current_profile():
+    return getattr(_local, 'profile', None)
+
+
+def current_path():
+    return getattr(_local, 'path', None)
+
+
+@contextmanager
+def profiling():
+    """Profile SQL statements issued by the current thread."""
+    profile = Profile()
+    try:
+        with attributing(profile, current_path()):
+            yield profile
+    finally:
+        profile.stop()
+
+
+@contextmanager
+def attributing(profile, path):
+    """Attribute SQL statements issued by the current thread to the profile
+    and the field path, e.g. in a worker thread resolving a field.
+    """
+    parent = current_profile(), current_path()
+    _local.profile, _local.path = profile, path
+    try:
+        yield
+    finally:
+        _local.profile, _local.path = parent
+
+
+def log_profile(profile, operation_name=None):
+    """Log the totals of the request in a structured format."""
+    totals = profile.totals()
+    totals['operationName'] = operation_name
+    logger.info(json.dumps(totals, sort_keys=True))
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def before_cursor_execute(conn, cursor, statement, parameters, context,
+                          executemany):
+    if current_profile() is not None:
+        conn.info.setdefault('query_start_time', []).append(
+            time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def after_cursor_execute(conn, cursor, statement, parameters, context,
+                         executemany):
+    profile = current_profile()
+    if profile is not None and conn.info.get('query_start_time'):
+        duration = time.perf_counter() - conn.info['query_start_time'].pop()
+        profile.record(current_path(), statement, cursor.rowcount, duration)
+
+
+class InstrumentationMiddleware:
+    """Graphene middleware which marks the field path
+    SQL statements are attributed to.
+
+    The path of a field is its parent's path followed by its response key,
+    so resolved values are marked with their paths. A value resolved at
+    several paths is marked with the last one.
+
+    One middleware serves one request.
+    """
+
+    def __init__(self):
+        # Paths of resolved values, by ID. The values are kept alive by
+        # the response being completed.
+        self.paths = {}
+
+    def resolve(self, next, root, info, **args):
+        profile = current_profile()
+        if profile is None:
+            return next(root, info, **args)
+
+        field = info.field_asts[0]
+        key = field.alias.value if field.alias else field.name.value
+        parent = self.paths.get(id(root))
+        path = key if parent is None else f'{parent}.{key}'
+        with attributing(profile, path):
+            value = next(root, info, **args)
+
+        if is_thenable(value):
+            return Promise.resolve(value).then(partial(self.mark, path))
+        return self.mark(path, value)
+
+    def mark(self, path, value):
+        if isinstance(value, (list, tuple)):
+            for i, item in enumerate(value):
+                self.mark(f'{path}.{i}', item)
+        elif not isinstance(value, (type(None), bool, int, float, str)):
+            self.paths[id(value)] = path
+        return value
@@ -0,0 +1,549 @@
+"""Batched maintenance jobs, run from ``manage.py``.
+
+Jobs work in short transactions of ``batch_size`` rows, so they can run
+against a live database without holding long locks.
+"""
+
+import json
+import logging
+import threading
+import time
+
+from collections import namedtuple
+
+from sqlalchemy.dialects.postgresql import insert
+
+from project import db
+from project.api.feed import recent_posts_query
+from project.api.models.candidate import FriendCandidate, FriendCandidateUpdate
+from project.api.models.comment import Comment, CommentReaction
+from project.api.models.counter import (
+    CommentCounter,
+    PostCounter,
+    reaction_column,
+)
+from project.api.models.enums import FriendshipState, Reaction
+from project.api.models.post import Post, PostReaction
+from project.api.models.timeline import (
+    HighDegreeAuthor,
+    TimelineEntry,
+    TimelineFanout,
+)
+from project.api.models.user import (
+    Follower,
+    Friendship,
+    FRIENDSHIP_EDGES_VIEW,
+    friendship_edges,
+    User,
+)
+from project.utils import utcnow
+
+
+logger = logging.getLogger(__name__)
+
+ACCEPTED = FriendshipState.ACCEPTED
+
+# Friendship edges while pairs are converted: rows are read from both
+# sides, except mirrored rows, whose mirror already is the other side.
+TRANSITIONAL_FRIENDSHIP_EDGES_VIEW = '''
+CREATE OR REPLACE VIEW friendship_edges AS
+SELECT left_user_id, right_user_id, action_user_id,
+       created_at, updated_at, state
+FROM friendships
+UNION ALL
+SELECT right_user_id, left_user_id, action_user_id,
+       created_at, updated_at, state
+FROM friendships f
+WHERE NOT EXISTS (
+    SELECT 1 FROM friendships m
+    WHERE m.left_user_id = f.right_user_id
+      AND m.right_user_id = f.left_user_id
+)
+'''
+
+Sweep = namedtuple('Sweep', 'expired batches duration')
+Fanout = namedtuple('Fanout', 'posts entries batches duration')
+
+
+def canonicalize_friendships(batch_size=1000, log=print):
+    """Convert mirrored friendship pairs into one canonical row per pair.
+
+    First a transitional ``friendship_edges`` view is created, which
+    reads each side of a pair once whether it's converted or not. Rows
+    where ``left_user_id > right_user_id`` are deleted if their mirror
+    exists, otherwise swapped into the canonical order. Then the
+    canonical check constraint, the index on ``right_user_id`` and the
+    final view are created, which brings the database to the initial
+    migration revision.
+
+    :return: Total count of converted rows.
+    """
+    table = Friendship.__table__
+    left, right = table.c.left_user_id, table.c.right_user_id
+    mirror = table.alias('mirror')
+    total = 0
+
+    with db.engine.begin() as conn:
+        conn.execute(TRANSITIONAL_FRIENDSHIP_EDGES_VIEW)
+
+    while True:
+        with db.engine.begin() as conn:
+            keys = conn.execute(
+                db.select([left, right]).
+                where(left > right).
+                order_by(left, right).
+                limit(batch_size).
+                with_for_update(skip_locked=True)
+            ).fetchall()
+            if not keys:
+                break
+
+            batch = db.tuple_(left, right).in_(keys)
+            has_mirror = db.exists().where(db.and_(
+                mirror.c.left_user_id == right,
+                mirror.c.right_user_id == left,
+            ))
+            conn.execute(table.delete().where(db.and_(batch, has_mirror)))
+            conn.execute(
+                table.update().
+                where(db.and_(batch, ~has_mirror)).
+                values(left_user_id=right, right_user_id=left)
+            )
+
+        total += len(keys)
+        log(f'Converted {total} friendship rows.')
+
+    with db.engine.begin() as conn:
+        conn.execute(
+            'ALTER TABLE friendships '
+            'DROP CONSTRAINT IF EXISTS friendships_check, '
+            'DROP CONSTRAINT IF EXISTS friendships_canonical_check, '
+            'ADD CONSTRAINT friendships_canonical_check '
+            'CHECK (left_user_id < right_user_id) NOT VALID'
+        )
+    with db.engine.begin() as conn:
+        conn.execute(
+            'ALTER TABLE friendships '
+            'VALIDATE CONSTRAINT friendships_canonical_check'
+        )
+    # CONCURRENTLY cannot run inside a transaction block.
+    with db.engine.connect() as conn:
+        conn.execution_options(isolation_level='AUTOCOMMIT').execute(
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS '
+            'ix_friendships_right_user_id ON friendships (right_user_id)'
+        )
+    with db.engine.begin() as conn:
+        conn.execute(FRIENDSHIP_EDGES_VIEW)
+    return total
+
+
+def chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def rank_friend_candidates(user_ids, limit):
+    """Return the statement which replaces the candidates of the users.
+
+    Candidates are friends of friends the users have no friendship
+    with in any state, ranked by the count of mutual friends.
+    """
+    f = friendship_edges.alias('f')
+    h = friendship_edges.alias('h')
+    e = friendship_edges.alias('e')
+
+    fof = (
+        db.select([
+            f.c.left_user_id.label('user_id'),
+            h.c.right_user_id.label('candidate_id'),
+            db.func.count().label('mutual_count'),
+        ]).
+        select_from(f.join(h, h.c.left_user_id == f.c.right_user_id)).
+        where(db.and_(
+            f.c.left_user_id.in_(user_ids),
+            f.c.state == ACCEPTED,
+            h.c.state == ACCEPTED,
+            h.c.right_user_id != f.c.left_user_id,
+            ~db.exists().where(db.and_(
+                e.c.left_user_id == f.c.left_user_id,
+                e.c.right_user_id == h.c.right_user_id,
+            )),
+        )).
+        group_by(f.c.left_user_id, h.c.right_user_id).
+        alias('fof')
+    )
+    ranked = db.select([
+        fof.c.user_id,
+        db.func.row_number().over(
+            partition_by=fof.c.user_id,
+            order_by=(fof.c.mutual_count.desc(), fof.c.candidate_id)
+        ).label('rank'),
+        fof.c.candidate_id,
+        fof.c.mutual_count,
+    ]).alias('ranked')
+
+    return FriendCandidate.__table__.insert().from_select(
+        ['user_id', 'rank', 'candidate_id', 'mutual_count'],
+        db.select([ranked]).where(ranked.c.rank <= limit)
+    )
+
+
+def compute_friend_candidates(limit=50, chunk_size=500, full=False,
+                              log=print):
+    """Precompute the top ``limit`` friend candidates of users,
+    ``chunk_size`` users per transaction.
+
+    Incremental runs recompute the users queued in
+    :class:`.FriendCandidateUpdate` and their friends, whose friends
+    of friends changed along with them. Full runs recompute everyone.
+
+    :return: Total count of users computed.
+    """
+    table = FriendCandidate.__table__
+    queue = FriendCandidateUpdate.__table__
+    total = 0
+
+    def compute(user_ids):
+        with db.engine.begin() as conn:
+            conn.execute(table.delete().where(table.c.user_id.in_(user_ids)))
+            conn.execute(rank_friend_candidates(user_ids, limit))
+
+    if full:
+        with db.engine.begin() as conn:
+            conn.execute(queue.delete())
+        ids = db.session.query(User.id).order_by(User.id).yield_per(
+            chunk_size)
+        for chunk in chunks((id for id, in ids), chunk_size):
+            compute(chunk)
+            total += len(chunk)
+            log(f'Computed candidates of {total} users.')
+        return total
+
+    last_id = 0
+    while True:
+        updates = db.session.execute(
+            db.select([queue.c.user_id, queue.c.changed_at]).
+            where(queue.c.user_id > last_id).
+            order_by(queue.c.user_id).
+            limit(chunk_size)
+        ).fetchall()
+        db.session.commit()
+        if not updates:
+            return total
+
+        changed = [u.user_id for u in updates]
+        friends = db.session.execute(
+            db.select([friendship_edges.c.right_user_id]).
+            where(db.and_(
+                friendship_edges.c.left_user_id.in_(changed),
+                friendship_edges.c.state == ACCEPTED,
+            )).
+            distinct()
+        ).fetchall()
+        db.session.commit()
+
+        user_ids = sorted(set(changed).union(id for id, in friends))
+        for chunk in chunks(user_ids, chunk_size):
+            compute(chunk)
+            total += len(chunk)
+        log(f'Computed candidates of {total} users.')
+
+        # Users changed again meanwhile stay queued.
+        with db.engine.begin() as conn:
+            conn.execute(queue.delete().where(
+                db.tuple_(queue.c.user_id, queue.c.changed_at).in_(
+                    [tuple(u) for u in updates])
+            ))
+        last_id = changed[-1]
+
+
+def refresh_high_degree_authors(threshold, window=200):
+    """Recompute the authors with at least ``threshold`` followers,
+    whose posts are merged into feeds on read instead of fanned out.
+
+    The latest ``window`` posts of authors who dropped below the
+    threshold are queued for fan-out, since they were never fanned out.
+
+    :return: Total count of high-degree authors.
+    """
+    table = HighDegreeAuthor.__table__
+    followers = Follower.__table__
+    count = db.func.count()
+
+    with db.engine.begin() as conn:
+        authors = conn.execute(
+            db.select([followers.c.followed_id, count]).
+            group_by(followers.c.followed_id).
+            having(count >= threshold)
+        ).fetchall()
+        previous = {id for id, in conn.execute(db.select([table.c.user_id]))}
+
+        conn.execute(table.delete())
+        if authors:
+            conn.execute(table.insert(), [
+                {'user_id': id, 'follower_count': n} for id, n in authors])
+
+        dropped = previous.difference(id for id, n in authors)
+        if dropped:
+            conn.execute(
+                insert(TimelineFanout.__table__).
+                from_select(
+                    ['author_id', 'created', 'post_id'],
+                    recent_posts_query(sorted(dropped), window)
+                ).
+                on_conflict_do_nothing()
+            )
+    return len(authors)
+
+
+def counter_sources(model):
+    """Return the ``(key, counts)`` of the source rows of the counters,
+    where ``counts`` are the count expressions by column.
+    """
+    count = db.func.count()
+    if model is PostCounter:
+        reaction, key = PostReaction.reaction, PostReaction.post_id
+        sources = [(Comment.post_id, {'comment_count': count})]
+    else:
+        reaction, key = CommentReaction.reaction, CommentReaction.comment_id
+        sources = [(Comment.root_comment_id, {'reply_count': count})]
+
+    reactions = {
+        reaction_column(r): count.filter(reaction == r) for r in Reaction}
+    return [(key, reactions)] + sources
+
+
+def reconcile_query(model, ids):
+    """Return the select of the differences between the counts of the
+    source rows and the counters of the IDs, as rows of shard 0.
+
+    The source rows and the counters are read in one statement, so by
+    one snapshot, and the differences stay right when added to counters
+    updated meanwhile.
+    """
+    table = model.__table__
+    key = table.c[model.key_name]
+    selects = [
+        db.select([key.label('id')] + [
+            (-db.func.sum(table.c[c])).label(c) for c in model.count_columns
+        ]).
+        where(key.in_(ids)).
+        group_by(key)
+    ]
+    for source_key, counts in counter_sources(model):
+        selects.append(
+            db.select([source_key.label('id')] + [
+                counts.get(c, db.literal_column('0')).label(c)
+                for c in model.count_columns
+            ]).
+            where(source_key.in_(ids)).
+            group_by(source_key)
+        )
+
+    union = db.union_all(*selects).alias('differences')
+    sums = [db.func.sum(union.c[c]) for c in model.count_columns]
+    return (
+        db.select([union.c.id, db.literal_column('0')] + sums).
+        group_by(union.c.id).
+        having(db.or_(*(s != 0 for s in sums)))
+    )
+
+
+def reconcile_counters(batch_size=1000, log=print):
+    """Correct the counters of posts and comments from their reactions
+    and comments, ``batch_size`` posts or comments per transaction.
+
+    Differences are added to shard 0, so counters can be reconciled
+    while they are written to.
+
+    :return: Total count of corrected counters.
+    """
+    total = 0
+    for model, parent in ((PostCounter, Post), (CommentCounter, Comment)):
+        table = model.__table__
+        last_id = 0
+        while True:
+            with db.engine.begin() as conn:
+                ids = [id for id, in conn.execute(
+                    db.select([parent.id]).
+                    where(parent.id > last_id).
+                    order_by(parent.id).
+                    limit(batch_size)
+                )]
+                if not ids:
+                    break
+
+                stmt = insert(table).from_select(
+                    [model.key_name, 'shard'] + list(model.count_columns),
+                    reconcile_query(model, ids)
+                )
+                total += conn.execute(stmt.on_conflict_do_update(
+                    index_elements=[table.c[model.key_name], table.c.shard],
+                    set_={
+                        c: table.c[c] + stmt.excluded[c]
+                        for c in model.count_columns
+                    }
+                )).rowcount
+
+            last_id = ids[-1]
+            log(f'Reconciled {model.__tablename__} up to ID {last_id}, '
+                f'{total} corrected.')
+    return total
+
+
+def expire_snoozes(batch_size=1000):
+    """Unsnooze followers whose snooze expired, ``batch_size`` rows per
+    transaction, in the order of ``ix_followers_snooze_expiration``.
+
+    Rows locked by other transactions are skipped until the next run.
+
+    :return: :class:`Sweep` metrics of the run.
+    """
+    table = Follower.__table__
+    key = db.tuple_(table.c.follower_id, table.c.followed_id)
+    started = time.perf_counter()
+    expired = batches = 0
+
+    while True:
+        expiring = (
+            db.select([table.c.follower_id, table.c.followed_id]).
+            where(db.and_(table.c.is_snoozed, table.c.expiration < utcnow())).
+            order_by(table.c.expiration).
+            limit(batch_size).
+            with_for_update(skip_locked=True)
+        )
+        with db.engine.begin() as conn:
+            count = conn.execute(
+                table.update().
+                where(key.in_(expiring)).
+                values(is_snoozed=False, expiration=None)
+            ).rowcount
+
+        expired += count
+        batches += 1
+        if count < batch_size:
+            break
+
+    return Sweep(expired, batches, time.perf_counter() - started)
+
+
+def fan_out_posts(batch_size=1000):
+    """Append queued posts to the timelines of their authors and the
+    authors' followers, ``batch_size`` followers per transaction.
+
+    Snoozed followers are skipped. Followers are read in the order of
+    ``ix_followers_followed_unsnoozed``. Posts of high-degree authors,
+    merged into feeds on read, are appended to the author's timeline
+    only. Posts are claimed with ``SKIP LOCKED``, so several workers can
+    fan out at once.
+
+    :return: :class:`Fanout` metrics of the run.
+    """
+    queue = TimelineFanout.__table__
+    followers = Follower.__table__
+    high_degree = HighDegreeAuthor.__table__
+    started = time.perf_counter()
+    posts = entries = batches = 0
+
+    while True:
+        with db.engine.begin() as conn:
+            task = conn.execute(
+                db.select([queue]).
+                order_by(queue.c.post_id).
+                limit(1).
+                with_for_update(skip_locked=True)
+            ).first()
+            if task is None:
+                break
+
+            follower_ids = [id for id, in conn.execute(
+                db.select([followers.c.follower_id]).
+                where(db.and_(
+                    followers.c.followed_id == task.author_id,
+                    followers.c.follower_id > task.last_follower_id,
+                    followers.c.is_snoozed.isnot(True),
+                    ~db.exists().where(
+                        high_degree.c.user_id == task.author_id),
+                )).
+                order_by(followers.c.follower_id).
+                limit(batch_size)
+            )]
+            # The author's own timeline is appended to with the first batch.
+            ids = follower_ids
+            if not task.last_follower_id:
+                ids = follower_ids + [task.author_id]
+
+            if ids:
+                stmt = insert(TimelineEntry.__table__).values([
+                    {'user_id': id, 'post_id': task.post_id,
+                     'author_id': task.author_id, 'created': task.created}
+                    for id in ids
+                ])
+                entries += conn.execute(
+                    stmt.on_conflict_do_nothing()).rowcount
+
+            key = queue.c.post_id == task.post_id
+            if len(follower_ids) < batch_size:
+                conn.execute(queue.delete().where(key))
+                posts += 1
+            else:
+                conn.execute(queue.update().where(key).values(
+                    last_follower_id=follower_ids[-1]))
+        batches += 1
+
+    return Fanout(posts, entries, batches, time.perf_counter() - started)
+
+
+class IntervalJob(threading.Thread):
+    """Background thread running a batched job every ``interval``
+    seconds, off the request path.
+
+    The metrics of each run are logged as JSON, and ``runs`` and
+    ``totals`` keep the totals of all runs.
+
+    :param job: Function of the batch size, returning the metrics of
+        the run as a namedtuple with a ``duration`` in seconds, e.g.
+        :func:`expire_snoozes`.
+    :param totals: Names of the metrics summed in ``totals``.
+    :param quiet: Log only the runs adding to the totals.
+    """
+
+    def __init__(self, app, job, interval, batch_size=1000, totals=(),
+                 quiet=False):
+        super().__init__(
+            name=job.__name__.replace('_', '-'), daemon=True)
+        self.app = app
+        self.job = job
+        self.interval = interval
+        self.batch_size = batch_size
+        self.quiet = quiet
+        self.runs = 0
+        self.totals = dict.fromkeys(totals, 0)
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                with self.app.app_context():
+                    metrics = self.job(self.batch_size)._asdict()
+            except Exception:
+                logger.exception(f'Job {self.job.__name__} failed.')
+                continue
+
+            self.runs += 1
+            for name in self.totals:
+                self.totals[name] += metrics[name]
+            if self.quiet and not any(metrics[n] for n in self.totals):
+                continue
+            metrics['duration'] = round(metrics['duration'] * 1000, 3)
+            logger.info(json.dumps(
+                {'job': self.job.__name__, **metrics}, sort_keys=True))
+
+    def stop(self):
+        self.stopped.set()
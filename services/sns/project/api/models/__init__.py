@@ -2,18 +2,29 @@
 
 __all__ = [
     'Comment',
+    'CommentCounter',
     'CommentReaction',
     'Follower',
+    'FriendCandidate',
+    'FriendCandidateUpdate',
     'Friendship',
+    'FriendshipEdge',
+    'HighDegreeAuthor',
     'Photo',
     'PhotoAlbum',
     'PhotoAlbumContribution',
     'Post',
+    'PostCounter',
     'PostReaction',
+    'TimelineEntry',
+    'TimelineFanout',
     'User',
 ]
 
+from .candidate import FriendCandidate, FriendCandidateUpdate
 from .comment import Comment, CommentReaction
+from .counter import CommentCounter, PostCounter
 from .photo import Photo, PhotoAlbum, PhotoAlbumContribution
 from .post import Post, PostReaction
-from .user import Follower, Friendship, User
+from .timeline import HighDegreeAuthor, TimelineEntry, TimelineFanout
+from .user import Follower, Friendship, FriendshipEdge, User
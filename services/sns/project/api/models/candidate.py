@@ -0,0 +1,56 @@
+from sqlalchemy.dialects.postgresql import insert
+
+from project import db
+from project.utils import utcnow
+
+
+class FriendCandidate(db.Model):
+    """Person the user may know, ranked by the count of mutual friends.
+
+    Candidates are precomputed by ``manage.py compute_friend_candidates``.
+    """
+
+    __tablename__ = 'friend_candidates'
+
+    # For cascading deletes of candidates.
+    __table_args__ = (
+        db.Index('ix_friend_candidates_candidate_id', 'candidate_id'),
+    )
+
+    user_id = db.Column(
+        db.Integer,
+        db.ForeignKey('users.id', ondelete='CASCADE'),
+        primary_key=True
+    )
+    rank = db.Column(db.SmallInteger, primary_key=True)
+    candidate_id = db.Column(
+        db.Integer,
+        db.ForeignKey('users.id', ondelete='CASCADE'),
+        nullable=False
+    )
+    mutual_count = db.Column(db.Integer, nullable=False)
+
+
+class FriendCandidateUpdate(db.Model):
+    """Queue of users whose friendships changed since their candidates
+    were computed.
+    """
+
+    __tablename__ = 'friend_candidate_updates'
+
+    user_id = db.Column(
+        db.Integer,
+        db.ForeignKey('users.id', ondelete='CASCADE'),
+        primary_key=True
+    )
+    changed_at = db.Column(db.DateTime, nullable=False)
+
+    @classmethod
+    def mark(cls, session, *ids):
+        """Queue the users for the next incremental run."""
+        stmt = insert(cls.__table__).values(
+            [{'user_id': id, 'changed_at': utcnow()} for id in ids])
+        session.execute(stmt.on_conflict_do_update(
+            index_elements=[cls.user_id],
+            set_={'changed_at': stmt.excluded.changed_at}
+        ))
@@ -1,7 +1,7 @@
 from datetime import datetime
 
 from project import db
-from project.utils import to_sa_enum
+from project.utils import to_sa_enum, tsvector_column
 from .enums import Reaction
 
 
@@ -25,18 +25,20 @@ class CommentReaction(db.Model):
         primary_key=True
     )
 
-    reaction = db.Column(SAReaction, nullable=False)
+    # The replaced reaction is loaded on change for the counters.
+    reaction = db.column_property(
+        db.Column(SAReaction, nullable=False),
+        active_history=True
+    )
     created = db.Column(db.DateTime)
 
     actor = db.relationship(
         'User',
-        lazy='joined',
         back_populates='comment_reactions'
     )
 
     comment = db.relationship(
         'Comment',
-        lazy='joined',
         back_populates='reactions'
     )
 
@@ -61,6 +63,7 @@ class Comment(db.Model):
     created = db.Column(db.DateTime)
     updated = db.Column(db.DateTime)
     photo_url = db.Column(db.String)  # photo comment?
+    search_vector = tsvector_column('content')
 
     author_id = db.Column(db.Integer, db.ForeignKey('users.id'))
     post_id = db.Column(db.Integer, db.ForeignKey('posts.id'))
@@ -69,13 +72,11 @@ class Comment(db.Model):
 
     author = db.relationship(
         'User',
-        lazy='joined',
         back_populates='comments'
     )
 
     post = db.relationship(
         'Post',
-        lazy='joined',
         back_populates='comments'
     )
 
@@ -102,3 +103,18 @@ class Comment(db.Model):
             self.__class__.__name__,
             self.id,
         )
+
+
+# The primary key leads with the actor, counts are by comment.
+db.Index('ix_comment_reactions_comment_id', CommentReaction.comment_id)
+
+# Comments of a post and replies to a comment.
+db.Index('ix_comments_post_id', Comment.post_id)
+db.Index('ix_comments_root_comment_id', Comment.root_comment_id)
+
+# Full-text search, see :mod:`project.api.search`.
+db.Index(
+    'ix_comments_search_vector',
+    Comment.search_vector,
+    postgresql_using='gin'
+)
@@ -0,0 +1,202 @@
+from collections import Counter, defaultdict
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from project import db
+from .comment import Comment, CommentReaction
+from .enums import Reaction
+from .post import Post, PostReaction
+
+
+def reaction_column(reaction):
+    """Return the name of the counter column of the reaction."""
+    return f'{reaction.value}_count'
+
+
+REACTION_COLUMNS = tuple(reaction_column(r) for r in Reaction)
+
+
+class ReactionCounts:
+    """Counter columns of each :class:`.Reaction`."""
+
+    angry_count = db.Column(db.Integer, nullable=False, server_default='0')
+    laugh_count = db.Column(db.Integer, nullable=False, server_default='0')
+    like_count = db.Column(db.Integer, nullable=False, server_default='0')
+    love_count = db.Column(db.Integer, nullable=False, server_default='0')
+    sad_count = db.Column(db.Integer, nullable=False, server_default='0')
+    wow_count = db.Column(db.Integer, nullable=False, server_default='0')
+
+    # Name of the column referencing the counted row.
+    key_name = None
+    count_columns = REACTION_COLUMNS
+
+    @classmethod
+    def add(cls, session, deltas):
+        """Add the deltas to the counter shards.
+
+        :param deltas: Dicts of deltas by column, by ``(id, shard)``.
+        """
+        table = cls.__table__
+        stmt = insert(table).values([
+            {
+                cls.key_name: id,
+                'shard': shard,
+                **{c: counts.get(c, 0) for c in cls.count_columns},
+            }
+            # Shards are locked in the same order by every writer.
+            for (id, shard), counts in sorted(deltas.items())
+        ])
+        session.execute(stmt.on_conflict_do_update(
+            index_elements=[table.c[cls.key_name], table.c.shard],
+            set_={
+                c: table.c[c] + stmt.excluded[c]
+                for c in cls.count_columns
+            }
+        ))
+
+    @classmethod
+    def totals(cls, ids):
+        """Return the dicts of counts by column, summed over the shards,
+        by ID. IDs without counters are left out.
+        """
+        table = cls.__table__
+        key = table.c[cls.key_name]
+        q = (
+            db.session.query(
+                key, *(db.func.sum(table.c[c]) for c in cls.count_columns)).
+            filter(key.in_(ids)).
+            group_by(key)
+        )
+        return {
+            id: dict(zip(cls.count_columns, map(int, sums)))
+            for id, *sums in q
+        }
+
+
+class PostCounter(ReactionCounts, db.Model):
+    """Shard of the counts of a post's reactions and comments.
+
+    Counters are updated in the transaction of the reactions and
+    comments. Writers add to one of ``COUNTER_SHARDS`` rows of the post,
+    so they don't all wait for the lock of a single row, and readers sum
+    the shards. ``manage.py reconcile_counters`` rebuilds them from
+    source.
+    """
+
+    __tablename__ = 'post_counters'
+
+    post_id = db.Column(
+        db.Integer,
+        db.ForeignKey('posts.id', ondelete='CASCADE'),
+        primary_key=True
+    )
+    shard = db.Column(db.SmallInteger, primary_key=True)
+    comment_count = db.Column(
+        db.Integer, nullable=False, server_default='0')
+
+    key_name = 'post_id'
+    count_columns = REACTION_COLUMNS + ('comment_count',)
+
+
+class CommentCounter(ReactionCounts, db.Model):
+    """Shard of the counts of a comment's reactions and replies.
+
+    See :class:`PostCounter`.
+    """
+
+    __tablename__ = 'comment_counters'
+
+    comment_id = db.Column(
+        db.Integer,
+        db.ForeignKey('comments.id', ondelete='CASCADE'),
+        primary_key=True
+    )
+    shard = db.Column(db.SmallInteger, primary_key=True)
+    reply_count = db.Column(
+        db.Integer, nullable=False, server_default='0')
+
+    key_name = 'comment_id'
+    count_columns = REACTION_COLUMNS + ('reply_count',)
+
+
+def counter_shards():
+    if has_app_context():
+        return current_app.config['COUNTER_SHARDS']
+    return 1
+
+
+def reaction_shard(instance, shards):
+    """Return the ``(model, id, shard)`` counter shard of a reaction."""
+    if isinstance(instance, PostReaction):
+        return PostCounter, instance.post_id, instance.actor_id % shards
+    return CommentCounter, instance.comment_id, instance.actor_id % shards
+
+
+def count_changes(instance, sign, shards, deleted=()):
+    """Yield the ``(model, id, shard, column, delta)`` changes of the
+    counters by an added or deleted instance.
+
+    :param deleted: ``(model, id)`` of posts and comments deleted along
+        with the instance, whose counters are left alone.
+    """
+    if isinstance(instance, (PostReaction, CommentReaction)):
+        model, id, shard = reaction_shard(instance, shards)
+        parent = Post if model is PostCounter else Comment
+        if (parent, id) not in deleted:
+            yield model, id, shard, reaction_column(instance.reaction), sign
+    elif isinstance(instance, Comment):
+        shard = (instance.author_id or 0) % shards
+        post_id, root_id = instance.post_id, instance.root_comment_id
+        if post_id is not None and (Post, post_id) not in deleted:
+            yield PostCounter, post_id, shard, 'comment_count', sign
+        if root_id is not None and (Comment, root_id) not in deleted:
+            yield CommentCounter, root_id, shard, 'reply_count', sign
+
+
+@event.listens_for(Session, 'before_flush')
+def count_deletes(session, flush_context, instances):
+    # Deleted rows are counted before the flush, while their columns
+    # can still be loaded.
+    shards = counter_shards()
+    deleted = {
+        (type(instance), instance.id) for instance in session.deleted
+        if isinstance(instance, (Post, Comment))
+    }
+    changes = session.info.setdefault('counter_changes', [])
+    for instance in session.deleted:
+        changes.extend(count_changes(instance, -1, shards, deleted))
+
+    # Changed reactions move from one column to another.
+    for instance in session.dirty:
+        if not isinstance(instance, (PostReaction, CommentReaction)):
+            continue
+        model, id, shard = reaction_shard(instance, shards)
+        history = db.inspect(instance).attrs.reaction.history
+        for reactions, sign in ((history.deleted, -1), (history.added, 1)):
+            for reaction in reactions or ():
+                changes.append(
+                    (model, id, shard, reaction_column(reaction), sign))
+
+
+@event.listens_for(Session, 'after_flush')
+def apply_counter_changes(session, flush_context):
+    shards = counter_shards()
+    changes = session.info.pop('counter_changes', [])
+    for instance in session.new:
+        changes.extend(count_changes(instance, 1, shards))
+    if not changes:
+        return
+
+    deltas = defaultdict(lambda: defaultdict(Counter))
+    for model, id, shard, column, delta in changes:
+        deltas[model][(id, shard)][column] += delta
+    for model, counts in deltas.items():
+        model.add(session, counts)
+
+
+@event.listens_for(Session, 'after_rollback')
+def discard_counter_changes(session):
+    session.info.pop('counter_changes', None)
@@ -68,14 +68,12 @@ class PhotoAlbum(db.Model):
 
     owner = db.relationship(
         'User',
-        lazy='joined',
         back_populates='photo_albums'
     )
 
     cover_photo = db.relationship(
         'Photo',
-        foreign_keys=cover_photo_id,
-        lazy='joined'
+        foreign_keys=cover_photo_id
     )
 
     photos = db.relationship(
@@ -116,21 +114,18 @@ class Photo(db.Model):
 
     owner = db.relationship(
         'User',
-        lazy='joined',
         back_populates='photos'
     )
 
     album = db.relationship(
         'PhotoAlbum',
         foreign_keys=album_id,
-        lazy='joined',
         back_populates='photos'
     )
 
     # photo post
     post = db.relationship(
         'Post',
-        lazy='joined',
         cascade='all, delete-orphan',
         uselist=False,
         back_populates='photo'
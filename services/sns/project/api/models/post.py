@@ -1,7 +1,7 @@
 from datetime import datetime
 
 from project import db
-from project.utils import to_sa_enum
+from project.utils import to_sa_enum, tsvector_column
 from .enums import Reaction
 
 
@@ -25,18 +25,20 @@ class PostReaction(db.Model):
         primary_key=True
     )
 
-    reaction = db.Column(SAReaction, nullable=False)
+    # The replaced reaction is loaded on change for the counters.
+    reaction = db.column_property(
+        db.Column(SAReaction, nullable=False),
+        active_history=True
+    )
     created = db.Column(db.DateTime)
 
     actor = db.relationship(
         'User',
-        lazy='joined',
         back_populates='post_reactions'
     )
 
     post = db.relationship(
         'Post',
-        lazy='joined',
         back_populates='reactions'
     )
 
@@ -63,17 +65,16 @@ class Post(db.Model):
 
     author_id = db.Column(db.Integer, db.ForeignKey('users.id'))
     photo_id = db.Column(db.Integer, db.ForeignKey('photos.id'))
+    search_vector = tsvector_column('content')
 
     author = db.relationship(
         'User',
-        lazy='joined',
         back_populates='posts'
     )
 
     # photo post
     photo = db.relationship(
         'Photo',
-        lazy='joined',
         back_populates='post'
     )
 
@@ -104,3 +105,22 @@ class Post(db.Model):
 
     def is_photo_post(self):
         return self.photo is not None
+
+
+# The primary key leads with the actor, counts are by post.
+db.Index('ix_post_reactions_post_id', PostReaction.post_id)
+
+# Recent posts of an author, see :mod:`project.api.feed`.
+db.Index(
+    'ix_posts_author_created',
+    Post.author_id,
+    Post.created.desc(),
+    Post.id.desc()
+)
+
+# Full-text search, see :mod:`project.api.search`.
+db.Index(
+    'ix_posts_search_vector',
+    Post.search_vector,
+    postgresql_using='gin'
+)
@@ -0,0 +1,111 @@
+"""Loader profiles.
+
+Relationships of posts, comments, reactions and photos load lazily by
+default, so a query never joins more than it is asked to. A profile
+names the eager loads of one use case:
+
+- ``LIST``: many rows shown at once, with what each row displays.
+- ``DETAIL``: one row shown with its neighbours.
+- ``COUNT``: rows only counted or checked for existence. Only primary
+  keys are loaded, and relationships raise instead of loading.
+
+Apply a profile with :func:`apply_profile`, e.g.
+``apply_profile(Post.query, Post, LIST)``.
+"""
+
+from sqlalchemy.orm import Load
+
+from project import db
+from .comment import Comment, CommentReaction
+from .photo import Photo, PhotoAlbum
+from .post import Post, PostReaction
+
+
+LIST = 'list'
+DETAIL = 'detail'
+COUNT = 'count'
+
+
+def post_options(entity, profile):
+    if profile == LIST:
+        return (db.joinedload(entity.author), db.joinedload(entity.photo))
+    return (
+        db.joinedload(entity.author),
+        db.joinedload(entity.photo).joinedload(Photo.album),
+    )
+
+
+def post_reaction_options(entity, profile):
+    if profile == LIST:
+        return (db.joinedload(entity.actor),)
+    return (
+        db.joinedload(entity.actor),
+        db.joinedload(entity.post).joinedload(Post.author),
+    )
+
+
+def comment_reaction_options(entity, profile):
+    if profile == LIST:
+        return (db.joinedload(entity.actor),)
+    return (
+        db.joinedload(entity.actor),
+        db.joinedload(entity.comment).joinedload(Comment.author),
+    )
+
+
+def comment_options(entity, profile):
+    if profile == LIST:
+        return (db.joinedload(entity.author),)
+    return (
+        db.joinedload(entity.author),
+        db.joinedload(entity.post).joinedload(Post.author),
+    )
+
+
+def photo_options(entity, profile):
+    if profile == LIST:
+        return (db.joinedload(entity.owner),)
+    return (db.joinedload(entity.owner), db.joinedload(entity.album))
+
+
+def album_options(entity, profile):
+    if profile == LIST:
+        return (db.joinedload(entity.cover_photo),)
+    return (
+        db.joinedload(entity.owner),
+        db.joinedload(entity.cover_photo),
+    )
+
+
+PROFILES = {
+    Post: post_options,
+    PostReaction: post_reaction_options,
+    Comment: comment_options,
+    CommentReaction: comment_reaction_options,
+    Photo: photo_options,
+    PhotoAlbum: album_options,
+}
+
+
+def loader_options(entity, profile):
+    """Return the loader options of the profile for a model class or
+    an alias of one.
+    """
+    mapper = db.inspect(entity).mapper
+    if profile == COUNT:
+        keys = [mapper.get_property_by_column(c).key
+                for c in mapper.primary_key]
+        return (
+            Load(entity).load_only(*keys),
+            Load(entity).raiseload('*'),
+        )
+    if profile not in (LIST, DETAIL):
+        raise Exception(f'Unknown loader profile {profile!r}.')
+    return PROFILES[mapper.class_](entity, profile)
+
+
+def apply_profile(query, entity, profile):
+    """Apply the loader options of the profile to the query of
+    the entity.
+    """
+    return query.options(*loader_options(entity, profile))
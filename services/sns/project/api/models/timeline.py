@@ -0,0 +1,119 @@
+from sqlalchemy import event
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from project import db
+from .post import Post
+
+
+class TimelineEntry(db.Model):
+    """Post in the home feed of a user.
+
+    Entries are written by ``manage.py fan_out_posts`` or the fan-out
+    worker thread after the post is created, and removed when the user
+    unfollows or snoozes the author.
+    """
+
+    __tablename__ = 'timelines'
+
+    user_id = db.Column(
+        db.Integer,
+        db.ForeignKey('users.id', ondelete='CASCADE'),
+        primary_key=True
+    )
+    post_id = db.Column(
+        db.Integer,
+        db.ForeignKey('posts.id', ondelete='CASCADE'),
+        primary_key=True
+    )
+    author_id = db.Column(
+        db.Integer,
+        db.ForeignKey('users.id', ondelete='CASCADE'),
+        nullable=False
+    )
+    # Creation time of the post.
+    created = db.Column(db.DateTime, nullable=False)
+
+    @classmethod
+    def delete_authors(cls, user_id, author_ids):
+        """Remove the posts of the authors from the user's timeline."""
+        return cls.query.filter(
+            cls.user_id == user_id,
+            cls.author_id.in_(author_ids)
+        ).delete(synchronize_session=False)
+
+
+# Feed pages are range scans of one user's entries in this order.
+db.Index(
+    'ix_timelines_user_created',
+    TimelineEntry.user_id,
+    TimelineEntry.created.desc(),
+    TimelineEntry.post_id.desc()
+)
+# Entries of an author, removed on unfollow.
+db.Index(
+    'ix_timelines_user_author',
+    TimelineEntry.user_id,
+    TimelineEntry.author_id
+)
+
+
+class TimelineFanout(db.Model):
+    """Queue of posts to append to the timelines of their authors'
+    followers.
+
+    ``last_follower_id`` is the last follower appended to, so the fan-out
+    of a post resumes where an interrupted run stopped.
+    """
+
+    __tablename__ = 'timeline_fanouts'
+
+    post_id = db.Column(
+        db.Integer,
+        db.ForeignKey('posts.id', ondelete='CASCADE'),
+        primary_key=True
+    )
+    author_id = db.Column(
+        db.Integer,
+        db.ForeignKey('users.id', ondelete='CASCADE'),
+        nullable=False
+    )
+    created = db.Column(db.DateTime, nullable=False)
+    last_follower_id = db.Column(
+        db.Integer, nullable=False, server_default='0')
+
+    @classmethod
+    def queue(cls, session, *posts):
+        stmt = insert(cls.__table__).values([
+            {'post_id': p.id, 'author_id': p.author_id, 'created': p.created}
+            for p in posts
+        ])
+        session.execute(stmt.on_conflict_do_nothing())
+
+
+class HighDegreeAuthor(db.Model):
+    """Author with at least ``FEED_FANOUT_THRESHOLD`` followers.
+
+    Posts of high-degree authors aren't fanned out, but merged into
+    the feeds of their followers on read. Refreshed by
+    ``manage.py refresh_high_degree_authors``.
+    """
+
+    __tablename__ = 'high_degree_authors'
+
+    user_id = db.Column(
+        db.Integer,
+        db.ForeignKey('users.id', ondelete='CASCADE'),
+        primary_key=True
+    )
+    follower_count = db.Column(db.Integer, nullable=False)
+
+
+@event.listens_for(Session, 'after_flush')
+def queue_fanouts(session, flush_context):
+    posts = [
+        instance for instance in session.new
+        if isinstance(instance, Post) and instance.author_id is not None
+    ]
+    if posts:
+        TimelineFanout.queue(session, *posts)
@@ -1,8 +1,14 @@
 from datetime import datetime, timedelta
 
+from sqlalchemy import DDL, event
+from sqlalchemy.orm import aliased, Session
+
 from project import db
+from project.api.graph import get_friend_graph, record_friendship
 from project.utils import to_sa_enum, utcnow
+from .candidate import FriendCandidateUpdate
 from .enums import FriendshipState, Gender, MaritalStatus
+from .timeline import TimelineEntry
 
 
 SAFriendshipState = to_sa_enum(FriendshipState)
@@ -13,11 +19,21 @@ ACCEPTED, BLOCKED, PENDING, SUGGESTED = FriendshipState.__members__.values()
 
 
 class Friendship(db.Model):
-    """Provide a mutual friendship for two people."""
+    """Provide a mutual friendship for two people.
+
+    A friendship is stored once, in the canonical row where
+    ``left_user_id < right_user_id``. Query :class:`FriendshipEdge`
+    to find the friendships of a person from either side.
+    """
 
     __tablename__ = 'friendships'
 
-    __table_args__ = (db.CheckConstraint('left_user_id <> right_user_id'),)
+    __table_args__ = (
+        db.CheckConstraint(
+            'left_user_id < right_user_id',
+            name='friendships_canonical_check'
+        ),
+    )
 
     left_user_id = db.Column(
         db.Integer,
@@ -57,24 +73,30 @@ class Friendship(db.Model):
         except AttributeError:
             return super().__repr__()
 
+    @staticmethod
+    def key(id_1, id_2):
+        """Return the canonical primary key of two people."""
+        return (id_1, id_2) if id_1 < id_2 else (id_2, id_1)
+
     @classmethod
     def get(cls, id_1, id_2):
-        """Given the composite primary key, return the query which
-        finds the relationship of two people.
+        """Given the IDs of two people in any order, return the query
+        which finds their relationship.
         """
-        return cls.query.filter(db.or_(
-            db.and_(cls.left_user_id == id_1, cls.right_user_id == id_2),
-            db.and_(cls.left_user_id == id_2, cls.right_user_id == id_1)
-        ))
+        left_user_id, right_user_id = cls.key(id_1, id_2)
+        return cls.query.filter_by(
+            left_user_id=left_user_id, right_user_id=right_user_id)
 
     @classmethod
     def build(cls, id_1, id_2, id_3, state):
-        """Build a mutual relationship."""
+        """Build a mutual relationship.
+
+        :return: Iterable :class:`.Friendship` instances.
+        """
+        left_user_id, right_user_id = cls.key(id_1, id_2)
         return (
-            cls(left_user_id=id_1, right_user_id=id_2, action_user_id=id_3,
-                state=state),
-            cls(left_user_id=id_2, right_user_id=id_1, action_user_id=id_3,
-                state=state),
+            cls(left_user_id=left_user_id, right_user_id=right_user_id,
+                action_user_id=id_3, state=state),
         )
 
     @staticmethod
@@ -82,16 +104,215 @@ class Friendship(db.Model):
         """
         :param iter: Iterable :class:`.Friendship` model instances.
         """
-        for i in range(2):
-            iter[i].action_user_id = action_user_id
-            iter[i].state = state
+        for data in iter:
+            data.action_user_id = action_user_id
+            data.state = state
         return iter
 
     @classmethod
     def delete(cls, id_1, id_2):
         """Remove the mutual relationship."""
+        record_friendship(db.session, id_1, id_2, accepted=False)
+        FriendCandidateUpdate.mark(db.session, id_1, id_2)
         return cls.get(id_1, id_2).delete(synchronize_session=False)
 
+    @classmethod
+    def filter_keys(cls, keys):
+        """Return the query which finds the relationships by canonical
+        keys, as ``WHERE (left_user_id, right_user_id) IN (...)``.
+        """
+        return cls.query.filter(
+            db.tuple_(cls.left_user_id, cls.right_user_id).in_(keys))
+
+    @classmethod
+    def insert_many(cls, keys, action_user_id, state):
+        """Insert the relationships in one statement.
+
+        :param keys: Canonical keys of the relationships.
+        """
+        if not keys:
+            return 0
+        cls.record_many(keys, accepted=state == ACCEPTED)
+        db.session.execute(cls.__table__.insert().values([
+            dict(left_user_id=left, right_user_id=right,
+                 action_user_id=action_user_id, state=state)
+            for left, right in keys
+        ]))
+        return len(keys)
+
+    @classmethod
+    def update_many(cls, keys, action_user_id, state):
+        """Update the relationships in one statement.
+
+        :return: Total count of updated Friendship records.
+        """
+        if not keys:
+            return 0
+        cls.record_many(keys, accepted=state == ACCEPTED)
+        return cls.filter_keys(keys).update(
+            {'action_user_id': action_user_id, 'state': state},
+            synchronize_session=False
+        )
+
+    @classmethod
+    def delete_many(cls, keys):
+        """Remove the relationships in one statement.
+
+        :return: Total count of deleted Friendship records.
+        """
+        if not keys:
+            return 0
+        cls.record_many(keys, accepted=False)
+        return cls.filter_keys(keys).delete(synchronize_session=False)
+
+    @staticmethod
+    def record_many(keys, accepted):
+        """Record the changes which bulk statements make without
+        a flush, for the friend graph and friend candidates.
+        """
+        for left, right in keys:
+            record_friendship(db.session, left, right, accepted)
+        FriendCandidateUpdate.mark(
+            db.session, *sorted({id for key in keys for id in key}))
+
+
+@event.listens_for(Session, 'after_flush')
+def record_friendships(session, flush_context):
+    changed = set()
+    for instance in session.new.union(session.dirty, session.deleted):
+        if not isinstance(instance, Friendship):
+            continue
+
+        accepted = (
+            instance not in session.deleted and
+            instance.state == ACCEPTED
+        )
+        record_friendship(
+            session, instance.left_user_id, instance.right_user_id, accepted)
+        changed.update((instance.left_user_id, instance.right_user_id))
+
+    if changed:
+        FriendCandidateUpdate.mark(session, *sorted(changed))
+
+
+# Indexes are matched to the queries of the friendship edges and
+# built concurrently by migrations. Filters on a person and a state,
+# ordered by time, are answered from either side by the first two.
+db.Index(
+    'ix_friendships_left_state_updated',
+    Friendship.left_user_id,
+    Friendship.state,
+    Friendship.updated_at.desc()
+)
+db.Index(
+    'ix_friendships_right_state_updated',
+    Friendship.right_user_id,
+    Friendship.state,
+    Friendship.updated_at.desc()
+)
+# Requests sent and suggestions made by a person.
+db.Index(
+    'ix_friendships_pending_action',
+    Friendship.action_user_id,
+    Friendship.updated_at.desc(),
+    postgresql_where=Friendship.state == PENDING
+)
+# Requests received by a person on either side, where the action user
+# is the other side.
+db.Index(
+    'ix_friendships_left_pending_received',
+    Friendship.left_user_id,
+    Friendship.updated_at.desc(),
+    postgresql_where=db.and_(
+        Friendship.state == PENDING,
+        Friendship.action_user_id == Friendship.right_user_id
+    )
+)
+db.Index(
+    'ix_friendships_right_pending_received',
+    Friendship.right_user_id,
+    Friendship.updated_at.desc(),
+    postgresql_where=db.and_(
+        Friendship.state == PENDING,
+        Friendship.action_user_id == Friendship.left_user_id
+    )
+)
+db.Index(
+    'ix_friendships_suggested_action',
+    Friendship.action_user_id,
+    Friendship.updated_at.desc(),
+    postgresql_where=Friendship.state == SUGGESTED
+)
+
+# Both directions of every friendship. Postgres pushes filters on
+# ``left_user_id`` down into each branch, which are answered by
+# the indexes of either side.
+FRIENDSHIP_EDGES_VIEW = DDL('''
+CREATE OR REPLACE VIEW friendship_edges AS
+SELECT left_user_id, right_user_id, action_user_id,
+       created_at, updated_at, state
+FROM friendships
+UNION ALL
+SELECT right_user_id, left_user_id, action_user_id,
+       created_at, updated_at, state
+FROM friendships
+''')
+
+event.listen(Friendship.__table__, 'after_create', FRIENDSHIP_EDGES_VIEW)
+event.listen(
+    Friendship.__table__,
+    'before_drop',
+    DDL('DROP VIEW IF EXISTS friendship_edges')
+)
+
+# The view is created along with its table, not by ``create_all``.
+friendship_edges = db.Table(
+    'friendship_edges',
+    db.MetaData(),
+    db.Column('left_user_id', db.Integer, primary_key=True),
+    db.Column('right_user_id', db.Integer, primary_key=True),
+    db.Column('action_user_id', db.Integer),
+    db.Column('created_at', db.DateTime),
+    db.Column('updated_at', db.DateTime),
+    db.Column('state', to_sa_enum(FriendshipState)),
+)
+
+
+class FriendshipEdge(db.Model):
+    """Read-only view of a friendship from one person's side,
+    ``left_user_id``, towards the other, ``right_user_id``.
+    """
+
+    __table__ = friendship_edges
+
+
+def make_suggestion_edges(table):
+    """Return the suggestions in the friendships table from the side of
+    each person involved, the two receivers and the suggester, who is
+    ``user_id``.
+
+    Filters on ``user_id`` are pushed down into each branch, which are
+    answered by the index on that person's column in ``updated_at``
+    order.
+    """
+    def branch(column):
+        return db.select([
+            column.label('user_id'),
+            table.c.left_user_id,
+            table.c.right_user_id,
+            table.c.action_user_id,
+            table.c.updated_at,
+        ]).where(table.c.state == SUGGESTED)
+
+    return db.union_all(
+        branch(table.c.left_user_id),
+        branch(table.c.right_user_id),
+        branch(table.c.action_user_id),
+    ).alias('suggestion_edges')
+
+
+suggestion_edges = make_suggestion_edges(Friendship.__table__)
+
 
 class Follower(db.Model):
     """Provide a follower or following relationship."""
@@ -139,6 +360,35 @@ class Follower(db.Model):
         ).delete(synchronize_session=False)
 
 
+# Followers and followings of a person, in the order they are paged.
+db.Index(
+    'ix_followers_followed_created',
+    Follower.followed_id,
+    Follower.created_at,
+    Follower.follower_id
+)
+db.Index(
+    'ix_followers_follower_created',
+    Follower.follower_id,
+    Follower.created_at,
+    Follower.followed_id
+)
+# Followers a post is fanned out to, see
+# :func:`project.api.jobs.fan_out_posts`.
+db.Index(
+    'ix_followers_followed_unsnoozed',
+    Follower.followed_id,
+    Follower.follower_id,
+    postgresql_where=Follower.is_snoozed.isnot(True)
+)
+# Snoozes to expire, see :func:`project.api.jobs.expire_snoozes`.
+db.Index(
+    'ix_followers_snooze_expiration',
+    Follower.expiration,
+    postgresql_where=Follower.is_snoozed
+)
+
+
 class User(db.Model):
     __tablename__ = 'users'
 
@@ -159,9 +409,9 @@ class User(db.Model):
 
     friendship = db.relationship(
         'User',
-        secondary='friendships',
-        primaryjoin='User.id == Friendship.left_user_id',
-        secondaryjoin='User.id == Friendship.right_user_id',
+        secondary=friendship_edges,
+        primaryjoin='User.id == FriendshipEdge.left_user_id',
+        secondaryjoin='User.id == FriendshipEdge.right_user_id',
         lazy='dynamic',
         viewonly=True
     )
@@ -238,18 +488,22 @@ class User(db.Model):
         """
         :return: :class:`.User` query
         """
+        graph = get_friend_graph()
+        if graph is not None:
+            ids = graph.mutual_friends(id_1, id_2).tolist()
+            return User.query.filter(User.id.in_(ids))
 
         def criteria(id):
             return db.and_(
-                Friendship.left_user_id == id,
-                Friendship.state == ACCEPTED
+                FriendshipEdge.left_user_id == id,
+                FriendshipEdge.state == ACCEPTED
             )
 
         mutual_table = (
-            db.select([(Friendship.right_user_id).label('id')]).
+            db.select([(FriendshipEdge.right_user_id).label('id')]).
             where(criteria(id_1)).
             intersect(
-                db.select([(Friendship.right_user_id).label('id')]).
+                db.select([(FriendshipEdge.right_user_id).label('id')]).
                 where(criteria(id_2))
             ).alias('mutual_relationships')
         )
@@ -261,15 +515,61 @@ class User(db.Model):
             Friendship.get(self.id, id).filter_by(state=ACCEPTED).count() > 0
         )
 
+    def friend_count(self):
+        graph = get_friend_graph()
+        if graph is not None:
+            return graph.degree(self.id)
+        return FriendshipEdge.query.filter_by(
+            left_user_id=self.id, state=ACCEPTED).count()
+
+    def friends_of_friends(self):
+        """Find people two hops away who aren't friends of the user.
+
+        :return: List of ``(id, mutual friend count)``
+            ordered by the count descending.
+        """
+        graph = get_friend_graph()
+        if graph is not None:
+            ids, counts = graph.friends_of_friends(self.id)
+            rows = zip(ids.tolist(), counts.tolist())
+            return sorted(rows, key=lambda row: (-row[1], row[0]))
+
+        friend = aliased(FriendshipEdge)
+        hop = aliased(FriendshipEdge)
+        friend_ids = (
+            db.session.query(friend.right_user_id).
+            filter(friend.left_user_id == self.id, friend.state == ACCEPTED)
+        )
+        count = db.func.count()
+        return (
+            db.session.query(hop.right_user_id, count).
+            filter(
+                hop.left_user_id.in_(friend_ids.subquery()),
+                hop.state == ACCEPTED,
+                hop.right_user_id != self.id,
+                ~hop.right_user_id.in_(friend_ids.subquery())
+            ).
+            group_by(hop.right_user_id).
+            order_by(count.desc(), hop.right_user_id).
+            all()
+        )
+
     def is_following(self, id):
         return Follower.query.get((self.id, id)) is not None
 
     def is_mutual_firend_of(self, id_1, id_2):
         """Check if the viewer is the mutual friend of two people."""
+        graph = get_friend_graph()
+        if graph is not None:
+            return (
+                graph.is_friend(self.id, id_1) and
+                graph.is_friend(self.id, id_2)
+            )
+
         return (
-            Friendship.query.
+            FriendshipEdge.query.
             filter_by(state=ACCEPTED, left_user_id=self.id).
-            filter(Friendship.right_user_id.in_([id_1, id_2])).
+            filter(FriendshipEdge.right_user_id.in_([id_1, id_2])).
             count() == 2
         )
 
@@ -279,7 +579,7 @@ class User(db.Model):
             if two people can be suggested, otherwise None.
         """
         suggestible = (
-            Friendship.query.get((id_1, id_2)) is None and
+            Friendship.get(id_1, id_2).first() is None and
             self.is_mutual_firend_of(id_1, id_2)
         )
 
@@ -371,6 +671,115 @@ class User(db.Model):
         else:
             return None
 
+    def friendships_with(self, ids):
+        """Find the viewer's relationships with many people in one query.
+
+        :return: Dict of :class:`.FriendshipEdge`, or None where there is
+            no relationship, by the ID of each person who exists.
+        """
+        rows = (
+            db.session.query(User.id, FriendshipEdge).
+            outerjoin(FriendshipEdge, db.and_(
+                FriendshipEdge.left_user_id == self.id,
+                FriendshipEdge.right_user_id == User.id
+            )).
+            filter(User.id.in_(ids))
+        )
+        return dict(rows.all())
+
+    def check_many(self, ids, check):
+        """Validate an action on many people against their relationships
+        with the viewer, fetched in one query.
+
+        :param check: Function of the ID and the :class:`.FriendshipEdge`
+            or None, returning an error message or None if allowed.
+        :return: Dict of error messages, or None where allowed, by ID.
+        """
+        edges = self.friendships_with(ids)
+        outcomes = {}
+        for id in ids:
+            if id == self.id:
+                outcomes[id] = 'cannot act on yourself'
+            elif id not in edges:
+                outcomes[id] = 'user with the given ID does not exist'
+            else:
+                outcomes[id] = check(id, edges[id])
+        return outcomes
+
+    def allowed_keys(self, outcomes):
+        return [
+            Friendship.key(self.id, id)
+            for id, error in outcomes.items() if error is None
+        ]
+
+    def accept_many(self, ids):
+        """Accept the pending requests of many people at once.
+
+        :return: Dict of error messages, or None where accepted, by ID.
+        """
+        def check(id, edge):
+            if edge is None or edge.state != PENDING:
+                return 'no pending friend request'
+            # The same person cannot make friend request and accept.
+            if edge.action_user_id == self.id:
+                return 'cannot accept own friend request'
+
+        outcomes = self.check_many(ids, check)
+        Friendship.update_many(self.allowed_keys(outcomes), self.id, ACCEPTED)
+        return outcomes
+
+    def decline_many(self, ids):
+        """Decline the pending requests many people sent to the viewer.
+
+        :return: Dict of error messages, or None where declined, by ID.
+        """
+        def check(id, edge):
+            if edge is None or edge.state != PENDING or \
+                    edge.action_user_id == self.id:
+                return 'no received friend request'
+
+        outcomes = self.check_many(ids, check)
+        Friendship.delete_many(self.allowed_keys(outcomes))
+        return outcomes
+
+    def cancel_many(self, ids):
+        """Cancel the pending requests the viewer sent to many people.
+
+        :return: Dict of error messages, or None where cancelled, by ID.
+        """
+        def check(id, edge):
+            if edge is None or edge.state != PENDING or \
+                    edge.action_user_id != self.id:
+                return 'no sent friend request'
+
+        outcomes = self.check_many(ids, check)
+        Friendship.delete_many(self.allowed_keys(outcomes))
+        return outcomes
+
+    def block_many(self, ids):
+        """Block many people at once.
+
+        :return: Dict of error messages, or None where blocked, by ID.
+        """
+        # Whether a relationship exists, by the ID of each allowed person.
+        exists = {}
+
+        def check(id, edge):
+            if edge is not None and edge.state == BLOCKED:
+                return 'already blocked'
+            exists[id] = edge is not None
+
+        outcomes = self.check_many(ids, check)
+        Friendship.update_many(
+            [Friendship.key(self.id, id) for id in exists if exists[id]],
+            self.id, BLOCKED
+        )
+        Friendship.insert_many(
+            [Friendship.key(self.id, id) for id in exists if not exists[id]],
+            self.id, BLOCKED
+        )
+        return outcomes
+
     def follow(self, id):
         """
         :return: :class:`.Follower` instance if the viewer can follow,
@@ -387,10 +796,35 @@ class User(db.Model):
         :return: Total count of deleted Follower records or None.
         """
         if self.is_following(id):
+            TimelineEntry.delete_authors(self.id, [id])
             return Follower.delete(self.id, id)
         else:
             return None
 
+    def unfollow_many(self, ids):
+        """Unfollow many people at once.
+
+        :return: Dict of error messages, or None where unfollowed, by ID.
+        """
+        following = {
+            id for id, in
+            db.session.query(Follower.followed_id).filter(
+                Follower.follower_id == self.id,
+                Follower.followed_id.in_(ids)
+            )
+        }
+        outcomes = {
+            id: None if id in following else 'not following'
+            for id in ids
+        }
+        if following:
+            Follower.query.filter(
+                db.tuple_(Follower.follower_id, Follower.followed_id).in_(
+                    [(self.id, id) for id in following])
+            ).delete(synchronize_session=False)
+            TimelineEntry.delete_authors(self.id, following)
+        return outcomes
+
     def snooze(self, id, days=30):
         """
         :return: :class:`.Follower` instance if the viewer can snooze,
@@ -403,6 +837,7 @@ class User(db.Model):
 
         data.expiration = datetime.utcnow() + timedelta(days=days)
         data.is_snoozed = True
+        TimelineEntry.delete_authors(self.id, [id])
         return data
 
     def unsnooze(self, id):
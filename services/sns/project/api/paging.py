@@ -0,0 +1,108 @@
+"""Keyset pagination of queries.
+
+Pages are fetched by keyset: cursors encode the sort key values of a
+row and bound the next page with a row value comparison, so deep pages
+cost as much as the first. GraphQL connections are built from the pages
+by :mod:`project.api.schemas.gql`.
+"""
+
+import json
+
+from collections import namedtuple
+from datetime import date, datetime
+
+from graphql_relay.utils import base64, unbase64
+
+from project import db
+
+
+KEYSET_PREFIX = 'keyset:'
+
+# Rows of a page and a function returning the total count.
+Page = namedtuple('Page', 'rows count')
+
+
+def lazy_count(query):
+    """Return a function which counts the query on its first call only.
+
+    Counting is deferred to ``totalCount`` resolution, so connections
+    whose ``totalCount`` isn't selected never issue ``COUNT(*)``.
+    """
+    cache = []
+
+    def count():
+        if not cache:
+            # The query may have been built by another thread's session.
+            cache.append(query.with_session(db.session()).count())
+        return cache[0]
+
+    return count
+
+
+def keyset_to_cursor(values):
+    """Encode the sort key values of a row into an opaque cursor."""
+
+    def default(value):
+        if isinstance(value, (date, datetime)):
+            return value.isoformat()
+        raise TypeError(f'{value!r} is not JSON serializable')
+
+    return base64(KEYSET_PREFIX + json.dumps(list(values), default=default))
+
+
+def cursor_to_keyset(cursor, size):
+    """Decode the cursor made by :func:`keyset_to_cursor`.
+
+    :param size: Expected number of sort key values.
+    """
+    try:
+        prefix, values = unbase64(cursor).split(':', 1)
+        values = tuple(json.loads(values))
+        assert prefix + ':' == KEYSET_PREFIX and len(values) == size
+        return values
+    except Exception:
+        raise Exception('Invalid cursor.')
+
+
+def keyset_filter(sort_key, values, less):
+    """Return the criterion of rows whose sort key is less or greater
+    than the values.
+
+    The row value comparison is repeated as a bound on the leading
+    column alone, which indexes can use as a range condition even when
+    the other columns of the key aren't indexed in order.
+
+    :param less: Find the lesser keys rather than the greater.
+    """
+    key = db.tuple_(*sort_key)
+    if less:
+        return db.and_(key < values, sort_key[0] <= values[0])
+    return db.and_(key > values, sort_key[0] >= values[0])
+
+
+def keyset_query(query, sort_key, sort_desc, args):
+    """Filter the query by the keyset cursors in the connection args.
+
+    :return: The filtered query, the ``ORDER BY`` clauses which
+        the page has to be fetched in and the page size.
+    """
+    first = args.get('first')
+    last = args.get('last')
+    after = args.get('after')
+    before = args.get('before')
+
+    if after is not None:
+        values = cursor_to_keyset(after, len(sort_key))
+        query = query.filter(keyset_filter(sort_key, values, sort_desc))
+    if before is not None:
+        values = cursor_to_keyset(before, len(sort_key))
+        query = query.filter(keyset_filter(sort_key, values, not sort_desc))
+
+    # Page backwards from ``before`` only when ``last`` is given alone.
+    backwards = last is not None and first is None
+
+    if sort_desc != backwards:
+        ordering = [c.desc() for c in sort_key]
+    else:
+        ordering = [c.asc() for c in sort_key]
+    return query, ordering, last if backwards else first
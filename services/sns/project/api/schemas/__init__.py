@@ -1,14 +1,16 @@
 import graphene
 
 from project.api.schemas.errors import MutationError
+from project.api.schemas.post.query import Query as PostQuery
 from project.api.schemas.user.query import Query as UserQuery
 from project.api.schemas.user.mutation import (
+    BulkMutationSuccess,
     Mutation as UserMutation,
     UserMutationSuccess,
 )
 
 
-class Query(UserQuery, graphene.ObjectType):
+class Query(UserQuery, PostQuery, graphene.ObjectType):
     node = graphene.relay.Node.Field()
 
 
@@ -18,5 +20,5 @@ class Mutation(UserMutation, graphene.ObjectType):
 
 schema = graphene.Schema(
     query=Query, mutation=Mutation,
-    types=[MutationError, UserMutationSuccess]
+    types=[MutationError, UserMutationSuccess, BulkMutationSuccess]
 )
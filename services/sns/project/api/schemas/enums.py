@@ -4,6 +4,7 @@ from project.api.models.enums import (
     FriendshipState as _FriendshipState,
     Gender as _Gender,
     MaritalStatus as _MaritalStatus,
+    Reaction as _Reaction,
 )
 from project.utils import to_gql_enum
 
@@ -14,6 +15,8 @@ MaritalStatus = to_gql_enum(_MaritalStatus)
 
 FriendshipState = to_gql_enum(_FriendshipState)
 
+Reaction = to_gql_enum(_Reaction)
+
 
 class ActionDirection(graphene.Enum):
     """Possible directions in which an action is made."""
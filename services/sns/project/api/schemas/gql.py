@@ -1,8 +1,18 @@
+from functools import partial
+
 import graphene
 
 from sqlalchemy.orm.query import Query as SQLAlchemyQuery
 from graphene import relay
-from graphql_relay.connection.arrayconnection import connection_from_list_slice
+from graphql_relay.connection.arrayconnection import (
+    connection_from_list_slice,
+    get_offset_with_default,
+    offset_to_cursor,
+)
+from graphql.language import ast as gql_ast
+from promise import Promise, is_thenable
+
+from project.api.paging import keyset_query, keyset_to_cursor, lazy_count
 
 
 def connection_factory(node, name=None):
@@ -18,21 +28,91 @@ def connection_factory(node, name=None):
         )
 
         def resolve_total_count(connection, info):
-            return connection.length
+            return connection.length()
 
     return Connection
 
 
+def selected_fields(info, *path):
+    """Return the names of fields selected by the resolved field under
+    the path, e.g. ``selected_fields(info, 'edges', 'node')``.
+
+    Fragments are expanded regardless of their type condition.
+    """
+
+    def children(fields):
+        for field in fields:
+            if field.selection_set is not None:
+                yield from expand(field.selection_set)
+
+    def expand(selection_set):
+        for selection in selection_set.selections:
+            if isinstance(selection, gql_ast.Field):
+                yield selection
+            elif isinstance(selection, gql_ast.FragmentSpread):
+                fragment = info.fragments.get(selection.name.value)
+                if fragment is not None:
+                    yield from expand(fragment.selection_set)
+            else:
+                yield from expand(selection.selection_set)
+
+    fields = info.field_asts
+    for name in path:
+        fields = [f for f in children(fields) if f.name.value == name]
+    return {f.name.value for f in children(fields)}
+
+
 class ConnectionField(relay.ConnectionField):
+    """Relay connection field.
+
+    Connections page with offset-encoded cursors by default. When
+    ``sort_key`` is given, the connection is paged by keyset instead:
+    cursors encode the sort key values of the edge and ``after``/``before``
+    become row value comparisons, so deep pages cost as much as the first.
+
+    :param sort_key: Columns which uniquely order the resolved query,
+        e.g. ``(Friendship.updated_at, User.id)``.
+    :param sort_desc: Order the keyset descending.
+    :param to_node: Function of the parent and the columns of a row of
+        the resolved query, building the node of its edge. Nodes are
+        built only for the rows of the page.
+    :param concurrent: Resolve the field on the thread pool of
+        :class:`.ThreadPoolExecutor` when it is enabled.
+
+    Resolvers may also return a promise of a :class:`.Page` loaded in
+    batches by :mod:`project.api.schemas.loaders`.
+    """
+
+    def __init__(self, type, *args, sort_key=None, sort_desc=False,
+                 to_node=None, concurrent=False, **kwargs):
+        self.sort_key = sort_key
+        self.sort_desc = sort_desc
+        self.to_node = to_node
+        self.concurrent = concurrent
+        super().__init__(type, *args, **kwargs)
+
+    def get_resolver(self, parent_resolver):
+        if self.sort_key is None:
+            return super().get_resolver(parent_resolver)
+
+        resolver = graphene.Field.get_resolver(self, parent_resolver)
+        return partial(
+            self.keyset_connection_resolver, resolver, self.type,
+            self.sort_key, self.sort_desc, self.to_node
+        )
+
     @classmethod
     def connection_resolver(cls, resolver, connection, root, info, **kwargs):
         iterable = resolver(root, info, **kwargs)
 
+        if is_thenable(iterable):
+            return Promise.resolve(iterable).then(
+                partial(cls.resolve_page, connection, kwargs))
+
         if isinstance(iterable, SQLAlchemyQuery):
-            _len = iterable.count()
-        else:
-            _len = len(iterable)
+            return cls.query_connection(iterable, connection, kwargs)
 
+        _len = len(iterable)
         connection = connection_from_list_slice(
             iterable,
             kwargs,
@@ -44,5 +124,130 @@ class ConnectionField(relay.ConnectionField):
             edge_type=connection.Edge
         )
         connection.iterable = iterable
-        connection.length = _len
+        connection.length = lambda: _len
+        return connection
+
+    @classmethod
+    def query_connection(cls, query, connection, kwargs):
+        """Page the query by offset, fetching one row past the page
+        to tell whether there is a next page.
+
+        The query is counted only for ``last`` without ``before``.
+        """
+        first = kwargs.get('first')
+        last = kwargs.get('last')
+        after = kwargs.get('after')
+        before = kwargs.get('before')
+        count = lazy_count(query)
+
+        lower_bound = get_offset_with_default(after, -1) + 1
+        start = lower_bound
+        upper_bound = get_offset_with_default(before, None) if before else None
+        stop = upper_bound
+
+        if first is not None:
+            stop = start + first if stop is None else min(stop, start + first)
+        if last is not None:
+            if stop is None:
+                stop = count()
+            start = max(start, stop - last)
+
+        q = query.offset(start)
+        if stop is not None:
+            q = q.limit(max(stop - start, 0) + 1)
+
+        rows = q.all()
+        size = len(rows) if stop is None else max(stop - start, 0)
+        has_more = len(rows) > size
+        rows = rows[:size]
+
+        edges = [
+            connection.Edge(node=row, cursor=offset_to_cursor(start + i))
+            for i, row in enumerate(rows)
+        ]
+        page_info = relay.connection.PageInfo(
+            start_cursor=edges[0].cursor if edges else None,
+            end_cursor=edges[-1].cursor if edges else None,
+            has_previous_page=last is not None and start > lower_bound,
+            has_next_page=(
+                first is not None and has_more and
+                (upper_bound is None or stop < upper_bound)
+            ),
+        )
+
+        connection = connection(edges=edges, page_info=page_info)
+        connection.iterable = query
+        connection.length = count
         return connection
+
+    @classmethod
+    def keyset_connection_resolver(cls, resolver, connection, sort_key,
+                                   sort_desc, to_node, root, info,
+                                   **kwargs):
+        iterable = resolver(root, info, **kwargs)
+
+        if not isinstance(iterable, SQLAlchemyQuery):
+            return cls.connection_resolver(
+                lambda *_, **__: iterable, connection, root, info, **kwargs
+            )
+
+        q, ordering, limit = keyset_query(
+            iterable.add_columns(*sort_key), sort_key, sort_desc, kwargs)
+        q = q.order_by(*ordering)
+        if limit is not None:
+            q = q.limit(limit + 1)
+
+        rows = q.all()
+        if to_node is not None:
+            # Split the sort key values off the row's own columns.
+            size = len(sort_key)
+            rows = [(row[:-size], *row[-size:]) for row in rows]
+            to_node = partial(to_node, root)
+
+        return keyset_connection(
+            connection, rows, kwargs, lazy_count(iterable), to_node)
+
+    @classmethod
+    def resolve_page(cls, connection, kwargs, page):
+        return keyset_connection(connection, page.rows, kwargs, page.count)
+
+
+def keyset_connection(connection, rows, args, count, to_node=None):
+    """Build the connection from rows fetched by :func:`keyset_query`.
+
+    :param rows: ``(node, *sort_key_values)`` rows, one more than
+        the page size if there is a further page.
+    :param count: Function returning the total count of the connection.
+    :param to_node: Function building the node from the node's value
+        of a row, unpacked.
+    """
+    first = args.get('first')
+    last = args.get('last')
+    after = args.get('after')
+    before = args.get('before')
+
+    backwards = last is not None and first is None
+    limit = last if backwards else first
+
+    has_more = limit is not None and len(rows) > limit
+    rows = list(rows[:limit])
+    if backwards:
+        rows.reverse()
+
+    edges = [
+        connection.Edge(
+            node=row[0] if to_node is None else to_node(*row[0]),
+            cursor=keyset_to_cursor(row[1:])
+        )
+        for row in rows
+    ]
+    page_info = relay.connection.PageInfo(
+        start_cursor=edges[0].cursor if edges else None,
+        end_cursor=edges[-1].cursor if edges else None,
+        has_previous_page=has_more if backwards else after is not None,
+        has_next_page=before is not None if backwards else has_more,
+    )
+
+    connection = connection(edges=edges, page_info=page_info)
+    connection.length = count
+    return connection
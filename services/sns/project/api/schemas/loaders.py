@@ -0,0 +1,264 @@
+from collections import defaultdict
+
+from promise import Promise
+from promise.dataloader import DataLoader
+from sqlalchemy.orm import Load
+
+from project import db
+from project.api.instrumentation import (
+    attributing,
+    current_path,
+    current_profile,
+)
+from project.api.models.user import Follower, FriendshipEdge, User
+from project.api.paging import keyset_query, Page
+
+
+CONNECTION_ARGS = ('first', 'last', 'after', 'before')
+
+
+class Relation:
+    """Describe a one-to-many relationship between users through
+    an association model, e.g. a user and their friends.
+
+    :param model: Association model class.
+    :param parent_key: Column referencing the user who owns the connection.
+    :param child_key: Column referencing the users in the connection.
+    :param sort_key: Association columns which uniquely order
+        the connection.
+    :param criteria: Extra filter criteria.
+    :param entity: Model class the child key references.
+    """
+
+    def __init__(self, model, parent_key, child_key, sort_key,
+                 criteria=(), sort_desc=False, entity=User):
+        self.model = model
+        self.parent_key = parent_key
+        self.child_key = child_key
+        self.sort_key = sort_key
+        self.criteria = criteria
+        self.sort_desc = sort_desc
+        self.entity = entity
+
+    @property
+    def query(self):
+        return self.model.query.filter(*self.criteria)
+
+
+class Loader(DataLoader):
+    """Base loader of batches.
+
+    With an executor, batches are loaded on its thread pool, so loaders
+    dispatched together query concurrently. SQL statements of a batch
+    are attributed to the paths of the fields which loaded its keys.
+    """
+
+    def __init__(self, executor=None):
+        super().__init__()
+        self.executor = executor
+        # Paths of the fields which loaded keys since the last batch.
+        self.paths = []
+
+    def load(self, key=None):
+        path = current_path()
+        if path is not None and path not in self.paths:
+            self.paths.append(path)
+        return super().load(key)
+
+    def batch_load_fn(self, keys):
+        paths, self.paths = tuple(self.paths), []
+        with attributing(current_profile(), paths or None):
+            if self.executor is not None:
+                return self.executor.submit(self.load_all, keys)
+            return Promise.resolve(self.load_all(keys))
+
+    def load_all(self, keys):
+        """Return the list of values of the keys."""
+        raise NotImplementedError
+
+
+class RelationLoader(Loader):
+    """Base loader of a :class:`Relation`."""
+
+    def __init__(self, relation, executor=None):
+        super().__init__(executor)
+        self.relation = relation
+
+
+class PageLoader(RelationLoader):
+    """Load connection pages of many users with one windowed query
+    per distinct set of connection args.
+
+    Keys are ``(parent_id, columns, first, last, after, before)`` tuples,
+    where ``columns`` are the names of the only columns to load.
+    """
+
+    def load_all(self, keys):
+        groups = defaultdict(set)
+        for parent_id, *args in keys:
+            groups[tuple(args)].add(parent_id)
+
+        pages = {}
+        for (columns, *args), ids in groups.items():
+            args = dict(zip(CONNECTION_ARGS, args))
+            for parent_id, rows in self.load_pages(ids, args, columns).items():
+                pages[(parent_id, columns, *args.values())] = rows
+
+        return [pages.get(key, []) for key in keys]
+
+    def load_pages(self, ids, args, columns=None):
+        r = self.relation
+        keys = [c.label(f'key_{i}') for i, c in enumerate(r.sort_key)]
+
+        q, ordering, limit = keyset_query(
+            r.query.filter(r.parent_key.in_(ids)),
+            r.sort_key, r.sort_desc, args
+        )
+        row_number = db.func.row_number().over(
+            partition_by=r.parent_key, order_by=ordering)
+        sub = q.with_entities(
+            r.parent_key.label('parent_id'),
+            r.child_key.label('child_id'),
+            row_number.label('row_number'),
+            *keys
+        ).subquery()
+
+        q = (
+            db.session.query(
+                r.entity, sub.c.parent_id, *(sub.c[k.name] for k in keys)).
+            join(sub, r.entity.id == sub.c.child_id).
+            order_by(sub.c.parent_id, sub.c.row_number)
+        )
+        if columns:
+            q = q.options(Load(r.entity).load_only(*columns))
+        if limit is not None:
+            q = q.filter(sub.c.row_number <= limit + 1)
+
+        pages = defaultdict(list)
+        for node, parent_id, *values in q:
+            pages[parent_id].append((node, *values))
+        return pages
+
+
+class CountLoader(RelationLoader):
+    """Count connections of many users with one grouped query."""
+
+    def load_all(self, ids):
+        r = self.relation
+        q = (
+            r.query.
+            with_entities(r.parent_key, db.func.count()).
+            filter(r.parent_key.in_(ids)).
+            group_by(r.parent_key)
+        )
+        counts = dict(q.all())
+        return [counts.get(id, 0) for id in ids]
+
+
+class CounterLoader(Loader):
+    """Load the counters of many posts or comments in one query.
+
+    :param model: :class:`.PostCounter` or :class:`.CommentCounter`.
+    """
+
+    def __init__(self, model, executor=None):
+        super().__init__(executor)
+        self.model = model
+
+    def load_all(self, ids):
+        totals = self.model.totals(ids)
+        zeros = dict.fromkeys(self.model.count_columns, 0)
+        return [totals.get(id, zeros) for id in ids]
+
+
+class ViewerLoader(Loader):
+    """Base loader of the viewer's relationships with many users,
+    keyed by the users' IDs.
+    """
+
+    def __init__(self, viewer_id, executor=None):
+        super().__init__(executor)
+        self.viewer_id = viewer_id
+
+
+class ViewerFriendshipLoader(ViewerLoader):
+    """Load the viewer's friendships with many users in one query."""
+
+    def load_all(self, ids):
+        q = FriendshipEdge.query.filter(
+            FriendshipEdge.left_user_id == self.viewer_id,
+            FriendshipEdge.right_user_id.in_(ids)
+        )
+        friendships = {f.right_user_id: f for f in q}
+        return [friendships.get(id) for id in ids]
+
+
+class ViewerFollowingLoader(ViewerLoader):
+    """Check if the viewer follows many users in one query."""
+
+    def load_all(self, ids):
+        q = (
+            db.session.query(Follower.followed_id).
+            filter(
+                Follower.follower_id == self.viewer_id,
+                Follower.followed_id.in_(ids)
+            )
+        )
+        followed = {id for id, in q}
+        return [id in followed for id in ids]
+
+
+def get_loaders(info):
+    """Return the loaders of the current request.
+
+    Loaders are kept on the execution context, so they batch and cache
+    for one request only. Without a context nothing is shared.
+    """
+    try:
+        return info.context.loaders
+    except AttributeError:
+        loaders = {}
+        try:
+            info.context.loaders = loaders
+        except AttributeError:
+            pass
+        return loaders
+
+
+def get_loader(info, loader_class, relation):
+    loaders = get_loaders(info)
+    key = (loader_class, id(relation))
+    if key not in loaders:
+        executor = getattr(info.context, 'executor', None)
+        loaders[key] = loader_class(relation, executor)
+    return loaders[key]
+
+
+def get_viewer_loader(info, loader_class):
+    """Return the loader of the viewer's relationships, or None
+    without a viewer.
+    """
+    viewer_id = getattr(info.context, 'viewer_id', None)
+    if viewer_id is None:
+        return None
+
+    loaders = get_loaders(info)
+    key = (loader_class, viewer_id)
+    if key not in loaders:
+        executor = getattr(info.context, 'executor', None)
+        loaders[key] = loader_class(viewer_id, executor)
+    return loaders[key]
+
+
+def load_page(info, relation, parent_id, args, columns=None):
+    """Load one user's page of the relation in a batch.
+
+    :param columns: Names of the only entity columns to load.
+    :return: Promise of a :class:`.Page`.
+    """
+    key = (parent_id, columns, *(args.get(k) for k in CONNECTION_ARGS))
+    count_loader = get_loader(info, CountLoader, relation)
+
+    return get_loader(info, PageLoader, relation).load(key).then(
+        lambda rows: Page(rows, lambda: count_loader.load(parent_id))
+    )
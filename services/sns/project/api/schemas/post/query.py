@@ -0,0 +1,210 @@
+import graphene
+
+from graphene import relay
+from flask import current_app
+from promise import Promise
+
+from project.api.feed import load_feed
+from project.api.models.comment import Comment
+from project.api.models.counter import (
+    CommentCounter,
+    PostCounter,
+    reaction_column,
+)
+from project.api.models.enums import Reaction as _Reaction
+from project.api.models.post import Post
+from project.api.models.profiles import apply_profile, DETAIL
+from project.api.schemas.enums import Reaction
+from project.api.schemas.gql import connection_factory, ConnectionField
+from project.api.schemas.loaders import CounterLoader, get_loader
+from project.api.schemas.user.query import UserType
+from project.api.search import load_search
+from project.api.threads import load_thread, ThreadNode
+
+
+class ReactionCount(graphene.ObjectType):
+    """Count of one reaction to a post or a comment."""
+
+    reaction = graphene.Field(Reaction)
+    count = graphene.Int()
+
+
+def reaction_counts(counts):
+    """Return the reactions with a non-zero count."""
+    return [
+        ReactionCount(reaction=r, count=counts[reaction_column(r)])
+        for r in _Reaction if counts[reaction_column(r)]
+    ]
+
+
+def thread_limits(depth, replies):
+    """Check the depth and the replies per comment of a thread against
+    ``COMMENT_THREAD_MAX_DEPTH`` and ``COMMENT_THREAD_MAX_REPLIES``.
+    """
+    config = current_app.config
+    max_depth = config['COMMENT_THREAD_MAX_DEPTH']
+    max_replies = config['COMMENT_THREAD_MAX_REPLIES']
+    if not 0 <= depth <= max_depth:
+        raise Exception(f'Depth must be between 0 and {max_depth}.')
+    if not 0 <= replies <= max_replies:
+        raise Exception(f'Replies must be between 0 and {max_replies}.')
+    return depth, replies
+
+
+class CommentType(graphene.ObjectType, interfaces=(relay.Node,)):
+    """A comment on a post, or a reply to a comment."""
+
+    content = graphene.String(
+        description='Text of the comment.'
+    )
+    created = graphene.DateTime(
+        description='Time when the comment was published.'
+    )
+    updated = graphene.DateTime(
+        description='Time when the comment was edited.'
+    )
+    author = graphene.Field(
+        UserType,
+        description='The person who published the comment.'
+    )
+    replies = graphene.List(
+        lambda: CommentType,
+        description='Replies to the comment loaded with the thread, '
+                    'oldest first.'
+    )
+    reply_count = graphene.Int(
+        description='Count of the replies to the comment.'
+    )
+    reaction_counts = graphene.List(
+        ReactionCount,
+        description='Counts of the reactions to the comment.'
+    )
+
+    @classmethod
+    def get_node(cls, info, id):
+        return apply_profile(Comment.query, Comment, DETAIL).get(id)
+
+    def resolve_replies(obj, info):
+        if isinstance(obj, ThreadNode):
+            return obj.replies
+
+        replies = current_app.config['COMMENT_THREAD_MAX_REPLIES']
+        page = load_thread({'first': replies}, root_id=obj.id, max_depth=0)
+        return [node for node, created, id in page.rows[:replies]]
+
+    def resolve_reply_count(obj, info):
+        loader = get_loader(info, CounterLoader, CommentCounter)
+        return loader.load(obj.id).then(lambda c: c['reply_count'])
+
+    def resolve_reaction_counts(obj, info):
+        loader = get_loader(info, CounterLoader, CommentCounter)
+        return loader.load(obj.id).then(reaction_counts)
+
+
+CommentConnection = connection_factory(CommentType, 'CommentConnection')
+
+
+class PostType(graphene.ObjectType, interfaces=(relay.Node,)):
+    """A post a user published."""
+
+    content = graphene.String(
+        description='Text of the post.'
+    )
+    created = graphene.DateTime(
+        description='Time when the post was published.'
+    )
+    updated = graphene.DateTime(
+        description='Time when the post was edited.'
+    )
+    author = graphene.Field(
+        UserType,
+        description='The person who published the post.'
+    )
+    reaction_counts = graphene.List(
+        ReactionCount,
+        description='Counts of the reactions to the post.'
+    )
+    comment_count = graphene.Int(
+        description='Count of the comments on the post.'
+    )
+    comments = ConnectionField(
+        CommentConnection,
+        depth=graphene.Int(
+            default_value=2,
+            description='Levels of replies to load under the comments.'
+        ),
+        replies=graphene.Int(
+            default_value=10,
+            description='Most replies to load per comment, oldest first.'
+        ),
+        description='Top-level comments on the post with their replies, '
+                    'oldest first.'
+    )
+
+    @classmethod
+    def get_node(cls, info, id):
+        return apply_profile(Post.query, Post, DETAIL).get(id)
+
+    def resolve_reaction_counts(obj, info):
+        loader = get_loader(info, CounterLoader, PostCounter)
+        return loader.load(obj.id).then(reaction_counts)
+
+    def resolve_comment_count(obj, info):
+        loader = get_loader(info, CounterLoader, PostCounter)
+        return loader.load(obj.id).then(lambda c: c['comment_count'])
+
+    def resolve_comments(obj, info, depth, replies, **kwargs):
+        depth, replies = thread_limits(depth, replies)
+        return Promise.resolve(load_thread(
+            kwargs, post_id=obj.id, max_depth=depth, max_replies=replies))
+
+
+PostConnection = connection_factory(PostType, 'PostConnection')
+
+
+class SearchResult(graphene.Union):
+    """A post or a comment matching a search."""
+
+    class Meta:
+        types = (PostType, CommentType)
+
+    @classmethod
+    def resolve_type(cls, instance, info):
+        if isinstance(instance, Post):
+            return PostType
+        return CommentType
+
+
+SearchResultConnection = connection_factory(
+    SearchResult, 'SearchResultConnection')
+
+
+class Query(graphene.ObjectType):
+    post = relay.Node.Field(PostType)
+    feed = ConnectionField(
+        PostConnection,
+        description="Posts of the viewer and the people they follow, "
+                    "latest first. Its totalCount is approximate."
+    )
+    search = ConnectionField(
+        SearchResultConnection,
+        query=graphene.String(
+            required=True,
+            description='Words, "quoted phrases", "or" and -excluded words.'
+        ),
+        description='Posts and comments matching the query, best ranked '
+                    'first.'
+    )
+
+    def resolve_feed(root, info, **kwargs):
+        viewer_id = getattr(info.context, 'viewer_id', None)
+        if viewer_id is None:
+            raise Exception('Authentication required.')
+
+        return Promise.resolve(load_feed(viewer_id, kwargs))
+
+    def resolve_search(root, info, query, **kwargs):
+        if not query.strip():
+            raise Exception('Search query must not be empty.')
+
+        return Promise.resolve(load_search(query, kwargs))
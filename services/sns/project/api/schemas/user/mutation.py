@@ -4,10 +4,12 @@ from datetime import date
 
 import graphene
 
+from flask import current_app
 from graphql_relay import from_global_id
 from sqlalchemy.exc import IntegrityError
 
 from project import bcrypt, db
+from project.api.cache import invalidate_node
 from project.api.models.user import User
 from project.api.schemas.enums import Gender, MaritalStatus
 from project.api.schemas.errors import MutationError
@@ -129,6 +131,7 @@ class CreateUser(graphene.relay.ClientIDMutation):
             db.session.rollback()
             return MutationError(errors={'db': e.args[0]})
 
+        invalidate_node(User, user.id)
         return UserMutationSuccess(user=user)
 
 
@@ -201,9 +204,132 @@ class UpdateUser(graphene.relay.ClientIDMutation):
             db.session.rollback()
             return MutationError(errors={'db': e.args[0]})
 
+        invalidate_node(User, user.id)
         return UserMutationSuccess(user=user)
 
 
+class BulkOutcome(graphene.ObjectType):
+    """Outcome of a bulk mutation for one user."""
+    user_id = graphene.ID(
+        required=True,
+        description='The user ID as given.'
+    )
+    ok = graphene.Boolean(
+        required=True,
+        description='Whether the action was applied.'
+    )
+    error = graphene.String(
+        description='Why the action was not applied.'
+    )
+
+
+class BulkMutationSuccess(graphene.ObjectType):
+    """Return the outcome for each user when the batch is applied."""
+    outcomes = graphene.List(
+        graphene.NonNull(BulkOutcome),
+        required=True,
+        description='Outcomes in the order of the given user IDs.'
+    )
+    client_mutation_id = graphene.String()
+
+
+class BulkMutationPayload(graphene.Union):
+    class Meta:
+        types = (MutationError, BulkMutationSuccess)
+
+
+class BulkMutation(graphene.relay.ClientIDMutation):
+    """Apply an action of the viewer to many users in one transaction.
+
+    The relationships of the whole batch are validated in one query and
+    changed with one statement per kind of change. Users the action
+    doesn't apply to are skipped with an error in their outcome.
+    """
+
+    class Meta:
+        abstract = True
+
+    Output = BulkMutationPayload
+
+    class Input:
+        user_ids = graphene.List(
+            graphene.NonNull(graphene.ID),
+            required=True,
+            description='The user IDs to act on.'
+        )
+
+    # Name of the :class:`.User` method applying the action.
+    action = None
+
+    @classmethod
+    def mutate_and_get_payload(cls, root, info, user_ids, **input):
+        viewer_id = getattr(info.context, 'viewer_id', None)
+        viewer = viewer_id and User.query.get(viewer_id)
+        if not viewer:
+            return MutationError(errors={'viewer': 'authentication required'})
+
+        max_size = current_app.config['GRAPHQL_MAX_BULK_SIZE']
+        user_ids = list(dict.fromkeys(user_ids))
+        if not 0 < len(user_ids) <= max_size:
+            d = {'user_ids': f'must have 1 to {max_size} IDs'}
+            return MutationError(errors=d)
+
+        # Verify IDs
+        ids, errors = {}, {}
+        for global_id in user_ids:
+            try:
+                ids[global_id] = int(from_global_id(global_id)[1])
+            except ValueError:
+                errors[global_id] = 'invalid ID'
+
+        # Apply and persist to db
+        try:
+            outcomes = getattr(viewer, cls.action)(list(set(ids.values())))
+            db.session.commit()
+        except IntegrityError as e:
+            db.session.rollback()
+            return MutationError(errors={'db': e.args[0]})
+
+        errors.update(
+            (global_id, outcomes[id]) for global_id, id in ids.items())
+        return BulkMutationSuccess(outcomes=[
+            BulkOutcome(
+                user_id=global_id,
+                ok=errors[global_id] is None,
+                error=errors[global_id]
+            )
+            for global_id in user_ids
+        ])
+
+
+class AcceptFriendRequests(BulkMutation):
+    action = 'accept_many'
+
+
+class DeclineFriendRequests(BulkMutation):
+    action = 'decline_many'
+
+
+class CancelFriendRequests(BulkMutation):
+    action = 'cancel_many'
+
+
+class BlockUsers(BulkMutation):
+    action = 'block_many'
+
+
+class UnfollowUsers(BulkMutation):
+    action = 'unfollow_many'
+
+
 class Mutation(graphene.ObjectType):
     create_user = CreateUser.Field(description='Create a new user.')
     update_user = UpdateUser.Field(description='Update a user.')
+    accept_friend_requests = AcceptFriendRequests.Field(
+        description='Accept the friend requests of many users.')
+    decline_friend_requests = DeclineFriendRequests.Field(
+        description='Decline the friend requests of many users.')
+    cancel_friend_requests = CancelFriendRequests.Field(
+        description='Cancel the friend requests sent to many users.')
+    block_users = BlockUsers.Field(description='Block many users.')
+    unfollow_users = UnfollowUsers.Field(description='Unfollow many users.')
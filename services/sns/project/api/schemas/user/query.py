@@ -3,15 +3,126 @@ from ast import literal_eval
 import graphene
 
 from graphene import relay
+from sqlalchemy.orm import aliased, Load
 
 from project import db
-from project.api.models.enums import FriendshipState
-from project.api.models.user import Friendship, User
-from project.api.schemas.enums import Gender, MaritalStatus
-from project.api.schemas.gql import connection_factory, ConnectionField
+from project.api.cache import get_node
+from project.api.models.candidate import FriendCandidate
+from project.api.models.enums import FriendshipState as _FriendshipState
+from project.api.models.user import (
+    Follower,
+    Friendship,
+    FriendshipEdge,
+    suggestion_edges,
+    User,
+)
+from project.api.schemas.enums import (
+    ActionDirection,
+    FriendshipState,
+    Gender,
+    MaritalStatus,
+)
+from project.api.schemas.gql import (
+    connection_factory,
+    ConnectionField,
+    selected_fields,
+)
+from project.api.schemas.loaders import (
+    get_viewer_loader,
+    load_page,
+    Relation,
+    ViewerFollowingLoader,
+    ViewerFriendshipLoader,
+)
+from project.utils import to_snake_case
+
+
+ACCEPTED, BLOCKED, PENDING, SUGGESTED = _FriendshipState.__members__.values()
+
+# UserType fields resolved from other columns than their own.
+FIELD_COLUMNS = {
+    'name': ('first_name', 'last_name'),
+}
+
+FRIENDS = Relation(
+    FriendshipEdge,
+    parent_key=FriendshipEdge.left_user_id,
+    child_key=FriendshipEdge.right_user_id,
+    sort_key=(FriendshipEdge.updated_at, FriendshipEdge.right_user_id),
+    criteria=(FriendshipEdge.state == ACCEPTED,)
+)
+BLOCKED_USERS = Relation(
+    FriendshipEdge,
+    parent_key=FriendshipEdge.left_user_id,
+    child_key=FriendshipEdge.right_user_id,
+    sort_key=(FriendshipEdge.updated_at, FriendshipEdge.right_user_id),
+    criteria=(
+        FriendshipEdge.state == BLOCKED,
+        FriendshipEdge.action_user_id == FriendshipEdge.left_user_id,
+    )
+)
+FOLLOWERS = Relation(
+    Follower,
+    parent_key=Follower.followed_id,
+    child_key=Follower.follower_id,
+    sort_key=(Follower.created_at, Follower.follower_id)
+)
+FOLLOWINGS = Relation(
+    Follower,
+    parent_key=Follower.follower_id,
+    child_key=Follower.followed_id,
+    sort_key=(Follower.created_at, Follower.followed_id)
+)
+
+
+def user_columns(info, *path):
+    """Return the names of the only :class:`.User` columns needed
+    by the fields selected under the path.
+    """
+    columns = {'id'}
+    for field in selected_fields(info, *path):
+        for c in FIELD_COLUMNS.get(field, (to_snake_case(field),)):
+            if c in User.__table__.columns:
+                columns.add(c)
+    return tuple(sorted(columns))
+
+
+def friend_request_node(user, other, action_user_id, updated_at):
+    """Build the :class:`FriendRequestType` of a pending friendship
+    of the user with the other person.
+    """
+    if action_user_id == user.id:
+        sender, receiver = user, other
+    else:
+        receiver, sender = user, other
+
+    return FriendRequestType(
+        id=(sender.id, receiver.id),
+        sender=sender, receiver=receiver,
+        created_at=updated_at
+    )
+
+
+def friend_suggestion_node(user, suggester, left_user, right_user,
+                           updated_at):
+    """Build the :class:`FriendSuggestionType` of a suggestion
+    the user is involved in.
+    """
+    return FriendSuggestionType(
+        id=(left_user.id, right_user.id, suggester.id),
+        suggester=suggester,
+        receivers=[left_user, right_user],
+        created_at=updated_at
+    )
 
 
-ACCEPTED, BLOCKED, PENDING, SUGGESTED = FriendshipState.__members__.values()
+def load_users(ids, columns):
+    return (
+        User.query.
+        options(Load(User).load_only(*columns)).
+        filter(User.id.in_(ids)).
+        all()
+    )
 
 
 class UserType(graphene.ObjectType, interfaces=(relay.Node,)):
@@ -50,6 +161,15 @@ class UserType(graphene.ObjectType, interfaces=(relay.Node,)):
     marital_status = MaritalStatus(
         description="The user's relationship status."
     )
+    viewer_is_friend = graphene.Boolean(
+        description='Whether the viewer is a friend of the user.'
+    )
+    viewer_is_following = graphene.Boolean(
+        description='Whether the viewer is following the user.'
+    )
+    viewer_friendship_state = FriendshipState(
+        description="State of the viewer's friendship with the user."
+    )
     friends = ConnectionField(
         lambda: UserConnection,
         description="The user's friends."
@@ -68,103 +188,135 @@ class UserType(graphene.ObjectType, interfaces=(relay.Node,)):
     )
     friend_requests = ConnectionField(
         lambda: FriendRequestConnection,
+        direction=ActionDirection(
+            default_value=ActionDirection.ALL.value,
+            description='Received requests, sent requests or both.'
+        ),
+        sort_key=(FriendshipEdge.updated_at, FriendshipEdge.right_user_id),
+        sort_desc=True,
+        to_node=friend_request_node,
+        concurrent=True,
         description='Friend requests (Inbox and outbox) of the user.'
     )
     friend_suggestions = ConnectionField(
         lambda: FriendSuggestionConnection,
+        sort_key=(
+            suggestion_edges.c.updated_at,
+            suggestion_edges.c.left_user_id,
+            suggestion_edges.c.right_user_id,
+        ),
+        sort_desc=True,
+        to_node=friend_suggestion_node,
+        concurrent=True,
         description='Friend suggestions (Inbox and outbox) of the user.'
     )
+    people_you_may_know = ConnectionField(
+        lambda: UserConnection,
+        sort_key=(FriendCandidate.rank,),
+        description='Friends of friends ranked by mutual friends.'
+    )
 
     @classmethod
     def get_node(cls, info, id):
-        return User.query.get(id)
+        return get_node(User, id, user_columns(info))
 
     def resolve_name(obj, info, **kwargs):
         return f'{obj.first_name} {obj.last_name}'
 
+    # Viewer fields of a list of users are resolved in one batch.
+    # They are null without a viewer.
+    def resolve_viewer_is_friend(obj, info, **kwargs):
+        loader = get_viewer_loader(info, ViewerFriendshipLoader)
+        if loader is None:
+            return None
+        return loader.load(obj.id).then(
+            lambda f: f is not None and f.state == ACCEPTED)
+
+    def resolve_viewer_is_following(obj, info, **kwargs):
+        loader = get_viewer_loader(info, ViewerFollowingLoader)
+        if loader is None:
+            return None
+        return loader.load(obj.id)
+
+    def resolve_viewer_friendship_state(obj, info, **kwargs):
+        loader = get_viewer_loader(info, ViewerFriendshipLoader)
+        if loader is None:
+            return None
+        return loader.load(obj.id).then(lambda f: f and f.state)
+
     def resolve_friends(obj, info, **kwargs):
-        return obj.friendship.filter(Friendship.state == ACCEPTED)
+        columns = user_columns(info, 'edges', 'node')
+        return load_page(info, FRIENDS, obj.id, kwargs, columns)
 
     def resolve_blocked_users(obj, info, **kwargs):
-        return obj.friendship.filter(
-            Friendship.state == BLOCKED, Friendship.action_user_id == obj.id)
+        columns = user_columns(info, 'edges', 'node')
+        return load_page(info, BLOCKED_USERS, obj.id, kwargs, columns)
 
     def resolve_followers(obj, info, **kwargs):
-        return obj.followers
+        columns = user_columns(info, 'edges', 'node')
+        return load_page(info, FOLLOWERS, obj.id, kwargs, columns)
 
     def resolve_followings(obj, info, **kwargs):
-        return obj.followings
-
-    def resolve_friend_requests(obj, info, **kwargs):
-        subquery = (
-            Friendship.query.filter_by(state=PENDING, left_user_id=obj.id).
-            subquery(Friendship.__tablename__)
+        columns = user_columns(info, 'edges', 'node')
+        return load_page(info, FOLLOWINGS, obj.id, kwargs, columns)
+
+    def resolve_people_you_may_know(obj, info, **kwargs):
+        columns = user_columns(info, 'edges', 'node')
+        return (
+            User.query.
+            options(Load(User).load_only(*columns)).
+            join(FriendCandidate, FriendCandidate.candidate_id == User.id).
+            filter(FriendCandidate.user_id == obj.id)
         )
+
+    def resolve_friend_requests(obj, info, direction=None, **kwargs):
+        columns = user_columns(info, 'edges', 'node', 'from') + \
+            user_columns(info, 'edges', 'node', 'to')
         q = (
-            db.session.query(User, subquery).
-            join(subquery, subquery.c.right_user_id == User.id).
-            order_by(Friendship.updated_at.desc())
+            db.session.query(
+                User, FriendshipEdge.action_user_id, FriendshipEdge.updated_at
+            ).
+            options(Load(User).load_only(*columns)).
+            join(FriendshipEdge, FriendshipEdge.right_user_id == User.id).
+            filter(
+                FriendshipEdge.left_user_id == obj.id,
+                FriendshipEdge.state == PENDING
+            )
         )
 
-        iterable = []
-        for row in q:
-            if row.action_user_id == obj.id:
-                sender, receiver = obj, row.User
-            else:
-                receiver, sender = obj, row.User
-
-            iterable.append(FriendRequestType(
-                id=(sender.id, receiver.id),
-                sender=sender, receiver=receiver,
-                created_at=row.updated_at
-            ))
-        return iterable
-
-    # REVIEW: Join VS multiple quries
-    #
-    # Not sure which one is better. In JOIN case, query returns
-    # repeated data. See the commit 1b35f19.
-    #
-    # In multiple-query case, query might be slow
-    # and there is Python looping overhead. However, if suggestions
-    # were limited to 5000 records, the overhead wouldn't
-    # be a problem.
-    #
+        # Written as comparisons of the edge's own columns, which match
+        # the partial indexes of requests sent and received.
+        if direction == ActionDirection.INBOX.value:
+            q = q.filter(
+                FriendshipEdge.action_user_id == FriendshipEdge.right_user_id)
+        elif direction == ActionDirection.OUTBOX.value:
+            q = q.filter(
+                FriendshipEdge.action_user_id == FriendshipEdge.left_user_id)
+        return q
+
     def resolve_friend_suggestions(obj, info, **kwargs):
-        lt_exprs = Friendship.left_user_id < Friendship.right_user_id
-        or_exprs = db.or_(
-            Friendship.left_user_id == obj.id,
-            Friendship.right_user_id == obj.id,
-            Friendship.action_user_id == obj.id,
+        # The users of each suggestion are joined, so only the users
+        # of the page are loaded, along with it.
+        suggester, left_user, right_user = (
+            aliased(User), aliased(User), aliased(User))
+        columns = user_columns(info, 'edges', 'node', 'from') + \
+            user_columns(info, 'edges', 'node', 'to')
+        return (
+            db.session.query(
+                suggester, left_user, right_user, suggestion_edges.c.updated_at
+            ).
+            select_from(suggestion_edges).
+            join(suggester, suggester.id == suggestion_edges.c.action_user_id).
+            join(left_user, left_user.id == suggestion_edges.c.left_user_id).
+            join(
+                right_user, right_user.id == suggestion_edges.c.right_user_id).
+            options(
+                Load(suggester).load_only(*columns),
+                Load(left_user).load_only(*columns),
+                Load(right_user).load_only(*columns),
+            ).
+            filter(suggestion_edges.c.user_id == obj.id)
         )
-        suggestions = (
-            Friendship.query.
-            filter(Friendship.state == SUGGESTED, lt_exprs, or_exprs).
-            order_by(Friendship.updated_at.desc()).
-            all()
-        )
-
-        # Collect unique IDs to get users by
-        ids = set()
-        for s in suggestions:
-            ids.update({s.left_user_id, s.right_user_id, s.action_user_id})
-
-        q = User.query.filter(User.id.in_(ids))
-        users = {u.id: u for u in q.all()}
-
-        iterable = []
-        for s in suggestions:
-            lid = s.left_user_id
-            rid = s.right_user_id
-            aid = s.action_user_id
-
-            iterable.append(FriendSuggestionType(
-                id=(lid, rid, aid),
-                suggester=users[aid],
-                receivers=[users[lid], users[rid]],
-                created_at=s.updated_at
-            ))
-        return iterable
 
 
 class FriendRequestType(graphene.ObjectType, interfaces=(relay.Node,)):
@@ -187,14 +339,15 @@ class FriendRequestType(graphene.ObjectType, interfaces=(relay.Node,)):
         lid, rid = literal_eval(id)
 
         request = (
-            Friendship.query.
+            FriendshipEdge.query.
             filter_by(state=PENDING, left_user_id=lid, right_user_id=rid).
             first()
         )
         if request is None:
             raise Exception('Friend request not found.')
 
-        users = User.query.filter(User.id.in_([lid, rid])).all()
+        columns = user_columns(info, 'from') + user_columns(info, 'to')
+        users = load_users([lid, rid], columns)
 
         if request.action_user_id == users[0].id:
             sender, receiver = users
@@ -235,7 +388,8 @@ class FriendSuggestionType(graphene.ObjectType, interfaces=(relay.Node,)):
         if suggestion is None:
             raise Exception('Friend suggestion not found.')
 
-        users = User.query.filter(User.id.in_((lid, rid, aid))).all()
+        columns = user_columns(info, 'from') + user_columns(info, 'to')
+        users = load_users((lid, rid, aid), columns)
 
         for i, u in enumerate(users):
             if suggestion.action_user_id == u.id:
@@ -0,0 +1,81 @@
+"""Full-text search of posts and comments.
+
+Posts and comments have ``search_vector`` columns generated from their
+content and indexed with GIN. A search matches both with one
+``tsquery``, ranks the matches by ``ts_rank_cd`` and pages them by
+keyset on ``(rank, kind, id)``.
+"""
+
+from project import db
+from project.api.models.comment import Comment
+from project.api.models.post import Post
+from project.api.models.profiles import apply_profile, LIST
+from project.api.paging import keyset_query, lazy_count, Page
+from project.utils import SEARCH_CONFIG
+
+
+MODELS = {'comment': Comment, 'post': Post}
+
+
+def to_tsquery(text):
+    """Parse the search text the way web search engines do: words,
+    ``"quoted phrases"``, ``or`` and ``-excluded`` words.
+    """
+    return db.func.websearch_to_tsquery(SEARCH_CONFIG, text)
+
+
+def ranked_matches(table, kind, tsquery):
+    """Return the select of ``(rank, kind, id)`` of the rows of the
+    table matching the query.
+
+    Ranks are cast to double precision, which round-trips through
+    cursors exactly.
+    """
+    vector = table.c.search_vector
+    return db.select([
+        db.cast(db.func.ts_rank_cd(vector, tsquery), db.Float).label('rank'),
+        db.literal_column(f"'{kind}'", db.String).label('kind'),
+        table.c.id,
+    ]).where(vector.op('@@')(tsquery))
+
+
+def search_results(text):
+    """Return the subquery of the matches of posts and comments."""
+    tsquery = to_tsquery(text)
+    return db.union_all(*(
+        ranked_matches(model.__table__, kind, tsquery)
+        for kind, model in sorted(MODELS.items())
+    )).alias('results')
+
+
+def load_search(text, args):
+    """Load the page of the search results for the connection args,
+    best ranked first.
+
+    :return: :class:`.Page` of ``(node, rank, kind, id)`` rows, where
+        nodes are posts and comments.
+    """
+    results = search_results(text)
+    sort_key = (results.c.rank, results.c.kind, results.c.id)
+    query = db.session.query(*sort_key)
+
+    q, ordering, limit = keyset_query(query, sort_key, True, args)
+    q = q.order_by(*ordering)
+    if limit is not None:
+        q = q.limit(limit + 1)
+    keys = q.all()
+
+    # Nodes are loaded with one query per kind.
+    nodes = {}
+    for kind, model in MODELS.items():
+        ids = [id for rank, k, id in keys if k == kind]
+        if ids:
+            q = apply_profile(model.query, model, LIST)
+            nodes.update(
+                ((kind, n.id), n) for n in q.filter(model.id.in_(ids)))
+
+    rows = [
+        (nodes[(kind, id)], rank, kind, id)
+        for rank, kind, id in keys if (kind, id) in nodes
+    ]
+    return Page(rows, lazy_count(query))
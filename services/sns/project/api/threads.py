@@ -0,0 +1,130 @@
+"""Comment threads.
+
+Replies to comments form a tree through ``Comment.root_comment_id``.
+A page of top-level comments and their replies down to a depth is
+loaded in one ``WITH RECURSIVE`` query and assembled in one pass.
+"""
+
+from project import db
+from project.api.models.comment import Comment
+from project.api.models.profiles import apply_profile, LIST
+from project.api.paging import keyset_query, lazy_count, Page
+
+
+SORT_KEY = (Comment.created, Comment.id)
+
+
+class ThreadNode:
+    """Comment of a loaded thread, with its loaded replies oldest first.
+
+    Attributes of the comment are read through the node.
+    """
+
+    def __init__(self, comment, depth):
+        self.comment = comment
+        self.depth = depth
+        self.replies = []
+
+    def __getattr__(self, name):
+        return getattr(self.comment, name)
+
+    def __repr__(self):
+        return '<{} {} replies={}>'.format(
+            self.__class__.__name__,
+            self.comment.id,
+            len(self.replies),
+        )
+
+
+def top_level_query(post_id=None, root_id=None):
+    """Return the query of the top-level comments of a post's forest,
+    or of the subtree under a comment.
+    """
+    if root_id is not None:
+        return Comment.query.filter(Comment.root_comment_id == root_id)
+    return Comment.query.filter(
+        Comment.post_id == post_id,
+        Comment.root_comment_id.is_(None)
+    )
+
+
+def thread_query(args, post_id=None, root_id=None, max_depth=2,
+                 max_replies=10):
+    """Return the recursive select of a thread.
+
+    The page of top-level comments for the connection args is the
+    anchor, at depth 0. Each level joins the oldest ``max_replies``
+    replies of each comment of the previous level, down to
+    ``max_depth``.
+
+    :return: Select of the comment columns, ``depth`` and ``position``,
+        the place of the comment's top-level comment in the page.
+    """
+    comments = Comment.__table__
+    # Search vectors are deferred and left out of the recursion.
+    columns = [c for c in comments.c if c.key != 'search_vector']
+    names = [c.name for c in columns]
+
+    q, ordering, limit = keyset_query(
+        top_level_query(post_id, root_id), SORT_KEY, False, args)
+    q = q.with_entities(
+        *columns,
+        db.func.row_number().over(order_by=ordering).label('position')
+    ).order_by(*ordering)
+    if limit is not None:
+        q = q.limit(limit + 1)
+    page = q.subquery('page')
+
+    thread = db.select(
+        [page.c[name] for name in names] +
+        [page.c.position, db.literal_column('0', db.Integer).label('depth')]
+    ).cte('thread', recursive=True)
+
+    replies = (
+        db.select(columns).
+        where(comments.c.root_comment_id == thread.c.id).
+        order_by(comments.c.created, comments.c.id).
+        limit(max_replies).
+        correlate(thread).
+        lateral('replies')
+    )
+    thread = thread.union_all(
+        db.select(
+            [replies.c[name] for name in names] +
+            [thread.c.position, thread.c.depth + 1]
+        ).
+        select_from(thread.join(replies, db.true())).
+        where(thread.c.depth < max_depth)
+    )
+    return thread
+
+
+def load_thread(args, post_id=None, root_id=None, max_depth=2,
+                max_replies=10):
+    """Load the page of a thread for the connection args in one query.
+
+    :return: :class:`.Page` of ``(node, created, id)`` rows of the
+        top-level :class:`ThreadNode` nodes.
+    """
+    thread = thread_query(args, post_id, root_id, max_depth, max_replies)
+    comment = db.aliased(Comment, thread)
+    q = (
+        db.session.query(comment, thread.c.depth).
+        order_by(
+            thread.c.depth, thread.c.position,
+            thread.c.created, thread.c.id
+        )
+    )
+    q = apply_profile(q, comment, LIST)
+
+    # Parents come before their replies, which come oldest first.
+    nodes = {}
+    rows = []
+    for c, depth in q:
+        node = nodes[c.id] = ThreadNode(c, depth)
+        if depth:
+            nodes[c.root_comment_id].replies.append(node)
+        else:
+            rows.append((node, c.created, c.id))
+
+    return Page(rows, lazy_count(top_level_query(post_id, root_id)))
@@ -0,0 +1,331 @@
+import json
+
+import jwt
+
+from flask import current_app, request
+from flask_graphql import GraphQLView as BaseGraphQLView
+from flask_graphql.graphqlview import HttpError
+from graphql.error import GraphQLError
+from graphql.execution import ExecutionResult as BaseExecutionResult
+from graphql.utils.get_operation_ast import get_operation_ast
+from werkzeug.exceptions import BadRequest, MethodNotAllowed, Unauthorized
+
+from project.api.cost import QueryCostAnalyzer
+from project.api.documents import document_hash, DocumentCache
+from project.api.executor import ThreadPoolExecutor
+from project.api.instrumentation import (
+    InstrumentationMiddleware,
+    log_profile,
+    profiling,
+)
+
+
+class ExecutionResult(BaseExecutionResult):
+    """Execution result with the response ``extensions``."""
+
+    __slots__ = 'extensions',
+
+    def __init__(self, data=None, errors=None, invalid=False,
+                 extensions=None):
+        super().__init__(data=data, errors=errors, invalid=invalid)
+        self.extensions = extensions
+
+
+class Context:
+    """Per-request execution context.
+
+    :param executor: Executor of the request, if any.
+    :param viewer_id: ID of the user making the request, if any.
+    """
+
+    def __init__(self, request, executor=None, viewer_id=None):
+        self.request = request
+        self.executor = executor
+        self.viewer_id = viewer_id
+        self.loaders = {}
+
+
+def get_viewer_id(request):
+    """Return the ID of the user the bearer token in the
+    ``Authorization`` header was issued to, as its ``sub`` claim.
+    """
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    if scheme.lower() != 'bearer' or not token:
+        return None
+
+    try:
+        payload = jwt.decode(
+            token, current_app.config['SECRET_KEY'], algorithms=['HS256'])
+        return int(payload['sub'])
+    except (jwt.InvalidTokenError, KeyError, TypeError, ValueError):
+        raise HttpError(Unauthorized('Invalid access token.'))
+
+
+class GraphQLView(BaseGraphQLView):
+    """GraphQL view which parses and validates each distinct query
+    document once, caching it by its hash.
+
+    With ``GRAPHQL_PERSISTED_QUERIES`` enabled, clients may send
+    ``extensions: {"persistedQuery": {"sha256Hash": ...}}`` without
+    the query once the document is cached.
+
+    Before execution the document's cost is estimated by
+    :class:`.QueryCostAnalyzer`. Documents over ``GRAPHQL_MAX_COST``
+    or ``GRAPHQL_MAX_DEPTH`` are rejected. The cost is reported
+    under the response ``extensions``.
+
+    With ``GRAPHQL_INSTRUMENTATION`` enabled, SQL statements are profiled
+    per resolver and the request totals are logged. The profile is also
+    returned under ``extensions`` with ``GRAPHQL_INSTRUMENTATION_EXTENSIONS``.
+
+    With ``GRAPHQL_CONCURRENT_EXECUTION`` enabled, independent sibling
+    fields are resolved concurrently by :class:`.ThreadPoolExecutor`.
+
+    A JSON array of operations is executed in order in one request,
+    sharing the DB session and the loader cache, and answered with
+    an array of results. Batches are limited to ``GRAPHQL_MAX_BATCH_SIZE``.
+    """
+
+    request_context = None
+
+    def get_context(self, request):
+        if self.context is not None:
+            return self.context
+        # Views are instantiated per request, so operations of
+        # a batch share the context.
+        if self.request_context is None:
+            self.request_context = Context(
+                request, self.get_executor(request), get_viewer_id(request))
+        return self.request_context
+
+    def get_executor(self, request):
+        if self.executor is not None:
+            return self.executor
+        if current_app.config['GRAPHQL_CONCURRENT_EXECUTION']:
+            return ThreadPoolExecutor()
+        return None
+
+    def get_middleware(self, request):
+        middleware = list(self.middleware or [])
+        if current_app.config['GRAPHQL_INSTRUMENTATION']:
+            middleware.append(InstrumentationMiddleware())
+        return middleware
+
+    def get_document_cache(self):
+        cache = current_app.extensions.get('graphql_documents')
+        if cache is None:
+            cache = DocumentCache(
+                self.schema, current_app.config['GRAPHQL_DOCUMENT_CACHE_SIZE'])
+            current_app.extensions['graphql_documents'] = cache
+        return cache
+
+    @staticmethod
+    def get_persisted_hash(data):
+        extensions = request.args.get('extensions') or data.get('extensions')
+
+        if extensions and isinstance(extensions, str):
+            try:
+                extensions = json.loads(extensions)
+            except ValueError:
+                raise HttpError(BadRequest('Extensions are invalid JSON.'))
+
+        try:
+            return extensions['persistedQuery']['sha256Hash']
+        except (KeyError, TypeError):
+            return None
+
+    def get_document(self, data, query):
+        cache = self.get_document_cache()
+        key = None
+
+        if current_app.config['GRAPHQL_PERSISTED_QUERIES']:
+            key = self.get_persisted_hash(data)
+
+        if key is not None and not query:
+            document = cache.get(key)
+            if document is None:
+                raise GraphQLError('PersistedQueryNotFound')
+            return document
+
+        if key is not None and key != document_hash(query):
+            raise GraphQLError('Provided sha256Hash does not match query.')
+        return cache.parse(query, key)
+
+    def analyze_cost(self, ast, operation_name, variables):
+        config = current_app.config
+        analyzer = QueryCostAnalyzer(
+            self.schema, config['GRAPHQL_COST_DEFAULT_LIMIT'])
+        cost, depth = analyzer.analyze(ast, operation_name, variables)
+
+        extensions = {
+            'cost': {
+                'requested': cost,
+                'depth': depth,
+                'maxCost': config['GRAPHQL_MAX_COST'],
+                'maxDepth': config['GRAPHQL_MAX_DEPTH'],
+            }
+        }
+        errors = []
+        if cost > config['GRAPHQL_MAX_COST']:
+            errors.append(GraphQLError(
+                'Query cost {} exceeds the maximum cost of {}.'.format(
+                    cost, config['GRAPHQL_MAX_COST'])
+            ))
+        if depth > config['GRAPHQL_MAX_DEPTH']:
+            errors.append(GraphQLError(
+                'Query depth {} exceeds the maximum depth of {}.'.format(
+                    depth, config['GRAPHQL_MAX_DEPTH'])
+            ))
+        return extensions, errors
+
+    def parse_body(self, request):
+        if self.get_content_type(request) != 'application/json':
+            return super().parse_body(request)
+
+        try:
+            data = json.loads(request.data.decode('utf8'))
+            assert isinstance(data, (dict, list))
+            return data
+        except Exception:
+            raise HttpError(BadRequest('POST body sent invalid JSON.'))
+
+    @classmethod
+    def can_display_graphiql(cls, data):
+        return (
+            isinstance(data, dict) and
+            super().can_display_graphiql(data)
+        )
+
+    def get_response(self, request, data, show_graphiql=False):
+        if not isinstance(data, list):
+            response, status_code = self.get_result(
+                request, data, show_graphiql)
+            if response is None:
+                return None, status_code
+            return (
+                self.json_encode(request, response, show_graphiql),
+                status_code
+            )
+
+        max_size = current_app.config['GRAPHQL_MAX_BATCH_SIZE']
+        if not data or len(data) > max_size:
+            raise HttpError(BadRequest(
+                'Batches must have 1 to {} operations.'.format(max_size)))
+        if not all(isinstance(entry, dict) for entry in data):
+            raise HttpError(BadRequest('Batch operations must be objects.'))
+
+        results = [self.get_result(request, entry) for entry in data]
+        return (
+            self.json_encode(request, [r[0] for r in results]),
+            max(r[1] for r in results)
+        )
+
+    def get_result(self, request, data, show_graphiql=False):
+        """Execute one operation.
+
+        :return: The response dict, or None, and the status code.
+        """
+        query, variables, operation_name, id = self.get_graphql_params(
+            request, data)
+
+        execution_result = self.execute_graphql_request(
+            data,
+            query,
+            variables,
+            operation_name,
+            show_graphiql
+        )
+
+        status_code = 200
+        if execution_result:
+            response = {}
+
+            if execution_result.errors:
+                response['errors'] = [
+                    self.format_error(e) for e in execution_result.errors
+                ]
+
+            if execution_result.invalid:
+                status_code = 400
+            else:
+                status_code = 200
+                response['data'] = execution_result.data
+
+            if getattr(execution_result, 'extensions', None):
+                response['extensions'] = execution_result.extensions
+        else:
+            response = None
+
+        return response, status_code
+
+    def execute_graphql_request(self, data, query, variables, operation_name,
+                                show_graphiql=False):
+        persisted = (
+            current_app.config['GRAPHQL_PERSISTED_QUERIES'] and
+            self.get_persisted_hash(data) is not None
+        )
+        if not query and not persisted:
+            if show_graphiql:
+                return None
+            raise HttpError(BadRequest('Must provide query string.'))
+
+        try:
+            ast, validation_errors = self.get_document(data, query)
+            if validation_errors:
+                return ExecutionResult(
+                    errors=validation_errors,
+                    invalid=True,
+                )
+        except Exception as e:
+            return ExecutionResult(errors=[e], invalid=True)
+
+        extensions, cost_errors = self.analyze_cost(
+            ast, operation_name, variables)
+        if cost_errors:
+            return ExecutionResult(
+                errors=cost_errors,
+                invalid=True,
+                extensions=extensions
+            )
+
+        if request.method.lower() == 'get':
+            operation_ast = get_operation_ast(ast, operation_name)
+            if operation_ast and operation_ast.operation != 'query':
+                if show_graphiql:
+                    return None
+                raise HttpError(MethodNotAllowed(
+                    ['POST'],
+                    'Can only perform a {} operation from a POST request.'.
+                    format(operation_ast.operation)
+                ))
+
+        if current_app.config['GRAPHQL_INSTRUMENTATION']:
+            with profiling() as profile:
+                result = self.execute_document(ast, variables, operation_name)
+            log_profile(profile, operation_name)
+            if current_app.config['GRAPHQL_INSTRUMENTATION_EXTENSIONS']:
+                extensions['sql'] = profile.summary()
+        else:
+            result = self.execute_document(ast, variables, operation_name)
+
+        return ExecutionResult(
+            data=result.data,
+            errors=result.errors,
+            invalid=result.invalid,
+            extensions=extensions
+        )
+
+    def execute_document(self, ast, variables, operation_name):
+        context = self.get_context(request)
+        try:
+            return self.execute(
+                ast,
+                root_value=self.get_root_value(request),
+                variable_values=variables or {},
+                operation_name=operation_name,
+                context_value=context,
+                middleware=self.get_middleware(request),
+                executor=getattr(context, 'executor', None)
+            )
+        except Exception as e:
+            return ExecutionResult(errors=[e], invalid=True)
@@ -11,11 +11,44 @@ class BaseConfig:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SQLALCHEMY_ECHO = False
     BCRYPT_LOG_ROUNDS = 4
+    GRAPHQL_DOCUMENT_CACHE_SIZE = 128
+    GRAPHQL_PERSISTED_QUERIES = True
+    GRAPHQL_COST_DEFAULT_LIMIT = 100
+    GRAPHQL_MAX_COST = 50000
+    GRAPHQL_MAX_DEPTH = 15
+    GRAPHQL_INSTRUMENTATION = False
+    GRAPHQL_INSTRUMENTATION_EXTENSIONS = False
+    GRAPHQL_CONCURRENT_EXECUTION = False
+    GRAPHQL_EXECUTOR_WORKERS = 4
+    GRAPHQL_MAX_BATCH_SIZE = 10
+    GRAPHQL_MAX_BULK_SIZE = 500
+    # 'memory', 'sqlite' or None. Invalidation only reaches all worker
+    # processes of the host through the shared 'sqlite' backend, entries
+    # in other processes' 'memory' backends live until their TTL.
+    NODE_CACHE_BACKEND = 'memory'
+    NODE_CACHE_PATH = os.getenv('NODE_CACHE_PATH', '/tmp/sns-node-cache.db')
+    NODE_CACHE_SIZE = 10000
+    NODE_CACHE_TTL = 300
+    FRIEND_GRAPH_ENABLED = False
+    FRIEND_GRAPH_TTL = 600
+    FRIEND_GRAPH_MAX_DELTAS = 1000
+    SNOOZE_SWEEP_INTERVAL = None  # seconds, None disables the thread
+    SNOOZE_SWEEP_BATCH_SIZE = 1000
+    TIMELINE_FANOUT_INTERVAL = None  # seconds, None disables the thread
+    TIMELINE_FANOUT_BATCH_SIZE = 1000
+    FEED_FANOUT_THRESHOLD = 10000  # followers, merged on read from here
+    FEED_RECENT_POSTS_SIZE = 200
+    FEED_RECENT_POSTS_TTL = 60
+    COUNTER_SHARDS = 16  # rows per post and comment counter
+    COMMENT_THREAD_MAX_DEPTH = 5
+    COMMENT_THREAD_MAX_REPLIES = 50
 
 
 class DevelopmentConfig(BaseConfig):
     DEBUG = True
     DEBUG_TB_ENABLED = True
+    GRAPHQL_INSTRUMENTATION = True
+    GRAPHQL_INSTRUMENTATION_EXTENSIONS = True
 
 
 class TestingConfig(BaseConfig):
@@ -23,11 +56,14 @@ class TestingConfig(BaseConfig):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_TEST_URL')
     SQLALCHEMY_ECHO = 'debug'
+    NODE_CACHE_BACKEND = None
 
 
 class StagingConfig(BaseConfig):
     BCRYPT_LOG_ROUNDS = 12
+    NODE_CACHE_BACKEND = 'sqlite'
 
 
 class ProductionConfig(BaseConfig):
     BCRYPT_LOG_ROUNDS = 12
+    NODE_CACHE_BACKEND = 'sqlite'
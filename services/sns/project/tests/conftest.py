@@ -1,8 +1,11 @@
 import pytest
 
 from project import create_app, db as database
+from project.api.models.comment import Comment
 from project.api.models.enums import Gender
+from project.api.models.post import Post
 from project.api.models.user import User
+from project.api.view import Context
 
 
 @pytest.fixture(scope='session')
@@ -68,3 +71,69 @@ def setup(db):
     ]
     db.session.bulk_insert_mappings(User, users)
     db.session.commit()
+
+
+@pytest.fixture
+def viewer_context():
+    """Return a function building the execution context of a request
+    by the viewer, or by nobody without a viewer ID.
+    """
+
+    def context(viewer_id=None):
+        return Context(None, viewer_id=viewer_id)
+
+    return context
+
+
+@pytest.fixture
+def add_post(db):
+    """Return a function adding a post of the author."""
+
+    def add(author_id=1, content='hello', created=None):
+        post = Post(content, created=created)
+        post.author_id = author_id
+        db.session.add(post)
+        db.session.commit()
+        return post
+
+    return add
+
+
+@pytest.fixture
+def add_comment(db):
+    """Return a function adding a comment of the author on the post,
+    replying to the root comment if any.
+    """
+
+    def add(author_id=1, content='hi', post=None, root=None, created=None):
+        comment = Comment(content, created=created)
+        comment.author_id = author_id
+        comment.post_id = post and post.id
+        comment.root_comment_id = root and root.id
+        db.session.add(comment)
+        db.session.commit()
+        return comment
+
+    return add
+
+
+@pytest.fixture
+def collect_pages():
+    """Return a function fetching every page of a GraphQL connection,
+    following ``endCursor`` while ``hasNextPage``.
+
+    The function takes a function of the ``after`` cursor returning
+    the connection of the page, and returns the list of connections.
+    """
+
+    def collect(fetch):
+        pages = []
+        after = None
+        while True:
+            connection = fetch(after)
+            pages.append(connection)
+            if not connection['pageInfo']['hasNextPage']:
+                return pages
+            after = connection['pageInfo']['endCursor']
+
+    return collect
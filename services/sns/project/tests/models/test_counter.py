@@ -0,0 +1,66 @@
+from project.api.models.comment import CommentReaction
+from project.api.models.counter import CommentCounter, PostCounter
+from project.api.models.enums import Reaction
+from project.api.models.post import PostReaction
+from project.api.models.user import User
+
+
+class TestCounterModels:
+    def test_post_reactions_update_counters(self, setup, db, add_post):
+        post = add_post()
+        db.session.add_all([
+            PostReaction(User.query.get(2), post, Reaction.LIKE),
+            PostReaction(User.query.get(3), post, Reaction.LIKE),
+            PostReaction(User.query.get(4), post, Reaction.LOVE),
+        ])
+        db.session.commit()
+
+        totals = PostCounter.totals([post.id])[post.id]
+        assert totals['like_count'] == 2
+        assert totals['love_count'] == 1
+        # Reactions of different users are counted in different shards.
+        assert PostCounter.query.count() == 3
+
+        reaction = PostReaction.query.get((3, post.id))
+        reaction.reaction = Reaction.WOW
+        db.session.delete(PostReaction.query.get((2, post.id)))
+        db.session.commit()
+
+        totals = PostCounter.totals([post.id])[post.id]
+        assert totals['like_count'] == 0
+        assert totals['love_count'] == 1
+        assert totals['wow_count'] == 1
+        assert PostCounter.totals([post.id + 1]) == {}
+
+    def test_comments_update_counters(self, setup, db, add_post,
+                                      add_comment):
+        post = add_post()
+        comment = add_comment(2, post=post)
+        reply = add_comment(3, post=post, root=comment)
+        db.session.add(
+            CommentReaction(User.query.get(1), comment, Reaction.LAUGH))
+        db.session.commit()
+
+        assert PostCounter.totals([post.id])[post.id]['comment_count'] == 2
+        totals = CommentCounter.totals([comment.id])[comment.id]
+        assert totals['reply_count'] == 1
+        assert totals['laugh_count'] == 1
+
+        db.session.delete(reply)
+        db.session.commit()
+        assert PostCounter.totals([post.id])[post.id]['comment_count'] == 1
+        assert CommentCounter.totals(
+            [comment.id])[comment.id]['reply_count'] == 0
+
+    def test_deleted_post_deletes_counters(self, setup, db, add_post,
+                                           add_comment):
+        post = add_post()
+        comment = add_comment(2, post=post)
+        add_comment(3, post=post, root=comment)
+        db.session.add(PostReaction(User.query.get(2), post, Reaction.SAD))
+        db.session.commit()
+
+        db.session.delete(post)
+        db.session.commit()
+        assert PostCounter.query.count() == 0
+        assert CommentCounter.query.count() == 0
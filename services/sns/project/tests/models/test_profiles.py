@@ -0,0 +1,134 @@
+import re
+
+import pytest
+
+from sqlalchemy import event
+from sqlalchemy.exc import InvalidRequestError
+
+from project.api.models.comment import Comment, CommentReaction
+from project.api.models.enums import Reaction
+from project.api.models.photo import Photo, PhotoAlbum
+from project.api.models.post import Post, PostReaction
+from project.api.models.profiles import apply_profile, COUNT, DETAIL, LIST
+from project.api.models.user import User
+
+
+# Tables each profile joins, sorted.
+JOINS = {
+    Post: {
+        LIST: ['photos', 'users'],
+        DETAIL: ['photo_albums', 'photos', 'users'],
+    },
+    PostReaction: {
+        LIST: ['users'],
+        DETAIL: ['posts', 'users', 'users'],
+    },
+    Comment: {
+        LIST: ['users'],
+        DETAIL: ['posts', 'users', 'users'],
+    },
+    CommentReaction: {
+        LIST: ['users'],
+        DETAIL: ['comments', 'users', 'users'],
+    },
+    Photo: {
+        LIST: ['users'],
+        DETAIL: ['photo_albums', 'users'],
+    },
+    PhotoAlbum: {
+        LIST: ['photos'],
+        DETAIL: ['photos', 'users'],
+    },
+}
+
+
+def add_content(db):
+    rory, amy, doctor = User.query.filter(User.id.in_([1, 2, 3])). \
+        order_by(User.id).all()
+    album = PhotoAlbum('trip')
+    album.owner_id = rory.id
+    db.session.add(album)
+    db.session.commit()
+
+    photo = Photo('beach')
+    photo.url = 'beach.jpg'
+    photo.owner_id = rory.id
+    photo.album_id = album.id
+    post = Post('hello')
+    post.author_id = rory.id
+    post.photo = photo
+    db.session.add(post)
+    db.session.commit()
+    album.cover_photo_id = photo.id
+
+    comment = Comment('hi')
+    comment.author_id = amy.id
+    comment.post_id = post.id
+    db.session.add_all([
+        comment,
+        PostReaction(amy, post, Reaction.LIKE),
+        PostReaction(doctor, post, Reaction.WOW),
+        CommentReaction(doctor, comment, Reaction.LAUGH),
+    ])
+    db.session.commit()
+    db.session.expunge_all()
+
+
+def run(db, fn):
+    """Return the result of the function and the statements it ran."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        return fn(), statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def joins(statement):
+    return sorted(re.findall(r'JOIN (\w+)', statement))
+
+
+def test_no_eager_joins_by_default(setup, db):
+    add_content(db)
+    reactions, statements = run(db, PostReaction.query.all)
+    assert len(reactions) == 2
+    assert [joins(s) for s in statements] == [[]]
+
+    post, statements = run(db, lambda: reactions[0].post)
+    assert post.content == 'hello'
+    assert [joins(s) for s in statements] == [[]]
+
+
+def test_list_and_detail_profiles(setup, db):
+    add_content(db)
+    for model, profiles in JOINS.items():
+        for profile, tables in profiles.items():
+            db.session.expunge_all()
+            query = apply_profile(model.query, model, profile)
+            rows, statements = run(db, query.all)
+            assert rows, model
+            assert [joins(s) for s in statements] == [tables], \
+                (model, profile)
+
+
+def test_count_profile(setup, db):
+    add_content(db)
+    query = apply_profile(PostReaction.query, PostReaction, COUNT)
+    reactions, statements = run(db, query.all)
+    assert len(reactions) == 2
+    assert len(statements) == 1
+    assert joins(statements[0]) == []
+    assert 'post_reactions.reaction' not in statements[0]
+
+    with pytest.raises(InvalidRequestError):
+        reactions[0].post
+
+
+def test_unknown_profile(db):
+    with pytest.raises(Exception) as e:
+        apply_profile(Post.query, Post, 'grid')
+    assert str(e.value) == "Unknown loader profile 'grid'."
@@ -4,7 +4,12 @@ import pytest
 
 from sqlalchemy.orm.query import Query
 
-from project.api.models.user import Follower, Friendship, User
+from project.api.models.user import (
+    Follower,
+    Friendship,
+    FriendshipEdge,
+    User,
+)
 from project.api.models.enums import FriendshipState
 
 
@@ -15,20 +20,16 @@ class TestFriendshipModel:
     def test_friendship_get_returns_query(self, db):
         assert isinstance(Friendship.get(1, 2), Query)
 
-    def test_friendship_build(self, setup, db):
-        db.session.add_all(Friendship.build(1, 2, 1, ACCEPTED))
+    def test_friendship_build_canonical_row(self, setup, db):
+        db.session.add_all(Friendship.build(2, 1, 2, ACCEPTED))
         db.session.commit()
 
         data = Friendship.get(1, 2).all()
+        assert len(data) == 1
         assert data[0].left_user_id == 1
         assert data[0].right_user_id == 2
-
-        assert data[1].left_user_id == 2
-        assert data[1].right_user_id == 1
-
-        for i in range(2):
-            assert data[i].action_user_id == 1
-            assert data[i].state == ACCEPTED
+        assert data[0].action_user_id == 2
+        assert data[0].state == ACCEPTED
 
     def test_friendship_update(self, setup, db):
         data = Friendship.build(1, 2, 1, ACCEPTED)
@@ -38,20 +39,29 @@ class TestFriendshipModel:
         Friendship.update(data, 2, BLOCKED)
         db.session.commit()
 
-        data = Friendship.get(1, 2).all()
-        for i in range(2):
-            assert data[i].action_user_id == 2
-            assert data[i].state == BLOCKED
+        data = Friendship.get(2, 1).one()
+        assert data.action_user_id == 2
+        assert data.state == BLOCKED
 
-    def test_friendship_delete_returns_2(self, setup, db):
+    def test_friendship_delete_returns_1(self, setup, db):
         db.session.add_all(Friendship.build(1, 2, 1, ACCEPTED))
         db.session.commit()
-        assert Friendship.delete(1, 2) == 2
+        assert Friendship.delete(2, 1) == 1
+
+    def test_friendship_edges_both_directions(self, setup, db):
+        db.session.add_all(Friendship.build(3, 1, 3, ACCEPTED))
+        db.session.commit()
+
+        edges = FriendshipEdge.query.order_by(
+            FriendshipEdge.left_user_id).all()
+        assert [(e.left_user_id, e.right_user_id) for e in edges] == \
+            [(1, 3), (3, 1)]
+        assert all(e.action_user_id == 3 for e in edges)
 
     def test_friendship_ondelete_cascade(self, setup, db):
         db.session.add_all(Friendship.build(1, 2, 3, SUGGESTED))
         db.session.commit()
-        assert Friendship.get(1, 2).count() == 2
+        assert Friendship.get(1, 2).count() == 1
 
         User.query.filter_by(id=3).delete(synchronize_session=False)
         db.session.commit()
@@ -152,7 +162,19 @@ class TestUserModel:
         doctor = User.query.get(3)
         db.session.add_all(doctor.suggest(4, 5))
         db.session.commit()
-        assert Friendship.get(4, 5).filter_by(state=SUGGESTED).count() == 2
+        assert Friendship.get(4, 5).filter_by(state=SUGGESTED).count() == 1
+
+    def test_user_friends_of_friends(self, db):
+        db.session.add_all(Friendship.build(1, 2, 1, ACCEPTED))
+        db.session.add_all(Friendship.build(1, 3, 1, ACCEPTED))
+        db.session.add_all(Friendship.build(2, 4, 2, ACCEPTED))
+        db.session.add_all(Friendship.build(3, 4, 3, ACCEPTED))
+        db.session.add_all(Friendship.build(3, 5, 3, ACCEPTED))
+        db.session.commit()
+
+        rory = User.query.get(1)
+        assert rory.friends_of_friends() == [(4, 2), (5, 1)]
+        assert rory.friend_count() == 2
 
     def test_user_suggest_fails(self, db):
         bill = User.query.get(4)
@@ -162,7 +184,7 @@ class TestUserModel:
         song = User.query.get(5)
         db.session.add_all(song.send_friend_request(1))
         db.session.commit()
-        assert Friendship.get(1, 5).filter_by(state=PENDING).count() == 2
+        assert Friendship.get(1, 5).filter_by(state=PENDING).count() == 1
 
     def test_user_send_friend_request_update_from_suggested_friendship_passes(
             self, db):
@@ -172,7 +194,7 @@ class TestUserModel:
         rory = User.query.get(1)
         rory.send_friend_request(3)
         db.session.commit()
-        assert Friendship.get(1, 3).filter_by(state=PENDING).count() == 2
+        assert Friendship.get(1, 3).filter_by(state=PENDING).count() == 1
 
     def test_user_send_friend_request_fails(self, db):
         db.session.add_all(Friendship.build(2, 3, 2, BLOCKED))
@@ -188,7 +210,7 @@ class TestUserModel:
         doctor = User.query.get(3)
         doctor.accept(4)
         db.session.commit()
-        assert Friendship.get(3, 4).filter_by(state=ACCEPTED).count() == 2
+        assert Friendship.get(3, 4).filter_by(state=ACCEPTED).count() == 1
 
     def test_user_accept_same_user_policy_fails(self, db):
         """Send friend request or accept, people can do only one at a time,
@@ -211,7 +233,7 @@ class TestUserModel:
         bill = User.query.get(4)
         db.session.add_all(bill.block(5))
         db.session.commit()
-        assert Friendship.get(4, 5).filter_by(state=BLOCKED).count() == 2
+        assert Friendship.get(4, 5).filter_by(state=BLOCKED).count() == 1
 
     def test_user_block_friend_passes(self, db):
         db.session.add_all(Friendship.build(4, 5, 4, ACCEPTED))
@@ -220,7 +242,7 @@ class TestUserModel:
         bill = User.query.get(4)
         bill.block(5)
         db.session.commit()
-        assert Friendship.get(4, 5).filter_by(state=BLOCKED).count() == 2
+        assert Friendship.get(4, 5).filter_by(state=BLOCKED).count() == 1
 
     def test_user_block_already_blocked_user_fails(self, db):
         db.session.add_all(Friendship.build(5, 1, 5, BLOCKED))
@@ -377,7 +399,7 @@ class TestUserModel:
         db.session.add(Follower(follower_id=4, followed_id=2))
         db.session.commit()
 
-        assert Friendship.query.count() == 4
+        assert Friendship.query.count() == 2
         assert Follower.query.count() == 4
 
         User.query.filter_by(id=2).delete(synchronize_session=False)
@@ -385,3 +407,69 @@ class TestUserModel:
 
         assert Friendship.query.count() == 0
         assert Follower.query.count() == 0
+
+    def test_user_accept_many(self, db):
+        db.session.add_all(Friendship.build(2, 1, 2, PENDING))
+        db.session.add_all(Friendship.build(3, 1, 1, PENDING))
+        db.session.add_all(Friendship.build(4, 1, 4, ACCEPTED))
+        db.session.commit()
+
+        rory = User.query.get(1)
+        outcomes = rory.accept_many([2, 3, 4, 5, 1, 99])
+        db.session.commit()
+
+        assert outcomes == {
+            2: None,
+            3: 'cannot accept own friend request',
+            4: 'no pending friend request',
+            5: 'no pending friend request',
+            1: 'cannot act on yourself',
+            99: 'user with the given ID does not exist',
+        }
+        assert Friendship.get(1, 2).one().state == ACCEPTED
+        assert Friendship.get(1, 2).one().action_user_id == 1
+        assert Friendship.get(1, 3).one().state == PENDING
+
+    def test_user_decline_and_cancel_many(self, db):
+        db.session.add_all(Friendship.build(2, 1, 2, PENDING))
+        db.session.add_all(Friendship.build(3, 1, 1, PENDING))
+        db.session.add_all(Friendship.build(4, 1, 4, PENDING))
+        db.session.commit()
+
+        rory = User.query.get(1)
+        assert rory.decline_many([2, 3]) == {
+            2: None, 3: 'no received friend request'}
+        assert rory.cancel_many([3, 4]) == {
+            3: None, 4: 'no sent friend request'}
+        db.session.commit()
+
+        assert Friendship.query.count() == 1
+        assert Friendship.get(1, 4).one().state == PENDING
+
+    def test_user_block_many(self, db):
+        db.session.add_all(Friendship.build(1, 2, 1, ACCEPTED))
+        db.session.add_all(Friendship.build(1, 3, 3, BLOCKED))
+        db.session.commit()
+
+        rory = User.query.get(1)
+        outcomes = rory.block_many([2, 3, 4])
+        db.session.commit()
+
+        assert outcomes == {2: None, 3: 'already blocked', 4: None}
+        assert Friendship.get(1, 2).one().state == BLOCKED
+        assert Friendship.get(1, 3).one().action_user_id == 3
+        assert Friendship.get(1, 4).one().state == BLOCKED
+        assert Friendship.get(1, 4).one().action_user_id == 1
+
+    def test_user_unfollow_many(self, db):
+        db.session.add(Follower(follower_id=1, followed_id=2))
+        db.session.add(Follower(follower_id=1, followed_id=3))
+        db.session.add(Follower(follower_id=2, followed_id=4))
+        db.session.commit()
+
+        rory = User.query.get(1)
+        outcomes = rory.unfollow_many([2, 3, 4])
+        db.session.commit()
+
+        assert outcomes == {2: None, 3: None, 4: 'not following'}
+        assert Follower.query.count() == 1
@@ -0,0 +1,283 @@
+from datetime import datetime, timedelta
+
+from graphene import test
+from graphql_relay import to_global_id
+
+from project.api.jobs import fan_out_posts, refresh_high_degree_authors
+from project.api.models.enums import Reaction
+from project.api.models.post import PostReaction
+from project.api.models.timeline import TimelineEntry
+from project.api.models.user import Follower, User
+from project.api.schemas import schema
+
+
+client = test.Client(schema)
+
+
+QUERY = '''
+    query Feed($after: String) {
+      feed(first: 2, after: $after) {
+        pageInfo {
+          hasNextPage
+          endCursor
+        }
+        edges {
+          node {
+            content
+            author {
+              name
+            }
+          }
+        }
+      }
+    }
+'''
+
+
+def fetch_feed(context):
+    """Return a function fetching the page of the feed after a cursor."""
+
+    def fetch(after):
+        rv = client.execute(
+            QUERY, variable_values={'after': after}, context_value=context)
+        return rv['data']['feed']
+
+    return fetch
+
+
+def test_feed_keyset_pagination(setup, db, add_post, viewer_context,
+                                collect_pages):
+    db.session.add(Follower(follower_id=1, followed_id=2))
+    db.session.add(Follower(follower_id=1, followed_id=3))
+    db.session.commit()
+    now = datetime.utcnow()
+    for i, (author_id, content) in enumerate([
+        (2, 'first'), (3, 'second'), (4, 'unfollowed'), (1, 'third'),
+    ]):
+        add_post(author_id, content, now + timedelta(minutes=i))
+    fan_out_posts()
+
+    pages = collect_pages(fetch_feed(viewer_context(1)))
+    assert [
+        [(e['node']['content'], e['node']['author']['name'])
+         for e in page['edges']]
+        for page in pages
+    ] == [
+        [('third', 'rory williams'), ('second', 'doctor who')],
+        [('first', 'amy pond')],
+    ]
+
+
+def test_feed_merges_high_degree_authors(setup, db, app, add_post,
+                                         viewer_context, collect_pages):
+    app.extensions.pop('recent_posts', None)
+    db.session.add_all([
+        Follower(follower_id=1, followed_id=2),
+        Follower(follower_id=1, followed_id=4),
+        Follower(follower_id=3, followed_id=4),
+        Follower(follower_id=5, followed_id=4),
+    ])
+    db.session.commit()
+    assert refresh_high_degree_authors(threshold=3) == 1
+
+    now = datetime.utcnow()
+    for i, (author_id, content) in enumerate([
+        (2, 'first'), (4, 'second'), (4, 'third'), (1, 'fourth'),
+    ]):
+        add_post(author_id, content, now + timedelta(minutes=i))
+    fan_out_posts()
+
+    # Posts of the high-degree author are not fanned out.
+    assert TimelineEntry.query.filter_by(author_id=4).count() == 2
+    assert TimelineEntry.query.filter_by(user_id=1).count() == 2
+
+    pages = collect_pages(fetch_feed(viewer_context(1)))
+    assert [
+        [e['node']['content'] for e in page['edges']] for page in pages
+    ] == [['fourth', 'third'], ['second', 'first']]
+
+
+def test_feed_invalidates_recent_posts_on_publish(setup, db, app, add_post,
+                                                  viewer_context):
+    app.extensions.pop('recent_posts', None)
+    db.session.add_all([
+        Follower(follower_id=1, followed_id=4),
+        Follower(follower_id=3, followed_id=4),
+    ])
+    db.session.commit()
+    assert refresh_high_degree_authors(threshold=2) == 1
+
+    now = datetime.utcnow()
+    add_post(4, 'first', now)
+    fetch = fetch_feed(viewer_context(1))
+    assert [e['node']['content'] for e in fetch(None)['edges']] == ['first']
+
+    add_post(4, 'second', now + timedelta(minutes=1))
+    assert [e['node']['content'] for e in fetch(None)['edges']] == [
+        'second', 'first']
+
+
+def test_feed_drops_unfollowed_and_snoozed_authors(setup, db, add_post,
+                                                   viewer_context):
+    db.session.add_all([
+        Follower(follower_id=1, followed_id=2),
+        Follower(follower_id=1, followed_id=3),
+        Follower(follower_id=1, followed_id=4),
+    ])
+    db.session.commit()
+    for author_id in (2, 3, 4):
+        add_post(author_id, f'post {author_id}')
+    fan_out_posts()
+
+    rory = User.query.get(1)
+    rory.unfollow(2)
+    rory.unfollow_many([3])
+    rory.snooze(4)
+    db.session.commit()
+
+    assert TimelineEntry.query.filter_by(user_id=1).count() == 0
+    rv = client.execute(QUERY, context_value=viewer_context(1))
+    assert rv['data']['feed']['edges'] == []
+
+
+def test_feed_without_viewer(setup, viewer_context):
+    rv = client.execute(QUERY, context_value=viewer_context())
+    assert rv['data']['feed'] is None
+    assert rv['errors'][0]['message'] == 'Authentication required.'
+
+
+def test_post_counts(setup, db, add_post, add_comment, viewer_context):
+    p = add_post()
+    for author_id in (2, 3):
+        add_comment(author_id, post=p)
+    db.session.add_all([
+        PostReaction(User.query.get(2), p, Reaction.LIKE),
+        PostReaction(User.query.get(3), p, Reaction.LIKE),
+        PostReaction(User.query.get(4), p, Reaction.LOVE),
+    ])
+    db.session.commit()
+
+    rv = client.execute(
+        '''
+        query Post($id: ID!) {
+          post(id: $id) {
+            commentCount
+            reactionCounts {
+              reaction
+              count
+            }
+          }
+        }
+        ''',
+        variable_values={'id': to_global_id('PostType', p.id)},
+        context_value=viewer_context()
+    )
+    assert rv['data']['post'] == {
+        'commentCount': 2,
+        'reactionCounts': [
+            {'reaction': 'LIKE', 'count': 2},
+            {'reaction': 'LOVE', 'count': 1},
+        ],
+    }
+
+
+def test_post_comments(setup, db, add_post, add_comment, viewer_context):
+    p = add_post()
+    now = datetime.utcnow()
+    comments = []
+    for i, (content, root) in enumerate([
+        ('first', None), ('second', None), ('reply', 0), ('another', 0),
+    ]):
+        comments.append(add_comment(
+            2, content, post=p,
+            root=None if root is None else comments[root],
+            created=now + timedelta(minutes=i)
+        ))
+
+    query = '''
+        query Comments($id: ID!, $depth: Int) {
+          post(id: $id) {
+            comments(first: 1, depth: $depth, replies: 1) {
+              totalCount
+              pageInfo {
+                hasNextPage
+              }
+              edges {
+                node {
+                  content
+                  replyCount
+                  replies {
+                    content
+                  }
+                }
+              }
+            }
+          }
+        }
+    '''
+    id = to_global_id('PostType', p.id)
+    rv = client.execute(
+        query, variable_values={'id': id}, context_value=viewer_context())
+    assert rv['data']['post']['comments'] == {
+        'totalCount': 2,
+        'pageInfo': {'hasNextPage': True},
+        'edges': [{
+            'node': {
+                'content': 'first',
+                'replyCount': 2,
+                'replies': [{'content': 'reply'}],
+            },
+        }],
+    }
+
+    rv = client.execute(
+        query, variable_values={'id': id, 'depth': 100},
+        context_value=viewer_context()
+    )
+    assert rv['errors'][0]['message'] == 'Depth must be between 0 and 5.'
+
+
+def test_search(setup, add_post, add_comment, viewer_context):
+    for content in ('fox', 'the fox and the dog'):
+        add_post(1, content)
+    add_comment(2, 'no foxes here')
+
+    query = '''
+        query Search($query: String!) {
+          search(query: $query, first: 2) {
+            totalCount
+            pageInfo {
+              hasNextPage
+            }
+            edges {
+              node {
+                __typename
+                ... on PostType {
+                  content
+                }
+                ... on CommentType {
+                  content
+                  author {
+                    name
+                  }
+                }
+              }
+            }
+          }
+        }
+    '''
+    rv = client.execute(
+        query, variable_values={'query': 'foxes'},
+        context_value=viewer_context()
+    )
+    search = rv['data']['search']
+    assert search['totalCount'] == 3
+    assert search['pageInfo']['hasNextPage']
+    assert [e['node']['__typename'] for e in search['edges']] == [
+        'PostType', 'PostType']
+
+    rv = client.execute(
+        query, variable_values={'query': '  '},
+        context_value=viewer_context()
+    )
+    assert rv['errors'][0]['message'] == 'Search query must not be empty.'
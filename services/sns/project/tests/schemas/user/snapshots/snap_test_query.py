@@ -93,19 +93,6 @@ snapshots['test_friend_requests 1'] = {
         'user': {
             'friendRequests': {
                 'edges': [
-                    {
-                        'node': {
-                            'from': {
-                                'id': 'VXNlclR5cGU6MQ==',
-                                'name': 'rory williams'
-                            },
-                            'id': 'RnJpZW5kUmVxdWVzdFR5cGU6KDEsIDMp',
-                            'to': {
-                                'id': 'VXNlclR5cGU6Mw==',
-                                'name': 'doctor who'
-                            }
-                        }
-                    },
                     {
                         'node': {
                             'from': {
@@ -131,6 +118,19 @@ snapshots['test_friend_requests 1'] = {
                                 'name': 'bill potts'
                             }
                         }
+                    },
+                    {
+                        'node': {
+                            'from': {
+                                'id': 'VXNlclR5cGU6MQ==',
+                                'name': 'rory williams'
+                            },
+                            'id': 'RnJpZW5kUmVxdWVzdFR5cGU6KDEsIDMp',
+                            'to': {
+                                'id': 'VXNlclR5cGU6Mw==',
+                                'name': 'doctor who'
+                            }
+                        }
                     }
                 ],
                 'totalCount': 3
@@ -149,18 +149,18 @@ snapshots['test_friend_suggestions 1'] = {
                     {
                         'node': {
                             'from': {
-                                'id': 'VXNlclR5cGU6Mw==',
-                                'name': 'doctor who'
+                                'id': 'VXNlclR5cGU6MQ==',
+                                'name': 'rory williams'
                             },
-                            'id': 'RnJpZW5kU3VnZ2VzdGlvblR5cGU6KDIsIDQsIDMp',
+                            'id': 'RnJpZW5kU3VnZ2VzdGlvblR5cGU6KDQsIDUsIDEp',
                             'to': [
-                                {
-                                    'id': 'VXNlclR5cGU6Mg==',
-                                    'name': 'amy pond'
-                                },
                                 {
                                     'id': 'VXNlclR5cGU6NA==',
                                     'name': 'bill potts'
+                                },
+                                {
+                                    'id': 'VXNlclR5cGU6NQ==',
+                                    'name': 'song river'
                                 }
                             ]
                         }
@@ -168,18 +168,18 @@ snapshots['test_friend_suggestions 1'] = {
                     {
                         'node': {
                             'from': {
-                                'id': 'VXNlclR5cGU6MQ==',
-                                'name': 'rory williams'
+                                'id': 'VXNlclR5cGU6Mw==',
+                                'name': 'doctor who'
                             },
-                            'id': 'RnJpZW5kU3VnZ2VzdGlvblR5cGU6KDQsIDUsIDEp',
+                            'id': 'RnJpZW5kU3VnZ2VzdGlvblR5cGU6KDIsIDQsIDMp',
                             'to': [
                                 {
-                                    'id': 'VXNlclR5cGU6NA==',
-                                    'name': 'bill potts'
+                                    'id': 'VXNlclR5cGU6Mg==',
+                                    'name': 'amy pond'
                                 },
                                 {
-                                    'id': 'VXNlclR5cGU6NQ==',
-                                    'name': 'song river'
+                                    'id': 'VXNlclR5cGU6NA==',
+                                    'name': 'bill potts'
                                 }
                             ]
                         }
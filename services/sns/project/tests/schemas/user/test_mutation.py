@@ -1,13 +1,19 @@
+import json
+
 from graphene import test
 from graphql_relay import to_global_id
+from sqlalchemy import event
 
-from project.api.models.user import User
+from project.api.models.enums import FriendshipState
+from project.api.models.user import Friendship, User
 from project.api.schemas import schema
 from project.api.schemas.user.query import UserType
 
 
 client = test.Client(schema)
 
+ACCEPTED, BLOCKED, PENDING, SUGGESTED = FriendshipState.__members__.values()
+
 
 def test__CreateUser__pass(db, snapshot):
     mutation = '''
@@ -189,3 +195,94 @@ def test__UpdateUser__fail_username_uniqueness(setup, db, snapshot):
         }
     '''
     snapshot.assert_match(client.execute(mutation, variable_values={'id': id}))
+
+
+BULK_ACCEPT = '''
+    mutation Accept($ids: [ID!]!) {
+      acceptFriendRequests(input: {userIds: $ids}) {
+        __typename
+        ... on BulkMutationSuccess {
+          outcomes {
+            userId
+            ok
+            error
+          }
+        }
+        ... on MutationError {
+          errors
+        }
+      }
+    }
+'''
+
+
+def test__AcceptFriendRequests__pass(setup, db, viewer_context):
+    db.session.add_all(Friendship.build(2, 1, 2, PENDING))
+    db.session.add_all(Friendship.build(3, 1, 3, PENDING))
+    db.session.commit()
+
+    ids = [to_global_id(UserType.__name__, id) for id in (2, 3, 4)]
+    rv = client.execute(
+        BULK_ACCEPT, variable_values={'ids': ids + ['invalid']},
+        context_value=viewer_context(1)
+    )
+
+    assert rv['data']['acceptFriendRequests']['outcomes'] == [
+        {'userId': ids[0], 'ok': True, 'error': None},
+        {'userId': ids[1], 'ok': True, 'error': None},
+        {'userId': ids[2], 'ok': False,
+         'error': 'no pending friend request'},
+        {'userId': 'invalid', 'ok': False, 'error': 'invalid ID'},
+    ]
+    assert Friendship.query.filter_by(state=ACCEPTED).count() == 2
+
+
+def test__AcceptFriendRequests__fail_without_viewer(setup, viewer_context):
+    rv = client.execute(
+        BULK_ACCEPT,
+        variable_values={'ids': [to_global_id(UserType.__name__, 2)]},
+        context_value=viewer_context()
+    )
+    assert rv['data']['acceptFriendRequests'] == {
+        '__typename': 'MutationError',
+        'errors': '{"viewer": "authentication required"}',
+    }
+
+
+def test__BlockUsers__fail_on_concurrent_change(setup, db, viewer_context):
+    mutation = '''
+        mutation Block($ids: [ID!]!) {
+          blockUsers(input: {userIds: $ids}) {
+            __typename
+            ... on MutationError {
+              errors
+            }
+          }
+        }
+    '''
+    inserted = []
+
+    def after_cursor_execute(conn, cursor, statement, *args):
+        # Another request befriends the users between check and insert.
+        if 'friendship_edges' in statement and not inserted:
+            inserted.append(True)
+            db.engine.execute(
+                'INSERT INTO friendships '
+                '(left_user_id, right_user_id, action_user_id, state) '
+                "VALUES (1, 2, 2, 'pending')"
+            )
+
+    event.listen(db.engine, 'after_cursor_execute', after_cursor_execute)
+    try:
+        rv = client.execute(
+            mutation,
+            variable_values={'ids': [to_global_id(UserType.__name__, 2)]},
+            context_value=viewer_context(1)
+        )
+    finally:
+        event.remove(db.engine, 'after_cursor_execute', after_cursor_execute)
+
+    payload = rv['data']['blockUsers']
+    assert payload['__typename'] == 'MutationError'
+    assert 'db' in json.loads(payload['errors'])
+    assert Friendship.query.filter_by(state=BLOCKED).count() == 0
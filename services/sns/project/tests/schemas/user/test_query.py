@@ -1,5 +1,6 @@
 from graphene import test
 from graphql_relay import to_global_id
+from sqlalchemy import event
 
 from project.api.models.enums import FriendshipState
 from project.api.models.user import Follower, Friendship
@@ -9,6 +10,7 @@ from project.api.schemas.user.query import UserType
 
 client = test.Client(schema)
 
+
 ACCEPTED, BLOCKED, PENDING, SUGGESTED = FriendshipState.__members__.values()
 
 
@@ -143,3 +145,270 @@ def test_friend_suggestions(setup, db, snapshot):
     '''
     id = to_global_id(UserType.__name__, 4)
     snapshot.assert_match(client.execute(query, variable_values={'id': id}))
+
+
+def test_friend_requests_direction_and_pagination(setup, db, collect_pages):
+    for id, action_user_id in [(1, 1), (2, 3), (4, 4), (5, 3)]:
+        db.session.add_all(Friendship.build(3, id, action_user_id, PENDING))
+        db.session.commit()
+
+    query = '''
+        query FriendRequests($id: ID!, $direction: ActionDirection,
+                             $after: String) {
+          user(id: $id) {
+            friendRequests(first: 1, direction: $direction, after: $after) {
+              totalCount
+              pageInfo {
+                hasNextPage
+                endCursor
+              }
+              edges {
+                node {
+                  from {
+                    name
+                  }
+                  to {
+                    name
+                  }
+                }
+              }
+            }
+          }
+        }
+    '''
+    id = to_global_id(UserType.__name__, 3)
+
+    def pages(direction):
+        def fetch(after):
+            rv = client.execute(query, variable_values={
+                'id': id, 'direction': direction, 'after': after})
+            return rv['data']['user']['friendRequests']
+
+        return [
+            (requests['totalCount'], [
+                (e['node']['from']['name'], e['node']['to']['name'])
+                for e in requests['edges']
+            ])
+            for requests in collect_pages(fetch)
+        ]
+
+    # Latest first.
+    assert pages('INBOX') == [
+        (2, [('bill potts', 'doctor who')]),
+        (2, [('rory williams', 'doctor who')]),
+    ]
+    assert pages('OUTBOX') == [
+        (2, [('doctor who', 'song river')]),
+        (2, [('doctor who', 'amy pond')]),
+    ]
+    assert [page for count, page in pages('ALL')] == [
+        [('doctor who', 'song river')],
+        [('bill potts', 'doctor who')],
+        [('doctor who', 'amy pond')],
+        [('rory williams', 'doctor who')],
+    ]
+
+
+def test_friend_suggestions_keyset_pagination(setup, db, collect_pages):
+    # Received, received, made and unrelated suggestions of bill.
+    for args in [(4, 5, 1), (2, 4, 3), (1, 5, 4), (1, 2, 3)]:
+        db.session.add_all(Friendship.build(*args, SUGGESTED))
+        db.session.commit()
+
+    query = '''
+        query FriendSuggestions($id: ID!, $after: String) {
+          user(id: $id) {
+            friendSuggestions(first: 2, after: $after) {
+              totalCount
+              pageInfo {
+                hasNextPage
+                endCursor
+              }
+              edges {
+                node {
+                  from {
+                    name
+                  }
+                }
+              }
+            }
+          }
+        }
+    '''
+    id = to_global_id(UserType.__name__, 4)
+
+    def fetch(after):
+        rv = client.execute(query, variable_values={'id': id, 'after': after})
+        return rv['data']['user']['friendSuggestions']
+
+    pages = collect_pages(fetch)
+    assert [p['totalCount'] for p in pages] == [3, 3]
+    assert [
+        [e['node']['from']['name'] for e in p['edges']] for p in pages
+    ] == [['bill potts', 'doctor who'], ['rory williams']]
+
+
+def test_friends_keyset_pagination(setup, db, collect_pages):
+    for id in [3, 4, 5, 1]:
+        db.session.add_all(Friendship.build(2, id, 2, ACCEPTED))
+        db.session.commit()
+
+    query = '''
+        query Friends($id: ID!, $after: String) {
+          user(id: $id) {
+            friends(first: 2, after: $after) {
+              totalCount
+              pageInfo {
+                hasNextPage
+                endCursor
+              }
+              edges {
+                node {
+                  name
+                }
+              }
+            }
+          }
+        }
+    '''
+    id = to_global_id(UserType.__name__, 2)
+
+    def fetch(after):
+        rv = client.execute(query, variable_values={'id': id, 'after': after})
+        return rv['data']['user']['friends']
+
+    pages = collect_pages(fetch)
+    assert [p['totalCount'] for p in pages] == [4, 4]
+    assert [[e['node']['name'] for e in p['edges']] for p in pages] == [
+        ['doctor who', 'bill potts'],
+        ['song river', 'rory williams'],
+    ]
+
+
+def test_connection_counts_only_when_total_count_selected(setup, db):
+    db.session.add(Follower(follower_id=1, followed_id=2))
+    db.session.add(Follower(follower_id=3, followed_id=2))
+    db.session.commit()
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    query = '''
+        query Followers($id: ID!) {
+          user(id: $id) {
+            followers(first: 1) {
+              %s
+              pageInfo {
+                hasNextPage
+              }
+            }
+          }
+        }
+    '''
+    id = to_global_id(UserType.__name__, 2)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        rv = client.execute(query % '', variable_values={'id': id})
+        assert rv['data']['user']['followers']['pageInfo']['hasNextPage']
+        assert not any('count(' in s.lower() for s in statements)
+
+        rv = client.execute(query % 'totalCount', variable_values={'id': id})
+        assert rv['data']['user']['followers']['totalCount'] == 2
+        assert any('count(' in s.lower() for s in statements)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def test_nested_connections_are_batched(setup, db, viewer_context):
+    for id in [1, 3, 4, 5]:
+        db.session.add_all(Friendship.build(2, id, 2, ACCEPTED))
+    db.session.add(Follower(follower_id=1, followed_id=3))
+    db.session.add(Follower(follower_id=1, followed_id=4))
+    db.session.add(Follower(follower_id=5, followed_id=4))
+    db.session.commit()
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    query = '''
+        query Nested($id: ID!) {
+          user(id: $id) {
+            friends(first: 10) {
+              edges {
+                node {
+                  name
+                  followers(first: 1) {
+                    edges {
+                      node {
+                        name
+                      }
+                    }
+                  }
+                }
+              }
+            }
+          }
+        }
+    '''
+    id = to_global_id(UserType.__name__, 2)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        rv = client.execute(
+            query, variable_values={'id': id},
+            context_value=viewer_context()
+        )
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+    friends = rv['data']['user']['friends']['edges']
+    followers = {
+        f['node']['name']: [e['node']['name'] for e in
+                            f['node']['followers']['edges']]
+        for f in friends
+    }
+    assert followers == {
+        'rory williams': [],
+        'doctor who': ['rory williams'],
+        'bill potts': ['rory williams'],
+        'song river': [],
+    }
+    # The user, their friends and the friends' followers.
+    assert len(statements) == 3
+    assert 'row_number() over' in statements[-1].lower()
+
+
+def test_user_columns_follow_selection_set(setup, db):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    query = '''
+        query Name($id: ID!) {
+          user(id: $id) {
+            ...name
+          }
+        }
+        fragment name on UserType {
+          name
+        }
+    '''
+    id = to_global_id(UserType.__name__, 1)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        rv = client.execute(query, variable_values={'id': id})
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+    assert rv['data'] == {'user': {'name': 'rory williams'}}
+    statement, = statements
+    assert 'users.first_name' in statement
+    assert 'users.password' not in statement
+    assert 'users.bio' not in statement
@@ -0,0 +1,82 @@
+import time
+
+import pytest
+
+from sqlalchemy import event
+
+from project.api.cache import MemoryBackend, NodeCache, SQLiteBackend
+from project.api.models.user import User
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def backend(request, tmpdir):
+    if request.param == 'sqlite':
+        return SQLiteBackend(str(tmpdir.join('nodes.db')), maxsize=2)
+    return MemoryBackend(maxsize=2)
+
+
+def test_backend_evicts_least_recently_used(backend):
+    backend.set('a', 1, ttl=60)
+    time.sleep(0.01)
+    backend.set('b', 2, ttl=60)
+    time.sleep(0.01)
+    assert backend.get('a') == 1
+    time.sleep(0.01)
+    backend.set('c', 3, ttl=60)
+
+    assert backend.get('a') == 1
+    assert backend.get('b') is None
+    assert backend.get('c') == 3
+
+
+def test_backend_expires_entries(backend):
+    backend.set('a', 1, ttl=-1)
+    assert backend.get('a') is None
+
+
+def test_backend_delete(backend):
+    backend.set('a', 1, ttl=60)
+    backend.delete('a')
+    assert backend.get('a') is None
+
+
+def test_node_cache_hit_issues_no_query(setup, db):
+    cache = NodeCache(MemoryBackend())
+    rory = cache.get(User, 1)
+    assert 'password' not in cache.backend.get('users:1')
+
+    db.session.remove()
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        user = cache.get(User, 1)
+        assert user.first_name == rory.first_name
+        assert statements == []
+
+        # Uncached columns are loaded on access.
+        assert user.password == 'roryspassword'
+        assert len(statements) == 1
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def test_node_cache_invalidate(setup, db):
+    cache = NodeCache(MemoryBackend())
+    cache.get(User, 1)
+    cache.invalidate(User, 1)
+    assert cache.backend.get('users:1') is None
+
+
+def test_node_cache_invalidate_across_processes(setup, db, tmpdir):
+    path = str(tmpdir.join('nodes.db'))
+    cache = NodeCache(SQLiteBackend(path))
+    other = NodeCache(SQLiteBackend(path))
+    other.get(User, 1)
+    assert cache.backend.get('users:1') is not None
+
+    cache.invalidate(User, 1)
+    assert other.backend.get('users:1') is None
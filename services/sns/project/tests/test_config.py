@@ -31,3 +31,4 @@ def test_production_config(app):
     assert not app.config['SQLALCHEMY_ECHO']
     assert not app.config['DEBUG_TB_ENABLED']
     assert app.config['BCRYPT_LOG_ROUNDS'] == 12
+    assert app.config['NODE_CACHE_BACKEND'] == 'sqlite'
@@ -0,0 +1,86 @@
+import json
+
+from graphql import parse
+
+from project.api.cost import QueryCostAnalyzer
+from project.api.schemas import schema
+
+
+def analyze(query, **kwargs):
+    return QueryCostAnalyzer(schema, default_limit=100).analyze(
+        parse(query), **kwargs)
+
+
+def test_cost_of_plain_fields():
+    cost, depth = analyze('{ user(id: "1") { id name } }')
+    assert cost == 3
+    assert depth == 2
+
+
+def test_cost_multiplied_by_page_size():
+    query = '''
+        query Friends($first: Int) {
+          user(id: "1") {
+            friends(first: $first) {
+              edges { node { name } }
+            }
+          }
+        }
+    '''
+    assert analyze(query, variables={'first': 10}) == (32, 5)
+    # Unbounded connections are assumed to resolve the default limit.
+    assert analyze(query).cost == 302
+
+
+def test_cost_of_nested_connections_through_fragments():
+    query = '''
+        {
+          user(id: "1") {
+            friends(first: 10) { ...friends }
+          }
+        }
+        fragment friends on UserConnection {
+          edges {
+            node {
+              ... on UserType {
+                followers(last: 5) { totalCount }
+              }
+            }
+          }
+        }
+    '''
+    # followers: 1 + 5 * 1, node: 1 + 6, edges: 1 + 7,
+    # friends: 1 + 10 * 8, user: 1 + 81
+    assert analyze(query) == (82, 6)
+
+
+def test_view_rejects_expensive_queries(setup, client, app):
+    query = '''
+        {
+          user(id: "VXNlclR5cGU6MQ==") {
+            friends(first: 2) { edges { node { name } } }
+          }
+        }
+    '''
+
+    def post():
+        rv = client.post(
+            '/', data=json.dumps({'query': query}),
+            content_type='application/json')
+        return rv.status_code, json.loads(rv.data.decode())
+
+    status, rv = post()
+    assert status == 200
+    assert rv['extensions']['cost']['requested'] == 8
+
+    max_cost = app.config['GRAPHQL_MAX_COST']
+    app.config['GRAPHQL_MAX_COST'] = 7
+    try:
+        status, rv = post()
+    finally:
+        app.config['GRAPHQL_MAX_COST'] = max_cost
+
+    assert status == 400
+    assert 'data' not in rv
+    assert rv['errors'][0]['message'] == (
+        'Query cost 8 exceeds the maximum cost of 7.')
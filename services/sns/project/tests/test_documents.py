@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+from graphql.error import GraphQLSyntaxError
+
+from project.api.documents import document_hash, DocumentCache
+from project.api.schemas import schema
+
+
+QUERY = '{ user(id: "VXNlclR5cGU6MQ==") { name } }'
+
+
+def test_document_cache_parses_once():
+    cache = DocumentCache(schema)
+    document = cache.parse(QUERY)
+
+    assert cache.parse(QUERY) is document
+    assert cache.get(document_hash(QUERY)) is document
+    assert cache.stats() == {'hits': 2, 'misses': 1, 'size': 1, 'maxsize': 128}
+
+
+def test_document_cache_keeps_validation_errors():
+    cache = DocumentCache(schema)
+    document = cache.parse('{ user(id: 1) { unknownField } }')
+    assert document.errors
+    assert cache.parse('{ user(id: 1) { unknownField } }') is document
+
+
+def test_document_cache_does_not_keep_syntax_errors():
+    cache = DocumentCache(schema)
+    with pytest.raises(GraphQLSyntaxError):
+        cache.parse('{ user(')
+    assert len(cache) == 0
+
+
+def test_document_cache_evicts_least_recently_used():
+    cache = DocumentCache(schema, maxsize=2)
+    queries = ['{ a: node(id: "%d") { id } }' % i for i in range(3)]
+
+    cache.parse(queries[0])
+    cache.parse(queries[1])
+    cache.parse(queries[0])
+    cache.parse(queries[2])
+
+    assert cache.get(document_hash(queries[0])) is not None
+    assert cache.get(document_hash(queries[1])) is None
+    assert len(cache) == 2
+
+
+def test_persisted_query(setup, client):
+    def post(data):
+        rv = client.post(
+            '/', data=json.dumps(data), content_type='application/json')
+        return json.loads(rv.data.decode())
+
+    extensions = {'persistedQuery': {'sha256Hash': document_hash(QUERY)}}
+
+    rv = post({'extensions': extensions})
+    assert rv['errors'][0]['message'] == 'PersistedQueryNotFound'
+
+    rv = post({'query': QUERY, 'extensions': extensions})
+    assert rv['data'] == {'user': {'name': 'rory williams'}}
+
+    rv = post({'extensions': extensions})
+    assert rv['data'] == {'user': {'name': 'rory williams'}}
+
+    rv = post({
+        'query': '{ node(id: "VXNlclR5cGU6MQ==") { id } }',
+        'extensions': extensions,
+    })
+    assert 'does not match' in rv['errors'][0]['message']
@@ -0,0 +1,89 @@
+import threading
+
+from project.api.executor import ThreadPoolExecutor
+from project.api.models.enums import FriendshipState
+from project.api.models.user import Follower, Friendship
+from project.api.schemas import schema
+from project.api.view import Context
+
+
+ACCEPTED, BLOCKED, PENDING, SUGGESTED = FriendshipState.__members__.values()
+
+QUERY = '''
+    {
+      user(id: "VXNlclR5cGU6Mg==") {
+        friends(first: 5) { ...users }
+        followers(first: 5) { ...users }
+        followings(first: 5) { ...users }
+        friendRequests(first: 5) {
+          totalCount
+          edges { node { from { name } to { name } } }
+        }
+        friendSuggestions(first: 5) {
+          totalCount
+          edges { node { from { name } } }
+        }
+      }
+    }
+    fragment users on UserConnection {
+      totalCount
+      edges { node { name } }
+    }
+'''
+
+
+def test_concurrent_execution_matches_sync_execution(setup, db, app):
+    db.session.add_all(Friendship.build(2, 3, 2, ACCEPTED))
+    db.session.add_all(Friendship.build(2, 4, 4, PENDING))
+    db.session.add_all(Friendship.build(2, 5, 3, SUGGESTED))
+    db.session.add(Follower(follower_id=1, followed_id=2))
+    db.session.add(Follower(follower_id=2, followed_id=5))
+    db.session.commit()
+
+    expected = schema.execute(QUERY, context_value=Context(None))
+    assert not expected.errors
+
+    executor = ThreadPoolExecutor(app)
+    rv = schema.execute(
+        QUERY, context_value=Context(None, executor), executor=executor)
+    assert not rv.errors
+    assert rv.data == expected.data
+
+
+def test_concurrent_fields_run_on_worker_threads(setup, db, app):
+    executor = ThreadPoolExecutor(app)
+    threads = []
+
+    def fn():
+        threads.append(threading.current_thread())
+        return 1
+
+    promise = executor.submit(fn)
+    executor.wait_until_finished()
+
+    assert promise.get() == 1
+    assert threads[0] is not threading.current_thread()
+
+
+def test_child_resolvers_run_on_request_thread(setup, db, app):
+    db.session.add_all(Friendship.build(2, 4, 4, PENDING))
+    db.session.commit()
+    threads = {}
+
+    def record_thread(next, root, info, **args):
+        threads.setdefault(info.field_name, set()).add(
+            threading.current_thread())
+        return next(root, info, **args)
+
+    executor = ThreadPoolExecutor(app)
+    rv = schema.execute(
+        QUERY, context_value=Context(None, executor), executor=executor,
+        middleware=[record_thread]
+    )
+    assert not rv.errors
+
+    concurrent = threads.pop('friendRequests') | threads.pop(
+        'friendSuggestions')
+    assert threading.current_thread() not in concurrent
+    assert threads['totalCount'] == {threading.current_thread()}
+    assert set.union(*threads.values()) == {threading.current_thread()}
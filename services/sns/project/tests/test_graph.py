@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from project.api.graph import FriendGraph
+from project.api.models.enums import FriendshipState
+from project.api.models.user import Friendship, User
+
+
+ACCEPTED, BLOCKED, PENDING, SUGGESTED = FriendshipState.__members__.values()
+
+
+def edges(*pairs):
+    return [e for a, b in pairs for e in ((a, b), (b, a))]
+
+
+@pytest.fixture
+def graph():
+    return FriendGraph(edges((1, 2), (1, 3), (2, 3), (3, 4), (4, 5)))
+
+
+@pytest.fixture
+def friend_graph(app):
+    app.config['FRIEND_GRAPH_ENABLED'] = True
+    yield
+    app.config['FRIEND_GRAPH_ENABLED'] = False
+    app.extensions.pop('friend_graph', None)
+
+
+def test_graph_queries(graph):
+    assert graph.neighbors(3).tolist() == [1, 2, 4]
+    assert graph.degree(5) == 1
+    assert graph.degree(9) == 0
+    assert graph.is_friend(4, 3)
+    assert not graph.is_friend(1, 4)
+    assert graph.mutual_friends(1, 2).tolist() == [3]
+
+    ids, counts = graph.friends_of_friends(1)
+    assert ids.tolist() == [4]
+    assert counts.tolist() == [1]
+
+
+def test_graph_deltas(graph):
+    graph.add(1, 4)
+    graph.remove(2, 3)
+    graph.add(5, 7)
+
+    assert graph.neighbors(1).tolist() == [2, 3, 4]
+    assert graph.neighbors(2).tolist() == [1]
+    assert graph.neighbors(7).tolist() == [5]
+    assert graph.mutual_friends(3, 5).tolist() == [4]
+
+
+def test_graph_compacts_deltas(graph):
+    graph.max_deltas = 2
+    graph.add(1, 4)
+    graph.add(2, 5)
+
+    assert graph.deltas == {}
+    assert graph.neighbors(1).tolist() == [2, 3, 4]
+    assert graph.neighbors(5).tolist() == [2, 4]
+
+
+def test_user_methods_route_to_graph(setup, db, friend_graph):
+    db.session.add_all(Friendship.build(1, 2, 1, ACCEPTED))
+    db.session.add_all(Friendship.build(1, 3, 1, ACCEPTED))
+    db.session.add_all(Friendship.build(2, 3, 2, ACCEPTED))
+    db.session.add_all(Friendship.build(3, 4, 3, PENDING))
+    db.session.commit()
+
+    rory, doctor = User.query.get(1), User.query.get(3)
+    assert [u.id for u in User.mutual_friends(1, 2)] == [3]
+    assert doctor.is_mutual_firend_of(1, 2)
+    assert doctor.friend_count() == 2
+
+    # Deltas are applied on commit.
+    User.query.get(4).accept(3)
+    db.session.commit()
+    assert rory.friends_of_friends() == [(4, 1)]
+
+    doctor.unfriend(4)
+    db.session.commit()
+    assert rory.friends_of_friends() == []
@@ -0,0 +1,68 @@
+from project.api.instrumentation import InstrumentationMiddleware, profiling
+from project.api.models.enums import FriendshipState
+from project.api.models.user import Follower, Friendship
+from project.api.schemas import schema
+from project.api.view import Context
+
+
+ACCEPTED, BLOCKED, PENDING, SUGGESTED = FriendshipState.__members__.values()
+
+
+def test_statements_attributed_to_resolvers(setup, db):
+    query = '{ user(id: "VXNlclR5cGU6MQ==") { name } }'
+
+    with profiling() as profile:
+        rv = schema.execute(query, middleware=[InstrumentationMiddleware()])
+    assert rv.data == {'user': {'name': 'rory williams'}}
+
+    summary = profile.summary()
+    assert summary['statements'] == 1
+    assert summary['totalTime'] >= summary['dbTime']
+    resolver, = summary['resolvers']
+    assert resolver['resolver'] == 'user'
+    assert resolver['statements'][0]['rows'] == 1
+
+
+def test_loader_statements_attributed_to_loading_fields(setup, db):
+    for id in [3, 4]:
+        db.session.add_all(Friendship.build(2, id, 2, ACCEPTED))
+    db.session.add(Follower(follower_id=1, followed_id=3))
+    db.session.add(Follower(follower_id=5, followed_id=4))
+    db.session.commit()
+
+    query = '''
+        {
+          user(id: "VXNlclR5cGU6Mg==") {
+            friends(first: 10) {
+              edges { node { followers(first: 1) { totalCount } } }
+            }
+          }
+        }
+    '''
+    with profiling() as profile:
+        rv = schema.execute(
+            query, context_value=Context(None),
+            middleware=[InstrumentationMiddleware()]
+        )
+    assert not rv.errors
+
+    summary = profile.summary()
+    assert summary['pythonTime'] >= 0
+    paths = [resolver['resolver'] for resolver in summary['resolvers']]
+    assert None not in paths
+    assert ['user.friends'] in paths
+    assert [
+        'user.friends.edges.0.node.followers',
+        'user.friends.edges.1.node.followers',
+    ] in paths
+    assert [
+        'user.friends.edges.0.node.followers.totalCount',
+        'user.friends.edges.1.node.followers.totalCount',
+    ] in paths
+
+
+def test_no_statements_recorded_outside_profiling(setup, db):
+    with profiling() as profile:
+        pass
+    schema.execute('{ user(id: "VXNlclR5cGU6MQ==") { name } }')
+    assert profile.statements == []
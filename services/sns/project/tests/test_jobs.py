@@ -0,0 +1,269 @@
+import time
+
+from datetime import datetime, timedelta
+
+from graphene import test
+from graphql_relay import to_global_id
+
+from project.api.jobs import (
+    canonicalize_friendships,
+    compute_friend_candidates,
+    expire_snoozes,
+    fan_out_posts,
+    IntervalJob,
+    reconcile_counters,
+    refresh_high_degree_authors,
+)
+from project.api.models.candidate import FriendCandidate, FriendCandidateUpdate
+from project.api.models.counter import CommentCounter, PostCounter
+from project.api.models.enums import FriendshipState, Reaction
+from project.api.models.post import PostReaction
+from project.api.models.timeline import (
+    HighDegreeAuthor,
+    TimelineEntry,
+    TimelineFanout,
+)
+from project.api.models.user import (
+    Follower,
+    Friendship,
+    FriendshipEdge,
+    User,
+)
+from project.api.schemas import schema
+from project.api.schemas.user.query import UserType
+
+
+ACCEPTED, BLOCKED, PENDING, SUGGESTED = FriendshipState.__members__.values()
+
+
+def candidates(user_id):
+    return [
+        (c.candidate_id, c.mutual_count)
+        for c in FriendCandidate.query.filter_by(user_id=user_id).
+        order_by(FriendCandidate.rank)
+    ]
+
+
+def test_canonicalize_friendships(setup, db):
+    db.session.execute(
+        'ALTER TABLE friendships '
+        'DROP CONSTRAINT friendships_canonical_check'
+    )
+    # A mirrored pair and a single reversed row.
+    db.session.execute(
+        'INSERT INTO friendships '
+        '(left_user_id, right_user_id, action_user_id, state) VALUES '
+        "(1, 2, 1, 'accepted'), (2, 1, 1, 'accepted'), "
+        "(5, 3, 5, 'blocked')"
+    )
+    db.session.commit()
+
+    assert canonicalize_friendships(batch_size=1, log=lambda s: None) == 2
+
+    rows = Friendship.query.order_by(Friendship.left_user_id).all()
+    assert [(r.left_user_id, r.right_user_id, r.action_user_id)
+            for r in rows] == [(1, 2, 1), (3, 5, 5)]
+    assert FriendshipEdge.query.filter_by(left_user_id=5).count() == 1
+
+
+def test_canonicalize_friendships_readable_while_converting(setup, db):
+    db.session.execute(
+        'ALTER TABLE friendships '
+        'DROP CONSTRAINT friendships_canonical_check'
+    )
+    db.session.execute(
+        'INSERT INTO friendships '
+        '(left_user_id, right_user_id, action_user_id, state) VALUES '
+        "(1, 2, 1, 'accepted'), (2, 1, 1, 'accepted'), "
+        "(5, 3, 5, 'blocked')"
+    )
+    db.session.commit()
+    reads = []
+
+    def read_edges(message):
+        rows = db.engine.execute(
+            'SELECT left_user_id, right_user_id FROM friendship_edges')
+        reads.append(sorted(tuple(row) for row in rows))
+
+    assert canonicalize_friendships(batch_size=1, log=read_edges) == 2
+
+    edges = [(1, 2), (2, 1), (3, 5), (5, 3)]
+    assert reads == [edges, edges]
+
+
+def test_compute_friend_candidates(setup, db):
+    db.session.add_all(Friendship.build(1, 2, 1, ACCEPTED))
+    db.session.add_all(Friendship.build(1, 3, 1, ACCEPTED))
+    db.session.add_all(Friendship.build(2, 4, 2, ACCEPTED))
+    db.session.add_all(Friendship.build(3, 4, 3, ACCEPTED))
+    db.session.add_all(Friendship.build(3, 5, 3, ACCEPTED))
+    db.session.add_all(Friendship.build(1, 5, 5, PENDING))
+    db.session.commit()
+
+    compute_friend_candidates(chunk_size=2, log=lambda s: None)
+    assert FriendCandidateUpdate.query.count() == 0
+    # 5 is excluded by the pending request.
+    assert candidates(1) == [(4, 2)]
+    assert candidates(4) == [(1, 2), (5, 1)]
+
+    # Only users whose friendships changed, and their friends,
+    # are recomputed.
+    db.session.add_all(User.query.get(4).block(1))
+    db.session.commit()
+    assert {u.user_id for u in FriendCandidateUpdate.query} == {1, 4}
+
+    assert compute_friend_candidates(log=lambda s: None) == 4
+    assert candidates(1) == []
+    assert candidates(4) == [(5, 1)]
+
+
+def test_people_you_may_know(setup, db):
+    db.session.add_all(Friendship.build(1, 2, 1, ACCEPTED))
+    db.session.add_all(Friendship.build(1, 3, 1, ACCEPTED))
+    db.session.add_all(Friendship.build(2, 4, 2, ACCEPTED))
+    db.session.add_all(Friendship.build(3, 4, 3, ACCEPTED))
+    db.session.add_all(Friendship.build(2, 5, 2, ACCEPTED))
+    db.session.commit()
+    compute_friend_candidates(full=True, log=lambda s: None)
+
+    query = '''
+        query PeopleYouMayKnow($id: ID!, $after: String) {
+          user(id: $id) {
+            peopleYouMayKnow(first: 1, after: $after) {
+              pageInfo {
+                hasNextPage
+                endCursor
+              }
+              edges {
+                node {
+                  name
+                }
+              }
+            }
+          }
+        }
+    '''
+    client = test.Client(schema)
+    variables = {'id': to_global_id(UserType.__name__, 1)}
+    rv = client.execute(query, variable_values=variables)
+    connection = rv['data']['user']['peopleYouMayKnow']
+    assert connection['edges'] == [{'node': {'name': 'bill potts'}}]
+    assert connection['pageInfo']['hasNextPage']
+
+    variables['after'] = connection['pageInfo']['endCursor']
+    rv = client.execute(query, variable_values=variables)
+    connection = rv['data']['user']['peopleYouMayKnow']
+    assert connection['edges'] == [{'node': {'name': 'song river'}}]
+    assert not connection['pageInfo']['hasNextPage']
+
+
+def test_expire_snoozes(setup, db):
+    now = datetime.utcnow()
+    db.session.add_all([
+        Follower(follower_id=1, followed_id=2, is_snoozed=True,
+                 expiration=now - timedelta(days=1)),
+        Follower(follower_id=1, followed_id=3, is_snoozed=True,
+                 expiration=now - timedelta(minutes=1)),
+        Follower(follower_id=2, followed_id=3, is_snoozed=True,
+                 expiration=now - timedelta(hours=1)),
+        Follower(follower_id=3, followed_id=1, is_snoozed=True,
+                 expiration=now + timedelta(days=1)),
+    ])
+    db.session.commit()
+
+    sweep = expire_snoozes(batch_size=2)
+    assert sweep.expired == 3
+    assert sweep.batches == 2
+
+    snoozed = Follower.query.filter_by(is_snoozed=True).all()
+    assert [(f.follower_id, f.followed_id) for f in snoozed] == [(3, 1)]
+    assert Follower.query.get((1, 2)).expiration is None
+
+
+def test_fan_out_posts(setup, db, add_post):
+    db.session.add_all([
+        Follower(follower_id=2, followed_id=1),
+        Follower(follower_id=3, followed_id=1, is_snoozed=True,
+                 expiration=datetime.utcnow() + timedelta(days=1)),
+        Follower(follower_id=4, followed_id=1),
+        Follower(follower_id=5, followed_id=2),
+    ])
+    db.session.commit()
+    add_post(1, 'hello')
+    add_post(2, 'hi')
+    assert TimelineFanout.query.count() == 2
+
+    fanout = fan_out_posts(batch_size=1)
+    assert fanout.posts == 2
+    assert fanout.entries == 5
+    assert fanout.batches == 5
+    assert TimelineFanout.query.count() == 0
+
+    timelines = {
+        (e.user_id, e.author_id) for e in TimelineEntry.query
+    }
+    # The snoozed follower is skipped.
+    assert timelines == {(1, 1), (2, 1), (4, 1), (2, 2), (5, 2)}
+
+
+def test_interval_job(app, setup, db):
+    db.session.add(Follower(follower_id=1, followed_id=2, is_snoozed=True,
+                            expiration=datetime.utcnow()))
+    db.session.commit()
+
+    job = IntervalJob(
+        app, expire_snoozes, 0.01, totals=('expired',), quiet=True)
+    job.start()
+    while not job.runs:
+        time.sleep(0.01)
+    job.stop()
+    job.join()
+    assert job.name == 'expire-snoozes'
+    assert job.totals == {'expired': 1}
+    assert not Follower.query.get((1, 2)).is_snoozed
+
+
+def test_refresh_high_degree_authors(setup, db, add_post):
+    db.session.add_all([
+        Follower(follower_id=2, followed_id=1),
+        Follower(follower_id=3, followed_id=1),
+        Follower(follower_id=4, followed_id=2),
+    ])
+    db.session.commit()
+
+    assert refresh_high_degree_authors(threshold=2) == 1
+    assert HighDegreeAuthor.query.get(1).follower_count == 2
+
+    add_post(1, 'hello')
+    add_post(1, 'hi')
+    fan_out_posts()
+    assert {e.user_id for e in TimelineEntry.query} == {1}
+
+    # Recent posts of authors below the threshold are fanned out.
+    assert refresh_high_degree_authors(threshold=3, window=1) == 0
+    assert TimelineFanout.query.count() == 1
+    fan_out_posts()
+    assert TimelineEntry.query.count() == 4
+
+
+def test_reconcile_counters(setup, db, add_post, add_comment):
+    p = add_post()
+    comment = add_comment(post=p)
+    db.session.add_all([
+        PostReaction(User.query.get(2), p, Reaction.LIKE),
+        PostReaction(User.query.get(3), p, Reaction.LOVE),
+    ])
+    db.session.commit()
+    add_comment(content='hey', post=p, root=comment)
+    expected = PostCounter.totals([p.id])
+
+    # Counters drifted, e.g. by writes bypassing the session.
+    PostCounter.query.filter_by(shard=2).delete()
+    CommentCounter.query.update({'reply_count': 5})
+    db.session.commit()
+
+    assert reconcile_counters(batch_size=1, log=lambda s: None) == 2
+    assert PostCounter.totals([p.id]) == expected
+    assert CommentCounter.totals([comment.id])[comment.id][
+        'reply_count'] == 1
+    assert reconcile_counters(log=lambda s: None) == 0
@@ -0,0 +1,48 @@
+import glob
+import importlib.util
+import os
+
+from project.api.models.comment import Comment, CommentReaction
+from project.api.models.post import Post, PostReaction
+from project.api.models.user import Follower, Friendship
+
+
+VERSIONS = os.path.join(
+    os.path.dirname(__file__), os.pardir, os.pardir, 'migrations', 'versions')
+
+
+def load_revisions():
+    revisions = {}
+    for path in glob.glob(os.path.join(VERSIONS, '*.py')):
+        spec = importlib.util.spec_from_file_location(
+            os.path.basename(path)[:-3], path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        revisions[module.revision] = module
+    return revisions
+
+
+def test_revisions_form_a_single_history():
+    revisions = load_revisions()
+    down_revisions = [r.down_revision for r in revisions.values()]
+
+    assert down_revisions.count(None) == 1
+    assert len(set(down_revisions)) == len(down_revisions)
+    assert set(down_revisions) - {None} <= set(revisions)
+
+
+def test_concurrent_indexes_match_models():
+    migrated = {
+        name
+        for module in load_revisions().values()
+        for name, table, columns, where in getattr(module, 'INDEXES', [])
+    }
+    declared = {
+        index.name
+        for model in (
+            Friendship, Follower, Post, PostReaction, Comment,
+            CommentReaction
+        )
+        for index in model.__table__.indexes
+    }
+    assert migrated == declared
@@ -0,0 +1,82 @@
+from graphene import test
+from graphql_relay import to_global_id
+
+from project.api.schemas import schema
+from project.api.search import load_search
+
+
+client = test.Client(schema)
+
+
+def contents(page):
+    return [(kind, node.content) for node, rank, kind, id in page.rows]
+
+
+def test_search_ranks_posts_and_comments(setup, add_post, add_comment):
+    add_post(1, 'A fox jumped over the lazy dogs.')
+    add_post(1, 'Foxes, foxes and more foxes.')
+    add_post(1, 'Nothing to see here.')
+    add_comment(1, 'That fox again?')
+
+    page = load_search('fox', {})
+    assert contents(page) == [
+        ('post', 'Foxes, foxes and more foxes.'),
+        ('post', 'A fox jumped over the lazy dogs.'),
+        ('comment', 'That fox again?'),
+    ]
+    assert page.count() == 3
+
+    # Words are stemmed and phrases are matched in order.
+    assert contents(load_search('dog', {})) == [
+        ('post', 'A fox jumped over the lazy dogs.')]
+    assert contents(load_search('"lazy dogs" -again', {})) == [
+        ('post', 'A fox jumped over the lazy dogs.')]
+
+
+def test_search_keyset_pagination(setup, add_post, add_comment,
+                                  collect_pages):
+    for i in range(3):
+        add_post(1, 'fox')
+    add_comment(1, 'fox')
+
+    query = '''
+        query Search($after: String) {
+          search(query: "fox", first: 3, after: $after) {
+            pageInfo {
+              hasNextPage
+              endCursor
+            }
+            edges {
+              node {
+                ... on PostType {
+                  id
+                }
+                ... on CommentType {
+                  id
+                }
+              }
+            }
+          }
+        }
+    '''
+
+    def fetch(after):
+        rv = client.execute(query, variable_values={'after': after})
+        return rv['data']['search']
+
+    pages = collect_pages(fetch)
+    # Equal ranks are ordered by kind and ID.
+    assert [[e['node']['id'] for e in page['edges']] for page in pages] == [
+        [to_global_id('PostType', id) for id in (3, 2, 1)],
+        [to_global_id('CommentType', 1)],
+    ]
+
+
+def test_search_vector_follows_content(setup, db, add_post):
+    post = add_post(1, 'red apples')
+    post.content = 'green pears'
+    db.session.flush()
+
+    # The vector is updated in the transaction of the write.
+    assert contents(load_search('pear', {})) == [('post', 'green pears')]
+    assert contents(load_search('apple', {})) == []
@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from sqlalchemy import event
+
+from project.api.paging import keyset_to_cursor
+from project.api.threads import load_thread
+
+
+@pytest.fixture
+def thread(setup, add_post, add_comment):
+    """Add a post with the thread::
+
+        a
+          a1
+            a1x
+              a1xy
+          a2
+          a3
+        b
+        c
+    """
+    post = add_post()
+    now = datetime.utcnow()
+    comments = {}
+    for i, (name, root) in enumerate([
+        ('a', None), ('b', None), ('a1', 'a'), ('a2', 'a'), ('c', None),
+        ('a1x', 'a1'), ('a3', 'a'), ('a1xy', 'a1x'),
+    ]):
+        comments[name] = add_comment(
+            2, name, post=post, root=root and comments[root],
+            created=now + timedelta(minutes=i)
+        )
+    return post, comments
+
+
+def tree(nodes):
+    return [(n.content, tree(n.replies)) for n in nodes]
+
+
+def test_load_thread_in_one_query(db, thread):
+    post, comments = thread
+    db.session.expunge_all()
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        page = load_thread(
+            {'first': 2}, post_id=post.id, max_depth=2, max_replies=2)
+        nodes = [node for node, created, id in page.rows]
+        assert tree(nodes) == [
+            ('a', [('a1', [('a1x', [])]), ('a2', [])]),
+            ('b', []),
+            # One more top-level comment tells there's a next page.
+            ('c', []),
+        ]
+        assert nodes[0].author.first_name == 'amy'
+        assert len(statements) == 1
+        assert 'WITH RECURSIVE' in statements[0]
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+    assert page.count() == 3
+
+
+def test_load_thread_pages_and_subtrees(thread):
+    post, comments = thread
+
+    page = load_thread({'first': 2}, post_id=post.id, max_depth=0)
+    after = keyset_to_cursor(page.rows[1][1:])
+    page = load_thread(
+        {'first': 2, 'after': after}, post_id=post.id, max_depth=0)
+    assert [n.content for n, *key in page.rows] == ['c']
+
+    # Backward pages are fetched latest first.
+    page = load_thread({'last': 2}, post_id=post.id, max_depth=0)
+    assert [n.content for n, *key in page.rows] == ['c', 'b', 'a']
+
+    page = load_thread({}, root_id=comments['a'].id, max_replies=1)
+    assert tree(n for n, *key in page.rows) == [
+        ('a1', [('a1x', [('a1xy', [])])]),
+        ('a2', []),
+        ('a3', []),
+    ]
+    assert page.count() == 3
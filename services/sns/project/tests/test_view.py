@@ -0,0 +1,143 @@
+import json
+
+import jwt
+
+from sqlalchemy import event
+
+from project.api.models.enums import FriendshipState
+from project.api.models.user import Follower, Friendship
+
+
+ACCEPTED, BLOCKED, PENDING, SUGGESTED = FriendshipState.__members__.values()
+
+
+def post(client, data, headers=None):
+    rv = client.post(
+        '/', data=json.dumps(data), content_type='application/json',
+        headers=headers
+    )
+    return rv.status_code, json.loads(rv.data.decode())
+
+
+def bearer(app, sub):
+    token = jwt.encode({'sub': sub}, app.config['SECRET_KEY'], 'HS256')
+    return {'Authorization': 'Bearer ' + token.decode()}
+
+
+def test_batched_operations(setup, client):
+    status, rv = post(client, [
+        {'query': '{ user(id: "VXNlclR5cGU6MQ==") { name } }'},
+        {
+            'query': 'query U($id: ID!) { user(id: $id) { name } }',
+            'variables': {'id': 'VXNlclR5cGU6Mg=='},
+        },
+        {'query': '{ user(id: "VXNlclR5cGU6MQ==") { unknown } }'},
+    ])
+
+    assert status == 400
+    assert len(rv) == 3
+    assert rv[0]['data'] == {'user': {'name': 'rory williams'}}
+    assert rv[1]['data'] == {'user': {'name': 'amy pond'}}
+    assert 'data' not in rv[2]
+    assert rv[2]['errors']
+
+
+def test_batch_size_is_limited(setup, client, app):
+    query = {'query': '{ user(id: "VXNlclR5cGU6MQ==") { name } }'}
+    max_size = app.config['GRAPHQL_MAX_BATCH_SIZE']
+
+    status, rv = post(client, [query] * max_size)
+    assert status == 200
+    assert len(rv) == max_size
+
+    status, rv = post(client, [query] * (max_size + 1))
+    assert status == 400
+    assert rv['errors'][0]['message'] == (
+        'Batches must have 1 to {} operations.'.format(max_size))
+
+    status, rv = post(client, [])
+    assert status == 400
+
+
+def test_viewer_fields_are_batched(setup, db, client, app):
+    db.session.add_all(Friendship.build(2, 1, 2, ACCEPTED))
+    db.session.add_all(Friendship.build(2, 3, 2, ACCEPTED))
+    db.session.add_all(Friendship.build(2, 4, 2, ACCEPTED))
+    db.session.add_all(Friendship.build(2, 5, 2, ACCEPTED))
+    db.session.add_all(Friendship.build(1, 3, 1, ACCEPTED))
+    db.session.add_all(Friendship.build(1, 4, 4, PENDING))
+    db.session.add(Follower(follower_id=1, followed_id=5))
+    db.session.commit()
+
+    query = {'query': '''
+        {
+          user(id: "VXNlclR5cGU6Mg==") {
+            friends {
+              edges {
+                node {
+                  name
+                  viewerIsFriend
+                  viewerIsFollowing
+                  viewerFriendshipState
+                }
+              }
+            }
+          }
+        }
+    '''}
+
+    statements = []
+    listener = (lambda conn, cursor, statement, *args:
+                statements.append(statement))
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        status, rv = post(client, query, bearer(app, '1'))
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+
+    assert status == 200
+    nodes = {
+        e['node'].pop('name'): e['node']
+        for e in rv['data']['user']['friends']['edges']
+    }
+    assert nodes == {
+        'rory williams': {
+            'viewerIsFriend': False,
+            'viewerIsFollowing': False,
+            'viewerFriendshipState': None,
+        },
+        'doctor who': {
+            'viewerIsFriend': True,
+            'viewerIsFollowing': False,
+            'viewerFriendshipState': 'ACCEPTED',
+        },
+        'bill potts': {
+            'viewerIsFriend': False,
+            'viewerIsFollowing': False,
+            'viewerFriendshipState': 'PENDING',
+        },
+        'song river': {
+            'viewerIsFriend': False,
+            'viewerIsFollowing': True,
+            'viewerFriendshipState': None,
+        },
+    }
+    # The user, the page of friends, and one batch per viewer relation.
+    assert len(statements) == 4
+
+
+def test_viewer_fields_without_viewer(setup, client):
+    status, rv = post(client, {
+        'query': '{ user(id: "VXNlclR5cGU6MQ==") { viewerIsFriend } }'
+    })
+    assert status == 200
+    assert rv['data'] == {'user': {'viewerIsFriend': None}}
+
+
+def test_invalid_access_token(setup, client):
+    status, rv = post(
+        client,
+        {'query': '{ user(id: "VXNlclR5cGU6MQ==") { name } }'},
+        {'Authorization': 'Bearer invalid'}
+    )
+    assert status == 401
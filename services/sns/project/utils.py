@@ -2,13 +2,19 @@ import re
 
 import graphene
 
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.schema import CreateColumn, FetchedValue
 from sqlalchemy.sql import expression
 from sqlalchemy.types import DateTime
 
 from project import db
 
 
+# Text search configuration of the search vectors and queries.
+SEARCH_CONFIG = 'english'
+
+
 def format_name(name):
     """Strip spaces and format names.
 
@@ -85,3 +91,30 @@ class utcnow(expression.FunctionElement):
 def pg_utcnow(element, compiler, **kwargs):
     """PostgreSQL timestamp syntax."""
     return "TIMEZONE('utc', statement_timestamp())"
+
+
+def tsvector_column(source):
+    """Return a deferred ``tsvector`` column generated by PostgreSQL
+    from the text column named ``source``.
+
+    The column is computed in the row, so it and its indexes are
+    updated in the transaction that writes the text.
+    """
+    return db.deferred(db.Column(
+        TSVECTOR,
+        server_default=FetchedValue(),
+        server_onupdate=FetchedValue(),
+        info={'generated': f"to_tsvector('{SEARCH_CONFIG}', {source})"}
+    ))
+
+
+@compiles(CreateColumn, 'postgresql')
+def pg_generated_column(element, compiler, **kwargs):
+    """PostgreSQL stored generated column syntax, for columns with
+    a ``generated`` SQL expression in their info.
+    """
+    text = compiler.visit_create_column(element, **kwargs)
+    generated = element.element.info.get('generated')
+    if text is not None and generated is not None:
+        text += f' GENERATED ALWAYS AS ({generated}) STORED'
+    return text